@@ -8,6 +8,7 @@ const path = require('path');
 const os = require('os');
 const Docker = require('dockerode');
 const { ethers } = require('ethers');
+const { performance } = require('perf_hooks');
 
 const docker = new Docker();
 
@@ -15,6 +16,7 @@ const docker = new Docker();
 const OpenWorkload = require('./workloads/open.js');
 const QueryWorkload = require('./workloads/query.js');
 const TransferWorkload = require('./workloads/transfer.js');
+const { elapsedMs } = require('./workloads/utils/operation-base.js');
 
 const app = express();
 const port = 3000;
@@ -86,9 +88,8 @@ class DynamicLoadBalancer {
 }
 
 const balancer = new DynamicLoadBalancer(allWorkloads);
-const getNextOpenWorkload = () => balancer.getNextInstance('open').open;
-const getNextQueryWorkload = () => balancer.getNextInstance('query').query;
-const getNextTransferWorkload = () => balancer.getNextInstance('transfer').transfer;
+// Nome do nó (como no docker-compose) de uma instância escolhida pelo balanceador.
+const nodeName = (instance) => `node${instance.index + 1}`;
 
 // --- Gestor de Nonce Unificado com Auto-Recuperação ---
 class NonceManager {
@@ -151,6 +152,99 @@ const provider = new ethers.JsonRpcProvider(BESU_NODE_URLS[0]);
 const signer = new ethers.Wallet(DEPLOYER_PRIVATE_KEY, provider);
 const nonceManager = new NonceManager(provider, signer);
 
+// --- Registo de Tempos por Etapa (NDJSON) ---
+// Cada pedido gera uma linha {"type":"job"} com o tempo (ms) gasto em cada etapa: espera na fila (queue_ms),
+// espera pelo lock do nonce (nonce_ms), preparação da transação (prepare_ms), assinatura (sign_ms), envio ao
+// nó (send_ms) ou chamada de leitura (call_ms), e o total desde a aceitação (total_ms). A profundidade da fila
+// é amostrada em linhas {"type":"queue"}. Há um ficheiro por execução (/monitor/start), lido pelo
+// testes/stageTimings.py; STAGE_TIMING=0 desativa o registo.
+const STAGE_TIMING_ENABLED = process.env.STAGE_TIMING !== '0';
+const STAGE_LOG_DIR = path.join(os.tmpdir(), 'jmeter_docker_logs');
+const QUEUE_SAMPLE_INTERVAL_MS = 250;
+
+class StageLog {
+    constructor(dir, enabled) {
+        this.dir = dir;
+        this.enabled = enabled;
+        this.current = null;
+        // Execuções cujo ficheiro ainda não foi totalmente escrito (runId -> run); saem ao evento 'finish'.
+        this.unfinished = new Map();
+        if (enabled && !fs.existsSync(dir)) {
+            fs.mkdirSync(dir, { recursive: true });
+        }
+    }
+
+    filePath(runId) {
+        return path.join(this.dir, `stage_timings_${runId}.ndjson`);
+    }
+
+    startRun(runId) {
+        if (!this.enabled) return;
+        if (this.current) {
+            this.current.open = false;
+            this.closeIfDone(this.current);
+        }
+        const stream = fs.createWriteStream(this.filePath(runId), { flags: 'w' });
+        stream.on('error', (e) => console.error(`Erro ao gravar os tempos por etapa de ${runId}:`, e.message));
+        const run = { runId, stream, pending: 0, open: true };
+        run.finished = new Promise((resolve) => {
+            const done = () => {
+                if (this.unfinished.get(runId) === run) this.unfinished.delete(runId);
+                resolve();
+            };
+            stream.on('finish', done);
+            stream.on('error', done);
+        });
+        this.unfinished.set(runId, run);
+        this.current = run;
+    }
+
+    // Fecha a execução em curso (/monitor/stop); o ficheiro termina quando os pedidos pendentes acabarem.
+    stopRun(runId) {
+        if (!this.current || this.current.runId !== runId) return;
+        this.current.open = false;
+        this.closeIfDone(this.current);
+        this.current = null;
+    }
+
+    // Promise resolvida quando o ficheiro da execução estiver completo; null se a execução ainda estiver aberta.
+    whenFinished(runId) {
+        const run = this.unfinished.get(runId);
+        if (!run) return Promise.resolve();
+        return run.open ? null : run.finished;
+    }
+
+    // Os pedidos ficam associados à execução em curso quando são aceites; o ficheiro de uma execução só é
+    // fechado depois de todos os seus pedidos terminarem, mesmo que já tenha começado outra.
+    acquire() {
+        if (!this.enabled) return null;
+        if (!this.current) this.startRun('manual');
+        this.current.pending++;
+        return this.current;
+    }
+
+    release(run, record) {
+        if (!run) return;
+        record.run = run.runId;
+        run.stream.write(JSON.stringify(record) + '\n');
+        run.pending--;
+        this.closeIfDone(run);
+    }
+
+    sample(record) {
+        if (this.current && this.current.open) {
+            record.run = this.current.runId;
+            this.current.stream.write(JSON.stringify(record) + '\n');
+        }
+    }
+
+    closeIfDone(run) {
+        if (!run.open && run.pending === 0) run.stream.end();
+    }
+}
+
+const stageLog = new StageLog(STAGE_LOG_DIR, STAGE_TIMING_ENABLED);
+
 // --- Fila de Trabalhos (Job Queue) ---
 let processingErrors = [];
 
@@ -162,8 +256,15 @@ class JobQueue {
         console.log(`Fila de trabalhos iniciada com ${concurrency} workers.`);
     }
 
-    addJob(job) {
-        this.queue.push(job);
+    addJob(operation, job) {
+        this.queue.push({
+            operation,
+            job,
+            run: stageLog.acquire(),
+            acceptedAt: Date.now(),
+            enqueuedAt: performance.now(),
+            queueDepth: this.queue.length + this.workers.length
+        });
         this.processQueue();
     }
     
@@ -184,11 +285,26 @@ class JobQueue {
         }
     }
 
-    async runWorker(job) {
+    async runWorker(entry) {
+        const startedAt = performance.now();
+        const timing = {
+            type: 'job',
+            op: entry.operation,
+            node: null,
+            nonce: null,
+            accepted_at: entry.acceptedAt,
+            queue_depth: entry.queueDepth,
+            queue_ms: Math.round((startedAt - entry.enqueuedAt) * 1000) / 1000
+        };
         try {
             const nonceToUse = await nonceManager.getNextNonce();
-            await job(nonceToUse);
+            timing.nonce_ms = elapsedMs(startedAt);
+            timing.nonce = nonceToUse;
+            await entry.job(nonceToUse, timing);
+            timing.ok = true;
         } catch (error) {
+            timing.ok = false;
+            timing.error = error.code || error.message;
             console.error("Erro ao processar trabalho da fila:", error.message);
             processingErrors.push({
                 timestamp: new Date().toISOString(),
@@ -201,12 +317,27 @@ class JobQueue {
             if (errorMessage.includes('nonce') || errorMessage.includes('Nonce')) {
                 await nonceManager.resyncNonce();
             }
+        } finally {
+            timing.total_ms = elapsedMs(entry.enqueuedAt);
+            stageLog.release(entry.run, timing);
         }
     }
 }
 
 const writeQueue = new JobQueue(5);
 
+// Amostra a profundidade da fila enquanto há trabalho (e uma última vez quando fica vazia).
+let queueWasIdle = true;
+if (STAGE_TIMING_ENABLED) {
+    setInterval(() => {
+        const idle = writeQueue.isIdle();
+        if (!idle || !queueWasIdle) {
+            stageLog.sample({ type: 'queue', ts: Date.now(), queued: writeQueue.queue.length, active: writeQueue.workers.length });
+        }
+        queueWasIdle = idle;
+    }, QUEUE_SAMPLE_INTERVAL_MS).unref();
+}
+
 // --- Endpoints de Controle ---
 app.get('/queue/status', (req, res) => {
     res.status(200).json({
@@ -235,7 +366,9 @@ if (!fs.existsSync(LOG_DIR)) {
 }
 
 app.post('/monitor/start', (req, res) => {
-    const { roundName, runNumber } = req.body;
+    // dockerStats=false: os recursos são recolhidos fora da API (testes/cgroupCollector.py); apenas a execução
+    // é registada, para os tempos por etapa.
+    const { roundName, runNumber, dockerStats = true } = req.body;
     const runId = `${roundName}_run_${runNumber}`;
     const logPath = path.join(LOG_DIR, `docker_stats_${runId}.log`);
 
@@ -243,6 +376,11 @@ app.post('/monitor/start', (req, res) => {
         return res.status(409).json({ message: `O monitoramento para ${runId} já está em execução.` });
     }
 
+    stageLog.startRun(runId);
+    if (!dockerStats) {
+        monitoringProcesses[runId] = {};
+        return res.status(202).json({ message: `Execução ${runId} registada (sem docker stats).` });
+    }
     console.log(`Iniciando monitoramento para: ${runId}. A gravar em: ${logPath}`);
     const logStream = fs.createWriteStream(logPath, { flags: 'w' });
 
@@ -280,7 +418,10 @@ app.post('/monitor/start', (req, res) => {
                         const netTxKB = (netTx / 1024).toFixed(2);
                         const diskReadKB = (diskRead / 1024).toFixed(2);
                         const diskWriteKB = (diskWrite / 1024).toFixed(2);
-                        const logLine = `${stats.name.substring(1)},${cpuPercent.toFixed(2)}%,${memUsage}MiB,${netRxKB}KB,${netTxKB}KB,${diskReadKB}KB,${diskWriteKB}KB\n`;
+                        // Instante real da amostra (ms desde epoch); os contadores de rede e disco são cumulativos,
+                        // por isso o script de gráficos calcula as taxas a partir deste timestamp.
+                        const sampleTime = Date.parse(stats.read) || Date.now();
+                        const logLine = `${stats.name.substring(1)},${cpuPercent.toFixed(2)}%,${memUsage}MiB,${netRxKB}KB,${netTxKB}KB,${diskReadKB}KB,${diskWriteKB}KB,${sampleTime}\n`;
                         logStream.write(logLine);
                     } catch (e) {
                         console.error("Erro ao fazer parse das estatísticas do Docker:", e);
@@ -304,6 +445,7 @@ app.post('/monitor/stop', (req, res) => {
     const { roundName, runNumber } = req.body;
     const runId = `${roundName}_run_${runNumber}`;
     const processInfo = monitoringProcesses[runId];
+    stageLog.stopRun(runId);
     if (processInfo) {
         console.log(`Parando monitoramento para: ${runId}`);
         for (const containerName in processInfo) {
@@ -326,15 +468,30 @@ app.get('/monitor/logs/:roundName/:runNumber', (req, res) => {
     else res.status(404).send('Ficheiro de log não encontrado.');
 });
 
+app.get('/monitor/timings/:roundName/:runNumber', async (req, res) => {
+    const { roundName, runNumber } = req.params;
+    const runId = `${roundName}_run_${runNumber}`;
+    // Só se serve o ficheiro depois do 'finish' do stream: antes disso a última linha pode estar incompleta.
+    const finished = stageLog.whenFinished(runId);
+    if (!finished) return res.status(409).send('Execução ainda em curso; chame /monitor/stop primeiro.');
+    await finished;
+    const timingsPath = stageLog.filePath(runId);
+    if (fs.existsSync(timingsPath)) res.sendFile(timingsPath);
+    else res.status(404).send('Ficheiro de tempos por etapa não encontrado.');
+});
+
 // --- Endpoints ---
 app.post('/open-async', (req, res) => {
     const { accountId, amount } = req.body;
     if (!accountId || amount === undefined) return res.status(400).json({ error: "Campos 'accountId' e 'amount' são obrigatórios." });
 
-    writeQueue.addJob(async (nonce) => {
-        const workload = getNextOpenWorkload();
-        const txResponse = await workload.submitTransaction(accountId, amount, nonce);
-        console.log(`(Fila) Transação 'open' para ${accountId} submetida. Hash: ${txResponse.hash}, Nonce: ${nonce}`);
+    // Instante de aceitação do pedido; junto com o de submissão permite medir a latência até à inclusão no bloco.
+    const enqueuedAt = Date.now();
+    writeQueue.addJob('open', async (nonce, timing) => {
+        const instance = balancer.getNextInstance('open');
+        timing.node = nodeName(instance);
+        const txResponse = await instance.open.submitTransaction(accountId, amount, nonce, timing);
+        console.log(`(Fila) Transação 'open' para ${accountId} submetida. Hash: ${txResponse.hash}, Nonce: ${nonce}, Enfileirado: ${enqueuedAt}, Submetido: ${Date.now()}`);
     });
 
     res.status(202).json({ message: `Transação 'open' para ${accountId} enfileirada com sucesso.` });
@@ -344,10 +501,12 @@ app.post('/transfer-async', (req, res) => {
     const { from, to, amount } = req.body;
     if (!from || !to || amount === undefined) return res.status(400).json({ error: "Os campos 'from', 'to' e 'amount' são obrigatórios." });
 
-    writeQueue.addJob(async (nonce) => {
-        const workload = getNextTransferWorkload();
-        const txResponse = await workload.submitTransaction(from, to, amount, nonce);
-        console.log(`(Fila) Transação 'transfer' de ${from} para ${to} submetida. Hash: ${txResponse.hash}, Nonce: ${nonce}`);
+    const enqueuedAt = Date.now();
+    writeQueue.addJob('transfer', async (nonce, timing) => {
+        const instance = balancer.getNextInstance('transfer');
+        timing.node = nodeName(instance);
+        const txResponse = await instance.transfer.submitTransaction(from, to, amount, nonce, timing);
+        console.log(`(Fila) Transação 'transfer' de ${from} para ${to} submetida. Hash: ${txResponse.hash}, Nonce: ${nonce}, Enfileirado: ${enqueuedAt}, Submetido: ${Date.now()}`);
     });
 
     res.status(202).json({ message: "Transação 'transfer' enfileirada com sucesso." });
@@ -357,13 +516,24 @@ app.get('/query/:accountId', async (req, res) => {
     const { accountId } = req.params;
     if (!accountId) return res.status(400).json({ error: "O campo 'accountId' é obrigatório." });
 
+    // As leituras não passam pela fila: o único tempo relevante é a chamada ao nó (eth_call).
+    const run = stageLog.acquire();
+    const startedAt = performance.now();
+    const instance = balancer.getNextInstance('query');
+    const timing = { type: 'job', op: 'query', node: nodeName(instance), accepted_at: Date.now() };
     try {
-        const workload = getNextQueryWorkload();
-        const balance = await workload.submitTransaction(accountId);
+        const balance = await instance.query.submitTransaction(accountId);
+        timing.call_ms = elapsedMs(startedAt);
+        timing.ok = true;
         res.status(200).json({ accountId: accountId, balance: balance.toString() });
     } catch (error) {
+        timing.ok = false;
+        timing.error = error.code || error.message;
         console.error(`Falha ao executar 'query' para a conta ${accountId}:`, error);
         res.status(500).json({ error: "Falha ao executar a função 'query'.", details: error.message });
+    } finally {
+        timing.total_ms = elapsedMs(startedAt);
+        stageLog.release(run, timing);
     }
 });
 
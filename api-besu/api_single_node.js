@@ -309,10 +309,12 @@ app.post('/open-async', (req, res) => {
     const { accountId, amount } = req.body;
     if (!accountId || amount === undefined) return res.status(400).json({ error: "Campos 'accountId' e 'amount' são obrigatórios." });
 
+    // Instante de aceitação do pedido; junto com o de submissão permite medir a latência até à inclusão no bloco.
+    const enqueuedAt = Date.now();
     writeQueue.addJob(async (nonce) => {
         const workload = getNextOpenWorkload();
         const txResponse = await workload.submitTransaction(accountId, amount, nonce);
-        console.log(`(Fila) Transação 'open' para ${accountId} submetida. Hash: ${txResponse.hash}, Nonce: ${nonce}`);
+        console.log(`(Fila) Transação 'open' para ${accountId} submetida. Hash: ${txResponse.hash}, Nonce: ${nonce}, Enfileirado: ${enqueuedAt}, Submetido: ${Date.now()}`);
     });
 
     res.status(202).json({ message: `Transação 'open' para ${accountId} enfileirada com sucesso.` });
@@ -322,10 +324,11 @@ app.post('/transfer-async', (req, res) => {
     const { from, to, amount } = req.body;
     if (!from || !to || amount === undefined) return res.status(400).json({ error: "Os campos 'from', 'to' e 'amount' são obrigatórios." });
 
+    const enqueuedAt = Date.now();
     writeQueue.addJob(async (nonce) => {
         const workload = getNextTransferWorkload();
         const txResponse = await workload.submitTransaction(from, to, amount, nonce);
-        console.log(`(Fila) Transação 'transfer' de ${from} para ${to} submetida. Hash: ${txResponse.hash}, Nonce: ${nonce}`);
+        console.log(`(Fila) Transação 'transfer' de ${from} para ${to} submetida. Hash: ${txResponse.hash}, Nonce: ${nonce}, Enfileirado: ${enqueuedAt}, Submetido: ${Date.now()}`);
     });
 
     res.status(202).json({ message: "Transação 'transfer' enfileirada com sucesso." });
@@ -10,13 +10,13 @@ class Open extends OperationBase {
     
     // MODIFICAÇÃO: O método agora aceita os argumentos diretamente.
     // A lógica de negócio está focada apenas em montar e enviar a transação.
-    async submitTransaction(accountId, amount, nonce) {
+    async submitTransaction(accountId, amount, nonce, timings) {
         const createArgs = { 
             acc_id: accountId, 
             amount: amount 
         };
-        // Passa o nonce para a sendRequest
-        return await this.sendRequest('open', createArgs, false, nonce);
+        // Passa o nonce (e, opcionalmente, o objeto onde registar os tempos por etapa) para a sendRequest
+        return await this.sendRequest('open', createArgs, false, nonce, timings);
     }
 }
 
@@ -12,16 +12,18 @@ class Transfer extends OperationBase {
      * @param {string} fromAccount A conta de origem.
      * @param {string} toAccount A conta de destino.
      * @param {number} amount O valor a ser transferido.
+     * @param {number} nonce O nonce atribuído pelo gestor de nonce.
+     * @param {object} [timings] Objeto onde registar o tempo de cada etapa (preparação, assinatura, envio).
      * @returns {Promise<any>} O objeto da transação enviada.
      */
-    async submitTransaction(fromAccount, toAccount, amount, nonce) {
+    async submitTransaction(fromAccount, toAccount, amount, nonce, timings) {
         const transferArgs = {
             acc_from: fromAccount,
             acc_to: toAccount,
             amount: amount
         };
         // Passa o nonce para a sendRequest
-        return await this.sendRequest('transfer', transferArgs, false, nonce);
+        return await this.sendRequest('transfer', transferArgs, false, nonce, timings);
     }
 }
 
@@ -1,6 +1,10 @@
 'use strict';
 
 const { ethers } = require('ethers');
+const { performance } = require('perf_hooks');
+
+// Duração (ms, com precisão de microssegundos) desde um instante obtido com performance.now().
+const elapsedMs = (start) => Math.round((performance.now() - start) * 1000) / 1000;
 
 class OperationBase {
     constructor(rpcUrl, privateKey, contractAddress) {
@@ -21,12 +25,25 @@ class OperationBase {
         return nonce;
     }
     
-    async sendRequest(operation, args, isReadOnly, nonce) {
+    async sendRequest(operation, args, isReadOnly, nonce, timings) {
         if (isReadOnly) {
             return this.contract[operation](...Object.values(args));
-        } else {
+        } else if (!timings) {
             return this.contract[operation](...Object.values(args), { nonce });
         }
+        // Mesmo percurso que contract[operation]() faz internamente, mas cronometrado por etapa:
+        // preparação (estimativa de gas, chainId e taxas via RPC), assinatura local e envio ao nó.
+        let stageStart = performance.now();
+        const contractTx = await this.contract[operation].populateTransaction(...Object.values(args), { nonce });
+        const unsignedTx = await this.signer.populateTransaction(contractTx);
+        timings.prepare_ms = elapsedMs(stageStart);
+        stageStart = performance.now();
+        const signedTx = await this.signer.signTransaction(unsignedTx);
+        timings.sign_ms = elapsedMs(stageStart);
+        stageStart = performance.now();
+        const txResponse = await this.signer.provider.broadcastTransaction(signedTx);
+        timings.send_ms = elapsedMs(stageStart);
+        return txResponse;
     }
 
     async submitTransaction() {
@@ -34,4 +51,5 @@ class OperationBase {
     }
 }
 
-module.exports = OperationBase;
\ No newline at end of file
+module.exports = OperationBase;
+module.exports.elapsedMs = elapsedMs;
\ No newline at end of file
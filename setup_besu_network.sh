@@ -119,12 +119,12 @@ execute_network() {
     # 2. Configura os Bootnodes no docker-compose.yaml
     echo "Iniciando a rede temporariamente para obter os enodes do Node-1 e Node-3..."
     sudo docker-compose up -d
-    sleep 30 # Aguarda um tempo para os nós iniciarem e gerarem seus enodes
     echo "Rede temporária iniciada. Coletando enodes..."
 
     echo "Executando update_docker_compose.py para configurar bootnodes no docker-compose.yaml..."
-    # Executa o script Python para atualizar o docker-compose.yaml
-    python3 update_docker_compose.py
+    # O script consulta os enodes em paralelo e repete (com espera exponencial) até cada nó responder,
+    # em vez de aguardar um tempo fixo.
+    python3 update_docker_compose.py --compose-file docker-compose.yaml
     echo "docker-compose.yaml atualizado com os bootnodes."
 
     echo "Derrubando a rede temporária para aplicar as novas configurações de bootnodes..."
@@ -134,7 +134,8 @@ execute_network() {
     # 3. Inicializa a Rede Corretamente com os bootnodes configurados
     echo "Inicializando a rede Besu corretamente com os bootnodes..."
     sudo docker-compose up -d
-    sleep 60 # Aguarda a rede subir completamente e os nós se conectarem
+    # Bloqueia até todos os nós estarem ligados entre si e a rede produzir blocos.
+    python3 update_docker_compose.py --compose-file docker-compose.yaml --wait-only
     echo "Rede Besu inicializada com sucesso."
 }
 
@@ -0,0 +1,212 @@
+import json
+import asyncio
+from urllib.parse import urlsplit
+
+# Cliente HTTP/1.1 mínimo sobre asyncio, só com a biblioteca padrão: ligações persistentes (keep-alive)
+# reutilizadas por um pool. Serve a API (express) e o JSON-RPC dos nós Besu, que respondem com
+# Content-Length ou chunked. Não suporta HTTPS nem redirecionamentos, que nenhum dos dois usa.
+
+class HttpError(Exception):
+    """Resposta HTTP inválida ou ligação fechada a meio de um pedido."""
+
+class HttpConnection:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    @property
+    def closed(self):
+        # at_eof(): o servidor já fechou o seu lado (ex.: o express fecha ligações inativas ao fim de 5 s),
+        # mesmo que o nosso writer ainda não esteja a fechar.
+        return self.writer is None or self.writer.is_closing() or self.reader.at_eof()
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def request(self, method, path, body=None, headers=None):
+        """Envia um pedido e retorna (status, cabeçalhos, corpo em bytes)."""
+        reused = not self.closed
+        if not reused:
+            await self.connect()
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        if body is not None:
+            lines.append(f"Content-Length: {len(body)}")
+        for name, value in (headers or {}).items():
+            lines.append(f"{name}: {value}")
+        message = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + (body or b'')
+
+        try:
+            status_line = await self._send(message)
+        except ConnectionError:
+            if not reused:
+                raise
+            status_line = b''
+        if not status_line and reused:
+            # Uma ligação reutilizada que o servidor fechou por inatividade antes de ler o pedido só se nota
+            # aqui (EOF sem nenhum byte da resposta): o pedido não foi processado, pelo que é reenviado uma
+            # vez numa ligação nova, em vez de contar como falha.
+            self.close()
+            await self.connect()
+            status_line = await self._send(message)
+
+        try:
+            status, response_headers, data = await self._read_response(status_line)
+        except asyncio.IncompleteReadError as e:
+            # readexactly() levanta IncompleteReadError (um EOFError, não um OSError) quando o servidor fecha a
+            # ligação a meio da resposta, por exemplo ao reiniciar; para quem chama é um erro HTTP como os outros.
+            self.close()
+            raise HttpError(f"ligação fechada a meio da resposta ({len(e.partial)} bytes recebidos)") from e
+        if response_headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status, response_headers, data
+
+    async def _send(self, message):
+        """Escreve o pedido e retorna a linha de estado da resposta (b'' se a ligação foi fechada)."""
+        self.writer.write(message)
+        await self.writer.drain()
+        return await self.reader.readline()
+
+    async def _read_response(self, status_line):
+        """Interpreta a linha de estado e lê os cabeçalhos e o corpo da resposta; retorna (status, cabeçalhos, corpo)."""
+        if not status_line:
+            raise HttpError("ligação fechada pelo servidor")
+        parts = status_line.split(None, 2)
+        if len(parts) < 2:
+            raise HttpError(f"linha de estado inválida: {status_line!r}")
+        status = int(parts[1])
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await self.reader.readline()
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            data = b''.join(chunks)
+        elif 'content-length' in response_headers:
+            data = await self.reader.readexactly(int(response_headers['content-length']))
+        else:
+            data = await self.reader.read()
+            self.close()
+
+        return status, response_headers, data
+
+class HttpPool:
+    """
+    Pool de até 'size' ligações persistentes a um servidor. Os pedidos esperam por uma ligação livre,
+    pelo que o número de pedidos em curso nunca ultrapassa 'size'. Uma ligação com erro é descartada
+    e substituída por uma nova no pedido seguinte.
+    """
+    def __init__(self, url, size=10, timeout=30.0):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', ''):
+            raise ValueError(f"Apenas http:// é suportado: {url}")
+        self.host = parts.hostname or 'localhost'
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._connections = [HttpConnection(self.host, self.port) for _ in range(size)]
+        # LIFO: as ligações usadas mais recentemente (já abertas) são reutilizadas primeiro.
+        self._idle = asyncio.LifoQueue()
+        for connection in self._connections:
+            self._idle.put_nowait(connection)
+
+    async def request(self, method, path, body=None, headers=None, timeout=None):
+        connection = await self._idle.get()
+        try:
+            return await asyncio.wait_for(connection.request(method, path, body, headers), timeout or self.timeout)
+        except BaseException:
+            # O estado da ligação é desconhecido (resposta parcial, timeout, cancelamento): não é reutilizada.
+            connection.close()
+            raise
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def get_json(self, path, timeout=None):
+        status, _, data = await self.request('GET', path, timeout=timeout)
+        return status, json.loads(data) if data else None
+
+    async def post_json(self, path, payload, timeout=None):
+        body = json.dumps(payload).encode()
+        status, _, data = await self.request('POST', path, body, {'Content-Type': 'application/json'}, timeout=timeout)
+        return status, json.loads(data) if data else None
+
+    def close(self):
+        for connection in self._connections:
+            connection.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+class JsonRpcError(Exception):
+    """Erro retornado por um nó num pedido JSON-RPC."""
+    def __init__(self, method, error):
+        super().__init__(f"{method}: {error.get('message', error)}")
+        self.method = method
+        self.code = error.get('code')
+
+class JsonRpcClient:
+    """Cliente JSON-RPC (Besu) sobre um HttpPool, com suporte a pedidos em lote (batch)."""
+    def __init__(self, url, size=4, timeout=10.0):
+        self.url = url
+        self.pool = HttpPool(url, size=size, timeout=timeout)
+        self.path = urlsplit(url).path or '/'
+        self._next_id = 0
+
+    async def call(self, method, params=(), timeout=None):
+        self._next_id += 1
+        status, response = await self.pool.post_json(
+            self.path, {'jsonrpc': '2.0', 'id': self._next_id, 'method': method, 'params': list(params)}, timeout=timeout)
+        if status != 200 or response is None:
+            raise HttpError(f"{method}: HTTP {status}")
+        if 'error' in response:
+            raise JsonRpcError(method, response['error'])
+        return response.get('result')
+
+    async def batch(self, calls, timeout=None):
+        """
+        Executa [(método, parâmetros), ...] num só pedido HTTP. Retorna os resultados pela mesma ordem;
+        chamadas com erro dão origem a uma instância de JsonRpcError na posição correspondente.
+        """
+        if not calls:
+            return []
+        first_id = self._next_id + 1
+        self._next_id += len(calls)
+        payload = [{'jsonrpc': '2.0', 'id': first_id + i, 'method': method, 'params': list(params)}
+                   for i, (method, params) in enumerate(calls)]
+        status, response = await self.pool.post_json(self.path, payload, timeout=timeout)
+        if status != 200 or not isinstance(response, list):
+            raise HttpError(f"batch: HTTP {status}")
+        by_id = {item.get('id'): item for item in response}
+        results = []
+        for i, (method, _) in enumerate(calls):
+            item = by_id.get(first_id + i, {'error': {'message': 'sem resposta no lote'}})
+            results.append(JsonRpcError(method, item['error']) if 'error' in item else item.get('result'))
+        return results
+
+    def close(self):
+        self.pool.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
@@ -0,0 +1,138 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+from syntheticResults import generate_jmeter_results, generate_caliper_results
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Histórico local acumulado entre execuções (listado no .gitignore; não é versionado).
+DEFAULT_OUTPUT = os.path.join(SCRIPT_DIR, 'benchmark_results.json')
+
+def git_commit():
+    result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR, capture_output=True, text=True)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+def run_measured(command):
+    """
+    Corre um comando e retorna (código de saída, tempo real em s, pico de RSS em MB) do próprio processo,
+    obtido com wait4() para não o confundir com outros processos filhos já terminados.
+    """
+    # O stderr vai para um ficheiro temporário e não para um pipe: com um pipe, um script que escrevesse mais do
+    # que o buffer (ex.: avisos do pandas) bloquearia à espera de leitura enquanto o wait4() espera por ele.
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, cwd=SCRIPT_DIR, stdout=subprocess.DEVNULL, stderr=stderr)
+        _, status, usage = os.wait4(process.pid, 0)
+        wall = time.perf_counter() - start
+        process.returncode = os.waitstatus_to_exitcode(status)
+        stderr.seek(0)
+        error = stderr.read().decode(errors='replace')
+    if process.returncode != 0:
+        print(f"  -> Erro ({process.returncode}): {' '.join(command)}\n{error}", file=sys.stderr)
+    return process.returncode, wall, usage.ru_maxrss / 1024
+
+def benchmark_script(tool, command, data_dir, label):
+    """Corre um script de relatórios com --profile-output e junta o perfil por etapa às medidas do processo."""
+    profile_path = os.path.join(data_dir, f'profile_{tool}_{label}.json')
+    returncode, wall, peak_rss = run_measured(command + ['--profile-output', profile_path])
+    result = {'tool': tool, 'mode': label, 'returncode': returncode, 'wall_s': round(wall, 3),
+              'peak_rss_mb': round(peak_rss, 1), 'stages': []}
+    if returncode == 0 and os.path.exists(profile_path):
+        with open(profile_path) as f:
+            result['stages'] = json.load(f)['stages']
+    return result
+
+def input_size(files):
+    return {'files': len(files), 'bytes': sum(os.path.getsize(f) for f in files)}
+
+def run_size(size, args, work_dir):
+    """Gera os dados sintéticos de uma escala e mede os dois scripts de relatórios sobre eles."""
+    results = []
+    common = ['--jobs', str(args.jobs), '--report', args.report]
+    modes = [('cold', ['--no-cache'])] + ([('warm', [])] if args.warm else [])
+
+    if args.tool in ('jmeter', 'both'):
+        data_dir = os.path.join(work_dir, f'jmeter_{size}')
+        start = time.perf_counter()
+        files = generate_jmeter_results(data_dir, args.runs, size, args.rate, args.seed)
+        generated = {'generate_s': round(time.perf_counter() - start, 3), **input_size(files)}
+        command = [sys.executable, os.path.join(SCRIPT_DIR, 'generateGraphs.py'), data_dir] + common
+        for label, extra in modes:
+            results.append({'size': size, **generated, **benchmark_script('jmeter', command + extra, data_dir, label)})
+
+    if args.tool in ('caliper', 'both'):
+        data_dir = os.path.join(work_dir, f'caliper_{size}')
+        start = time.perf_counter()
+        files = generate_caliper_results(data_dir, args.runs, size, args.seed)
+        generated = {'generate_s': round(time.perf_counter() - start, 3), **input_size(files)}
+        command = [sys.executable, os.path.join(SCRIPT_DIR, 'generateGraphsCaliper.py'), data_dir, str(args.runs)] + common
+        for label, extra in modes:
+            results.append({'size': size, **generated, **benchmark_script('caliper', command + extra, data_dir, label)})
+    return results
+
+def print_results(results):
+    print(f"\n{'script':<9}{'escala':>10}{'modo':>6}{'MB':>9}{'real (s)':>10}{'RSS (MB)':>10}  etapas (s)")
+    for r in results:
+        stages = ', '.join(f"{s['stage']} {s['wall_s']:.2f}" for s in r['stages']) or 'falhou'
+        print(f"{r['tool']:<9}{r['size']:>10}{r['mode']:>6}{r['bytes'] / 1024 ** 2:>9.1f}{r['wall_s']:>10.2f}"
+              f"{r['peak_rss_mb']:>10.1f}  {stages}")
+
+def append_history(path, entry):
+    """Acrescenta uma entrada ao histórico JSON (uma lista), para acompanhar o desempenho ao longo do tempo."""
+    history = []
+    if os.path.exists(path):
+        with open(path) as f:
+            history = json.load(f)
+    history.append(entry)
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede o tempo real e o pico de RSS do generateGraphs.py e do generateGraphsCaliper.py, por etapa "
+                    "(leitura, agregação, desenho), sobre resultados sintéticos de várias escalas.")
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help="Escalas a medir, separadas por vírgulas: pedidos por JTL e transações por rodada no Caliper")
+    parser.add_argument('--tool', choices=['jmeter', 'caliper', 'both'], default='both')
+    parser.add_argument('--runs', type=int, default=2, help="Execuções por rodada nos dados gerados")
+    parser.add_argument('--rate', type=float, default=500.0, help="Pedidos por segundo simulados nos JTL")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--jobs', type=int, default=1, help="Valor de --jobs passado aos scripts")
+    parser.add_argument('--report', choices=['png', 'pdf', 'html'], default='png', help="Valor de --report passado aos scripts")
+    parser.add_argument('--warm', action='store_true', help="Mede também uma segunda execução com a cache preenchida")
+    parser.add_argument('--work-dir', help="Diretório para os dados gerados (por omissão, um temporário apagado no fim)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="Histórico JSON onde os resultados são acrescentados")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(',') if s.strip()]
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='pipeline_bench_')
+    results = []
+    try:
+        for size in sizes:
+            print(f"--- Escala {size}: a gerar dados e a medir ({args.tool}) ---")
+            results += run_size(size, args, work_dir)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_results(results)
+    append_history(args.output, {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'parameters': {'sizes': sizes, 'tool': args.tool, 'runs': args.runs, 'rate': args.rate, 'seed': args.seed,
+                       'jobs': args.jobs, 'report': args.report},
+        'results': results,
+    })
+    print(f"\nResultados acrescentados a {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+from collections import Counter
+
+import numpy as np
+
+from resource_ring import (RECORD_DTYPE, RingWriter, MISSING_CPU, MISSING_MEM, MISSING_IO, MISSING_NET)
+
+DEFAULT_CONTAINERS = ["node1", "node2", "node3", "node4", "node5", "node6"]
+# Registos no anel por omissão: 50 Hz x 6 containers durante ~1h (~110 MB no máximo, ficheiro esparso).
+DEFAULT_CAPACITY = 1_000_000
+# Os ficheiros do cgroup e de /proc são pequenos; uma leitura deste tamanho obtém-nos por inteiro.
+READ_SIZE = 65536
+
+def parse_cpu_stat(data):
+    """usage_usec do cpu.stat (tempo de CPU acumulado, em µs)."""
+    for line in data.splitlines():
+        if line.startswith(b'usage_usec '):
+            return int(line[11:])
+    raise ValueError("usage_usec não encontrado em cpu.stat")
+
+def parse_io_stat(data):
+    """Bytes lidos e escritos, somados por todos os dispositivos do io.stat."""
+    read_bytes = write_bytes = 0
+    for field in data.split():
+        if field.startswith(b'rbytes='):
+            read_bytes += int(field[7:])
+        elif field.startswith(b'wbytes='):
+            write_bytes += int(field[7:])
+    return read_bytes, write_bytes
+
+def parse_net_dev(data):
+    """Bytes recebidos e enviados, somados por todas as interfaces do container exceto a loopback."""
+    rx = tx = 0
+    for line in data.splitlines()[2:]:
+        interface, _, counters = line.partition(b':')
+        if interface.strip() == b'lo':
+            continue
+        fields = counters.split()
+        if len(fields) >= 9:
+            rx += int(fields[0])
+            tx += int(fields[8])
+    return rx, tx
+
+def container_pid(name, docker_cmd):
+    result = subprocess.run(docker_cmd.split() + ['inspect', '-f', '{{.State.Pid}}', name],
+                            capture_output=True, text=True)
+    pid = result.stdout.strip()
+    if result.returncode != 0 or not pid.isdigit() or pid == '0':
+        raise RuntimeError(f"não foi possível obter o PID do container {name}: {result.stderr.strip() or 'não está em execução'}")
+    return int(pid)
+
+def cgroup_dir(pid, proc_root, cgroup_root):
+    """Diretório cgroup v2 de um processo, a partir da entrada '0::<caminho>' de /proc/<pid>/cgroup."""
+    with open(os.path.join(proc_root, str(pid), 'cgroup'), 'rb') as f:
+        for line in f.read().splitlines():
+            if line.startswith(b'0::'):
+                return os.path.join(cgroup_root, line[3:].decode().lstrip('/'))
+    raise RuntimeError(f"o processo {pid} não está numa hierarquia cgroup v2")
+
+def net_namespace(pid, proc_root):
+    """Identificador do namespace de rede de um processo (ex.: 'net:[4026531840]'), ou None se não for legível."""
+    try:
+        return os.readlink(os.path.join(proc_root, str(pid), 'ns', 'net'))
+    except OSError:
+        return None
+
+class ContainerSource:
+    """
+    Ficheiros de um container mantidos abertos durante toda a recolha; cada amostra relê-os com pread() a partir
+    do início, sem os voltar a abrir nem alocar objetos de ficheiro. Com own_network=False (container sem
+    namespace de rede próprio), a rede não é lida e fica marcada como em falta em todas as amostras.
+    """
+    FILES = [('cpu', 'cpu.stat', MISSING_CPU), ('mem', 'memory.current', MISSING_MEM), ('io', 'io.stat', MISSING_IO)]
+
+    def __init__(self, name, pid, proc_root, cgroup_root, own_network=True):
+        self.name = name
+        directory = cgroup_dir(pid, proc_root, cgroup_root)
+        paths = {key: os.path.join(directory, filename) for key, filename, _ in self.FILES}
+        if own_network:
+            paths['net'] = os.path.join(proc_root, str(pid), 'net', 'dev')
+        self.fds = {'net': None}
+        for key, path in paths.items():
+            try:
+                self.fds[key] = os.open(path, os.O_RDONLY)
+            except OSError:
+                # Ex.: io.stat só existe com o controlador 'io' ativo; o contador fica marcado como em falta.
+                self.fds[key] = None
+        if self.fds['cpu'] is None and self.fds['mem'] is None:
+            raise RuntimeError(f"{directory} não tem cpu.stat nem memory.current")
+
+    def read(self, record):
+        """Preenche um registo RECORD_DTYPE; retorna False se nenhum contador pôde ser lido (container parado)."""
+        missing = 0
+        try:
+            record['cpu_usec'] = parse_cpu_stat(os.pread(self.fds['cpu'], READ_SIZE, 0))
+        except (OSError, TypeError, ValueError):
+            missing |= MISSING_CPU
+        try:
+            record['mem_bytes'] = int(os.pread(self.fds['mem'], READ_SIZE, 0))
+        except (OSError, TypeError, ValueError):
+            missing |= MISSING_MEM
+        try:
+            record['io_read_bytes'], record['io_write_bytes'] = parse_io_stat(os.pread(self.fds['io'], READ_SIZE, 0))
+        except (OSError, TypeError, ValueError):
+            missing |= MISSING_IO
+        try:
+            record['net_rx_bytes'], record['net_tx_bytes'] = parse_net_dev(os.pread(self.fds['net'], READ_SIZE, 0))
+        except (OSError, TypeError, ValueError):
+            missing |= MISSING_NET
+        record['timestamp_ns'] = time.time_ns()
+        record['missing'] = missing
+        return missing != MISSING_CPU | MISSING_MEM | MISSING_IO | MISSING_NET
+
+    def close(self):
+        for fd in self.fds.values():
+            if fd is not None:
+                os.close(fd)
+
+def resolve_sources(specs, docker_cmd, proc_root, cgroup_root):
+    """
+    Containers a recolher; 'nome=pid' dispensa a consulta ao Docker (útil com uma árvore cgroup de teste).
+    O /proc/<pid>/net/dev mostra as interfaces do namespace de rede do processo: com network_mode: host (como no
+    docker-compose.yaml) é o total do host, igual em todos os containers. A rede só é recolhida para containers
+    com um namespace próprio, diferente do do host (PID 1) e do dos outros containers.
+    """
+    targets = []
+    for spec in specs:
+        name, _, pid = spec.partition('=')
+        targets.append((name, int(pid) if pid else container_pid(name, docker_cmd)))
+    host_namespace = net_namespace(1, proc_root)
+    namespaces = {name: net_namespace(pid, proc_root) for name, pid in targets}
+    # Sem root, o readlink de /proc/<pid>/ns/net falha (EACCES) e não há como provar que o namespace é próprio:
+    # na dúvida a rede não é recolhida, porque com network_mode: host seria o total do host repetido por container.
+    unknown = [name for name, ns in namespaces.items() if ns is None or host_namespace is None]
+    counts = Counter(ns for ns in namespaces.values() if ns is not None)
+    shared = [name for name, ns in namespaces.items()
+              if name not in unknown and (ns == host_namespace or counts[ns] > 1)]
+    if unknown:
+        print(f"  -> Aviso: não foi possível ler o namespace de rede de {', '.join(unknown)} (execute como root); "
+              f"a rede desses containers fica em falta.", file=sys.stderr)
+    if shared:
+        print(f"  -> Aviso: {', '.join(shared)} não têm namespace de rede próprio (ex.: network_mode: host); "
+              f"a rede desses containers fica em falta.", file=sys.stderr)
+    skipped = set(unknown) | set(shared)
+    return [ContainerSource(name, pid, proc_root, cgroup_root, own_network=name not in skipped)
+            for name, pid in targets]
+
+def run_collector(sources, writer, rate, duration):
+    """
+    Amostra todos os containers a cada 1/rate segundos, em instantes fixos (amostras atrasadas são descartadas
+    em vez de acumuladas), até Ctrl+C, SIGTERM ou ao fim de 'duration' segundos. Retorna o número de amostras.
+    """
+    stop = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.append(True))
+
+    batch = np.zeros(len(sources), dtype=RECORD_DTYPE)
+    batch['container'] = np.arange(len(sources))
+    failing = set()
+    period = 1.0 / rate
+    start = time.perf_counter()
+    tick = 0
+    while not stop and not (duration and time.perf_counter() - start >= duration):
+        ok = np.ones(len(sources), dtype=bool)
+        for i, source in enumerate(sources):
+            ok[i] = source.read(batch[i])
+            if not ok[i] and source.name not in failing:
+                print(f"  -> Aviso: não foi possível ler os contadores de {source.name}", file=sys.stderr)
+                failing.add(source.name)
+            elif ok[i]:
+                failing.discard(source.name)
+        writer.append(batch if ok.all() else batch[ok])
+
+        tick = max(tick + 1, int((time.perf_counter() - start) / period))
+        delay = start + tick * period - time.perf_counter()
+        if delay > 0 and not stop:
+            time.sleep(delay)
+    return writer.count
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Recolhe CPU, memória, I/O de disco e rede dos containers diretamente do cgroup v2 e de /proc, "
+                    "a uma taxa configurável, para um ficheiro binário de registos fixos mapeado em memória "
+                    "(lido pelo generateGraphs.py). Substitui o docker stats da API, que amostra a ~1 Hz.")
+    parser.add_argument('output', help="Ficheiro de saída, ex.: jmeter_runs_5_users/resources_open_run_1.bin")
+    parser.add_argument('containers', nargs='*', default=DEFAULT_CONTAINERS,
+                        help="Containers a recolher (nome, ou nome=pid para não consultar o Docker)")
+    parser.add_argument('--rate', type=float, default=10.0, help="Amostras por segundo (recomendado: 10 a 50)")
+    parser.add_argument('--duration', type=float, help="Duração máxima (s); por omissão, até Ctrl+C ou SIGTERM")
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY,
+                        help="Registos no anel; quando se esgota, os mais antigos são substituídos")
+    parser.add_argument('--docker', default='docker', help="Comando do Docker (ex.: 'sudo docker')")
+    parser.add_argument('--proc-root', default='/proc', help="Raiz do procfs")
+    parser.add_argument('--cgroup-root', default='/sys/fs/cgroup', help="Raiz da hierarquia cgroup v2")
+    args = parser.parse_args()
+
+    if args.rate <= 0:
+        parser.error("--rate deve ser positivo")
+    if args.capacity < len(args.containers):
+        parser.error("--capacity deve ser pelo menos o número de containers")
+    try:
+        sources = resolve_sources(args.containers, args.docker, args.proc_root, args.cgroup_root)
+    except (OSError, RuntimeError) as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    writer = RingWriter(args.output, [s.name for s in sources], args.capacity, int(1_000_000 / args.rate))
+    try:
+        samples = run_collector(sources, writer, args.rate, args.duration)
+    finally:
+        writer.close()
+        for source in sources:
+            source.close()
+    print(f"Recolha terminada: {samples} amostras de {len(sources)} containers gravadas em {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import signal
+import asyncio
+import argparse
+
+from async_http import HttpError, JsonRpcClient
+
+# Colunas do ficheiro chain_metrics_<rodada>_run_<N>.csv. Os valores são inteiros; campos vazios indicam
+# que o nó não respondeu (ou não suporta o método) nessa amostra.
+CHAIN_METRICS_COLUMNS = ['timestamp', 'node', 'block', 'gas_used', 'gas_limit', 'txpool_local', 'txpool_remote',
+                         'peers', 'rpc_ms']
+# Métodos consultados em cada amostra, num único pedido em lote por nó.
+SAMPLE_CALLS = [
+    ('eth_blockNumber', []),
+    ('eth_getBlockByNumber', ['latest', False]),
+    ('txpool_besuStatistics', []),
+    ('net_peerCount', []),
+]
+
+def hex_or_none(value):
+    return int(value, 16) if isinstance(value, str) else None
+
+async def sample_node(name, client, timeout):
+    """Uma amostra de um nó: altura, gas do último bloco, transações pendentes e peers."""
+    start = time.perf_counter()
+    try:
+        block_number, block, txpool, peers = await client.batch(SAMPLE_CALLS, timeout=timeout)
+    except (OSError, asyncio.TimeoutError, ValueError, HttpError) as e:
+        return name, None, e
+    rpc_ms = int((time.perf_counter() - start) * 1000)
+    if isinstance(block, dict):
+        gas_used, gas_limit = hex_or_none(block.get('gasUsed')), hex_or_none(block.get('gasLimit'))
+    else:
+        gas_used = gas_limit = None
+    txpool = txpool if isinstance(txpool, dict) else {}
+    return name, [hex_or_none(block_number), gas_used, gas_limit, txpool.get('localCount'), txpool.get('remoteCount'),
+                  hex_or_none(peers), rpc_ms], None
+
+async def run_sampler(nodes, output, rate, duration, timeout):
+    """
+    Amostra todos os nós em paralelo a cada 1/rate segundos, em instantes fixos (amostras atrasadas são
+    descartadas em vez de acumuladas), até Ctrl+C, SIGTERM ou ao fim de 'duration' segundos.
+    """
+    clients = {name: JsonRpcClient(url, size=1, timeout=timeout) for name, url in nodes}
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    failing = set()
+    samples = 0
+    period = 1.0 / rate
+    start = time.perf_counter()
+    with open(output, 'w') as f:
+        f.write(','.join(CHAIN_METRICS_COLUMNS) + '\n')
+        tick = 0
+        while not stop.is_set() and not (duration and time.perf_counter() - start >= duration):
+            timestamp = int(time.time() * 1000)
+            results = await asyncio.gather(*(sample_node(name, client, min(timeout, period * 0.9))
+                                             for name, client in clients.items()))
+            for name, values, error in results:
+                if values is None:
+                    if name not in failing:
+                        print(f"  -> Aviso: {name} não respondeu ({type(error).__name__}: {error})", file=sys.stderr)
+                        failing.add(name)
+                    continue
+                failing.discard(name)
+                f.write(f"{timestamp},{name}," + ','.join('' if v is None else str(v) for v in values) + '\n')
+                samples += 1
+            f.flush()
+
+            tick = max(tick + 1, int((time.perf_counter() - start) / period))
+            delay = start + tick * period - time.perf_counter()
+            try:
+                await asyncio.wait_for(stop.wait(), max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    for client in clients.values():
+        client.close()
+    print(f"Amostragem terminada: {samples} amostras gravadas em {output}")
+
+def node_urls(host, first_port, count):
+    return [(f"node{i + 1}", f"http://{host}:{first_port + i}") for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Amostra métricas da cadeia (txpool, altura, gas por bloco, peers) de todos os nós Besu em paralelo "
+                    "e grava uma série temporal que o generateGraphs.py alinha com o JTL da mesma execução.")
+    parser.add_argument('output', help="Ficheiro de saída, ex.: jmeter_runs_5_users/chain_metrics_open_run_1.csv")
+    parser.add_argument('--host', default='localhost', help="Máquina onde correm os nós Besu")
+    parser.add_argument('--first-port', type=int, default=8545, help="Porta JSON-RPC do node1 (os restantes usam as seguintes)")
+    parser.add_argument('--nodes', type=int, default=6, help="Número de nós")
+    parser.add_argument('--rate', type=float, default=1.0, help="Amostras por segundo, por nó")
+    parser.add_argument('--duration', type=float, help="Duração máxima (s); por omissão, até Ctrl+C ou SIGTERM")
+    parser.add_argument('--timeout', type=float, default=2.0, help="Timeout de cada pedido (s)")
+    args = parser.parse_args()
+
+    if args.rate <= 0:
+        parser.error("--rate deve ser positivo")
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    asyncio.run(run_sampler(node_urls(args.host, args.first_port, args.nodes), args.output, args.rate,
+                            args.duration, args.timeout))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from async_http import JsonRpcClient, JsonRpcError
+from latency_histogram import LatencyHistogram, PERCENTILES, percentile_label
+from live_report import FileTail
+
+# Linha registada pela API quando uma transação da fila é submetida a um nó. Os instantes de aceitação
+# (Enfileirado) e de submissão (Submetido), em ms desde epoch, só existem nas versões recentes da API.
+SUBMITTED_TX_RE = re.compile(
+    r"Transação '(?P<operation>\w+)'.*?Hash: (?P<hash>0x[0-9a-fA-F]{64}), Nonce: (?P<nonce>\d+)"
+    r"(?:, Enfileirado: (?P<enqueued>\d+))?(?:, Submetido: (?P<submitted>\d+))?")
+
+TX_COLUMNS = ['hash', 'operation', 'nonce', 'enqueued_ms', 'submitted_ms', 'block', 'block_ts_ms',
+              'submit_to_inclusion_ms', 'enqueue_to_inclusion_ms']
+BLOCK_COLUMNS = ['block', 'timestamp_ms', 'tx_count', 'gas_used', 'tracked_tx', 'tps']
+# O timestamp do bloco tem resolução de 1 s (truncado): a inclusão real ocorreu em [timestamp, timestamp + 1 s).
+BLOCK_TIMESTAMP_RESOLUTION_MS = 1000
+
+def parse_submitted_line(line, seen_ms=None):
+    """Extrai uma transação submetida de uma linha do log da API, ou None se a linha não for desse tipo."""
+    match = SUBMITTED_TX_RE.search(line)
+    if not match:
+        return None
+    submitted = match.group('submitted')
+    enqueued = match.group('enqueued')
+    return {
+        'hash': match.group('hash').lower(),
+        'operation': match.group('operation'),
+        'nonce': int(match.group('nonce')),
+        # Sem instante registado pela API, usa-se o momento em que a linha foi lida (apenas no modo --follow).
+        'submitted_ms': int(submitted) if submitted else seen_ms,
+        'enqueued_ms': int(enqueued) if enqueued else None,
+    }
+
+async def find_first_block(client, timestamp_s, latest):
+    """Pesquisa binária do primeiro bloco com timestamp >= timestamp_s (blocos sem as transações)."""
+    low, high = 0, latest
+    while low < high:
+        middle = (low + high) // 2
+        block = await client.call('eth_getBlockByNumber', [hex(middle), False])
+        if int(block['timestamp'], 16) < timestamp_s:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+class CommitTracker:
+    """
+    Associa as transações submetidas pela API ao bloco em que foram incluídas, lendo os blocos
+    (com as transações completas) em lotes JSON-RPC distribuídos pelas ligações do pool.
+    """
+    def __init__(self, client, batch_size=20, concurrency=4):
+        self.client = client
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.pending = {}     # hash -> transação ainda não encontrada num bloco
+        self.included = []    # transações já incluídas (dicionários com as colunas de TX_COLUMNS)
+        self.blocks = []      # um dicionário por bloco lido (colunas de BLOCK_COLUMNS)
+        self.next_block = None
+        self.last_block_ts_ms = None
+
+    def add(self, tx):
+        self.pending.setdefault(tx['hash'], tx)
+
+    async def fetch_blocks(self, first, last):
+        """Lê os blocos first..last com lotes em paralelo e retorna-os por ordem."""
+        numbers = list(range(first, last + 1))
+        batches = [numbers[i:i + self.batch_size] for i in range(0, len(numbers), self.batch_size)]
+        blocks = []
+        for i in range(0, len(batches), self.concurrency):
+            group = batches[i:i + self.concurrency]
+            results = await asyncio.gather(*(
+                self.client.batch([('eth_getBlockByNumber', [hex(n), True]) for n in batch]) for batch in group))
+            for batch_result in results:
+                for block in batch_result:
+                    if isinstance(block, JsonRpcError):
+                        raise block
+                    if block is not None:
+                        blocks.append(block)
+        return blocks
+
+    def process_block(self, block):
+        number = int(block['number'], 16)
+        timestamp_ms = int(block['timestamp'], 16) * 1000
+        tracked = 0
+        for tx in block['transactions']:
+            entry = self.pending.pop(tx['hash'].lower(), None) if isinstance(tx, dict) else None
+            if entry is None:
+                continue
+            tracked += 1
+            entry['block'] = number
+            entry['block_ts_ms'] = timestamp_ms
+            entry['submit_to_inclusion_ms'] = timestamp_ms - entry['submitted_ms'] if entry['submitted_ms'] else None
+            entry['enqueue_to_inclusion_ms'] = timestamp_ms - entry['enqueued_ms'] if entry['enqueued_ms'] else None
+            self.included.append(entry)
+        interval_s = (timestamp_ms - self.last_block_ts_ms) / 1000 if self.last_block_ts_ms is not None else None
+        tx_count = len(block['transactions'])
+        self.blocks.append({
+            'block': number,
+            'timestamp_ms': timestamp_ms,
+            'tx_count': tx_count,
+            'gas_used': int(block['gasUsed'], 16),
+            'tracked_tx': tracked,
+            # Blocos com o mesmo timestamp (resolução de 1 s) não têm intervalo definido.
+            'tps': tx_count / interval_s if interval_s else None,
+        })
+        self.last_block_ts_ms = timestamp_ms
+
+    async def poll(self):
+        """Lê todos os blocos novos desde a última chamada; retorna o número de blocos processados."""
+        latest = int(await self.client.call('eth_blockNumber'), 16)
+        if self.next_block is None:
+            self.next_block = latest
+        if latest < self.next_block:
+            return 0
+        blocks = await self.fetch_blocks(self.next_block, latest)
+        for block in blocks:
+            self.process_block(block)
+        self.next_block = latest + 1
+        return len(blocks)
+
+async def run_tracker(args, state):
+    tail = FileTail(args.api_log)
+    async with JsonRpcClient(args.rpc_url, size=args.connections) as client:
+        tracker = CommitTracker(client, batch_size=args.batch_size, concurrency=args.connections)
+        # Guardado fora da corrotina para o relatório poder ser gerado mesmo depois de um Ctrl+C.
+        state['tracker'] = tracker
+
+        def read_log():
+            now_ms = int(time.time() * 1000) if args.follow else None
+            for line in tail.read_lines():
+                tx = parse_submitted_line(line, now_ms)
+                if tx is not None:
+                    tracker.add(tx)
+
+        read_log()
+        if args.from_block is not None:
+            tracker.next_block = args.from_block
+        else:
+            submitted = [tx['submitted_ms'] for tx in tracker.pending.values() if tx['submitted_ms']]
+            if submitted:
+                latest = int(await client.call('eth_blockNumber'), 16)
+                # Margem de um bloco para trás: o timestamp do bloco tem resolução de 1 s.
+                first = await find_first_block(client, min(submitted) // 1000 - 1, latest)
+                tracker.next_block = max(first - 1, 0)
+        print(f"--- A acompanhar {len(tracker.pending)} transações a partir do bloco "
+              f"{tracker.next_block if tracker.next_block is not None else 'atual'} ---")
+
+        last_progress = time.monotonic()
+        while True:
+            read_log()
+            blocks = await tracker.poll()
+            if blocks:
+                last_progress = time.monotonic()
+            if tracker.pending and blocks:
+                print(f"  -> Bloco {tracker.next_block - 1}: {len(tracker.included)} incluídas, {len(tracker.pending)} pendentes")
+            if not args.follow and not tracker.pending:
+                break
+            if not args.follow and time.monotonic() - last_progress > args.wait:
+                print(f"Aviso: {len(tracker.pending)} transações não foram encontradas em nenhum bloco.")
+                break
+            await asyncio.sleep(args.interval)
+
+def latency_percentiles(values):
+    histogram = LatencyHistogram()
+    histogram.record(values)
+    return {percentile_label(q): value for q, value in histogram.percentiles(PERCENTILES).items()}
+
+def inclusion_latency_bounds(values, resolution_ms=BLOCK_TIMESTAMP_RESOLUTION_MS):
+    """
+    Percentis de uma latência até à inclusão como intervalo [limite inferior, limite superior] (ms): o timestamp do
+    bloco é truncado ao segundo, por isso a latência real está entre o valor medido e o valor medido + resolução.
+    Valores medidos negativos (inclusão no mesmo segundo da submissão) só permitem afirmar que a latência é inferior
+    a 'resolução'; o limite inferior fica 0 e são contados em 'negativas_cortadas'.
+    """
+    values = np.asarray(values, dtype='int64')
+    # Arredondados ao ms: o histograma representa o 0 pelo centro do seu bucket, uma precisão que não existe aqui.
+    bounds = lambda v: {label: int(round(value)) for label, value in latency_percentiles(v).items()}
+    return {
+        'resolucao_ms': resolution_ms,
+        'negativas_cortadas': int((values < 0).sum()),
+        'limite_inferior_ms': bounds(np.clip(values, 0, None)),
+        'limite_superior_ms': bounds(np.clip(values + resolution_ms, 0, None)),
+    }
+
+def build_report(tracker):
+    """Tabelas por transação e por bloco e o resumo (percentis de latência até à inclusão e TPS na cadeia)."""
+    tx_df = pd.DataFrame(tracker.included, columns=TX_COLUMNS)
+    block_df = pd.DataFrame(tracker.blocks, columns=BLOCK_COLUMNS)
+    summary = {
+        'incluidas': len(tx_df),
+        'pendentes': len(tracker.pending),
+        'resolucao_timestamp_bloco_ms': BLOCK_TIMESTAMP_RESOLUTION_MS,
+        'nota': "Latências até à inclusão com resolução de ±1 s (timestamp do bloco em segundos): cada percentil é "
+                "um intervalo [limite_inferior_ms, limite_superior_ms] e diferenças abaixo de 1 s não são medidas.",
+        'operacoes': {},
+    }
+    for operation, group in tx_df.groupby('operation'):
+        entry = {'incluidas': len(group)}
+        for column in ['submit_to_inclusion_ms', 'enqueue_to_inclusion_ms']:
+            values = group[column].dropna().astype('int64').values
+            if len(values):
+                entry[column] = inclusion_latency_bounds(values)
+        summary['operacoes'][operation] = entry
+    if not tx_df.empty:
+        blocks = block_df[(block_df['block'] >= tx_df['block'].min()) & (block_df['block'] <= tx_df['block'].max())]
+        span_s = (blocks['timestamp_ms'].max() - blocks['timestamp_ms'].min()) / 1000
+        summary['blocos'] = len(blocks)
+        summary['tps_medio_cadeia'] = blocks['tx_count'].sum() / span_s if span_s > 0 else None
+        summary['tps_max_bloco'] = blocks['tps'].max() if blocks['tps'].notna().any() else None
+        summary['gas_medio_por_bloco'] = float(blocks['gas_used'].mean())
+    return tx_df, block_df, summary
+
+def plot_commit_report(tx_df, block_df, output_path):
+    if tx_df.empty:
+        return
+    start_ms = block_df['timestamp_ms'].min()
+    fig, (ax_tps, ax_latency) = plt.subplots(2, 1, figsize=(14, 9), sharex=True)
+    ax_tps.step((block_df['timestamp_ms'] - start_ms) / 1000, block_df['tx_count'], where='post', label='Transações por bloco')
+    ax_tps.plot((block_df['timestamp_ms'] - start_ms) / 1000, block_df['tps'], color='green', marker='.', label='TPS por bloco')
+    ax_tps.set_title('Produção de Blocos e TPS na Cadeia')
+    ax_tps.set_ylabel('Transações')
+    ax_tps.grid(True)
+    ax_tps.legend()
+    for operation, group in tx_df.groupby('operation'):
+        ax_latency.scatter((group['submitted_ms'] - start_ms) / 1000, group['submit_to_inclusion_ms'].clip(lower=0) / 1000,
+                           s=4, alpha=0.5, label=operation)
+    ax_latency.set_title('Latência Submissão → Inclusão no Bloco')
+    ax_latency.set_xlabel('Tempo (segundos)')
+    ax_latency.set_ylabel('Latência (s)')
+    ax_latency.grid(True)
+    ax_latency.legend()
+    fig.savefig(os.path.join(output_path, 'COMMIT_latency.png'))
+    plt.close(fig)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mede a latência até à inclusão no bloco das transações submetidas pela API, a partir das linhas "
+                    "'(Fila) Transação ... Hash: ..., Nonce: ...' do log da API (stdout de api_load_balancer.js).")
+    parser.add_argument('api_log', help="Ficheiro com o output da API")
+    parser.add_argument('--rpc-url', default='http://localhost:8545', help="URL JSON-RPC de um nó Besu")
+    parser.add_argument('--output', default='.', help="Diretório onde gravar commit_transactions.csv, commit_blocks.csv e commit_summary.json")
+    parser.add_argument('--from-block', type=int, help="Primeiro bloco a ler (por omissão, estimado pelos instantes de submissão)")
+    parser.add_argument('--follow', action='store_true', help="Continua a acompanhar o log e os blocos novos até Ctrl+C")
+    parser.add_argument('--interval', type=float, default=1.0, help="Intervalo entre consultas de blocos novos (s)")
+    parser.add_argument('--wait', type=float, default=30.0, help="Sem --follow: tempo máximo sem blocos novos à espera das pendentes (s)")
+    parser.add_argument('--batch-size', type=int, default=20, help="Blocos por pedido JSON-RPC em lote")
+    parser.add_argument('--connections', type=int, default=4, help="Ligações keep-alive ao nó (lotes em paralelo)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.api_log):
+        print(f"Erro: O ficheiro {args.api_log} não existe.")
+        sys.exit(1)
+    os.makedirs(args.output, exist_ok=True)
+
+    state = {}
+    try:
+        asyncio.run(run_tracker(args, state))
+    except KeyboardInterrupt:
+        print("\nAcompanhamento interrompido; a gerar o relatório com os dados recolhidos.")
+    if 'tracker' not in state:
+        return
+    tx_df, block_df, summary = build_report(state['tracker'])
+    tx_df.to_csv(os.path.join(args.output, 'commit_transactions.csv'), index=False)
+    block_df.to_csv(os.path.join(args.output, 'commit_blocks.csv'), index=False)
+    with open(os.path.join(args.output, 'commit_summary.json'), 'w') as f:
+        json.dump(summary, f, indent=2, default=float, ensure_ascii=False)
+    plot_commit_report(tx_df, block_df, args.output)
+    print(json.dumps(summary, indent=2, default=float, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
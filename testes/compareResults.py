@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+from generateGraphs import load_jmeter_results
+
+# Métricas comparadas por rodada: (nome, função sobre um RoundResult, sentido em que o valor piora).
+METRICS = [
+    ('throughput_tps', lambda r: r.throughput_tps, 'lower'),
+    ('latency_mean_s', lambda r: r.latency_mean_s, 'higher'),
+    ('latency_p50_s', lambda r: r.latency_percentiles_s().get(50), 'higher'),
+    ('latency_p99_s', lambda r: r.latency_percentiles_s().get(99), 'higher'),
+]
+# Códigos de saída: regressão ou rodada da referência sem resultados no candidato; repetições insuficientes para
+# concluir (o 2 fica para os erros de utilização do argparse e para a referência sem resultados).
+EXIT_FAILURE = 1
+EXIT_INCONCLUSIVE = 3
+
+def bootstrap_relative_change(baseline, candidate, iterations, confidence, rng):
+    """
+    Intervalo de confiança (bootstrap por percentis) da variação relativa das médias entre execuções:
+    mean(candidate) / mean(baseline) - 1. Retorna (estimativa, limite inferior, limite superior).
+    """
+    baseline = np.asarray(baseline, dtype='float64')
+    candidate = np.asarray(candidate, dtype='float64')
+    estimate = candidate.mean() / baseline.mean() - 1
+    baseline_means = rng.choice(baseline, size=(iterations, len(baseline)), replace=True).mean(axis=1)
+    candidate_means = rng.choice(candidate, size=(iterations, len(candidate)), replace=True).mean(axis=1)
+    changes = candidate_means / baseline_means - 1
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(changes, [alpha, 1 - alpha])
+    return float(estimate), float(low), float(high)
+
+def compare_metric(baseline_values, candidate_values, worse, threshold, iterations, confidence, rng):
+    """Compara uma métrica entre as execuções de dois diretórios e indica se há regressão significativa."""
+    result = {
+        'baseline_runs': len(baseline_values),
+        'candidate_runs': len(candidate_values),
+        'baseline_mean': float(np.mean(baseline_values)) if baseline_values else None,
+        'candidate_mean': float(np.mean(candidate_values)) if candidate_values else None,
+    }
+    if len(baseline_values) < 2 or len(candidate_values) < 2 or result['baseline_mean'] == 0:
+        # Sem repetições suficientes não há variabilidade para estimar um intervalo de confiança.
+        result.update({'status': 'inconclusive', 'regression': False})
+        return result
+
+    change, low, high = bootstrap_relative_change(baseline_values, candidate_values, iterations, confidence, rng)
+    # Regressão: o intervalo inteiro está do lado "pior" e a variação estimada ultrapassa o limiar.
+    if worse == 'higher':
+        regression = low > 0 and change > threshold
+        improvement = high < 0 and change < -threshold
+    else:
+        regression = high < 0 and change < -threshold
+        improvement = low > 0 and change > threshold
+    result.update({
+        'relative_change': change,
+        'ci_low': low,
+        'ci_high': high,
+        'status': 'regression' if regression else 'improvement' if improvement else 'no_change',
+        'regression': bool(regression),
+    })
+    return result
+
+def metric_values(results, round_name, metric):
+    values = [metric(r) for r in results if r.round == round_name]
+    return [v for v in values if v is not None]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compara diretórios de resultados do JMeter e deteta regressões estatisticamente significativas. "
+                    "O primeiro diretório é a referência (baseline); os restantes são comparados com ele.")
+    parser.add_argument('results_dirs', nargs='+', help="Diretórios de resultados: baseline seguido de um ou mais candidatos")
+    parser.add_argument('--threshold', type=float, default=0.05,
+                        help="Variação relativa mínima para considerar uma regressão (0.05 = 5%%)")
+    parser.add_argument('--confidence', type=float, default=0.95, help="Nível de confiança do intervalo bootstrap")
+    parser.add_argument('--iterations', type=int, default=10000, help="Número de reamostragens bootstrap")
+    parser.add_argument('--seed', type=int, default=0, help="Semente do gerador aleatório (resultados reprodutíveis)")
+    parser.add_argument('--output', help="Ficheiro JSON de saída (por omissão, imprime no stdout)")
+    parser.add_argument('--jobs', type=int, default=1, help="Número de processos para ler os ficheiros sem cache válida")
+    parser.add_argument('--whole-run', action='store_true',
+                        help="Compara o throughput e a latência da execução completa em vez dos da janela estável")
+    parser.add_argument('--allow-inconclusive', action='store_true',
+                        help="Não falha (código 3) quando há menos de 2 execuções de uma rodada num dos lados")
+    args = parser.parse_args()
+
+    if len(args.results_dirs) < 2:
+        parser.error("indique pelo menos dois diretórios (baseline e candidato)")
+
+    rng = np.random.default_rng(args.seed)
+    loaded = {d: load_jmeter_results(d, jobs=args.jobs, whole_run=args.whole_run) for d in args.results_dirs}
+    baseline_dir = args.results_dirs[0]
+    baseline = loaded[baseline_dir]
+    if not baseline:
+        print(f"Erro: Nenhum resultado do JMeter encontrado no diretório de referência {baseline_dir}", file=sys.stderr)
+        sys.exit(2)
+    rounds = sorted({r.round for r in baseline})
+
+    report = {
+        'baseline': os.path.abspath(baseline_dir),
+        'threshold': args.threshold,
+        'confidence': args.confidence,
+        'steady_state': not args.whole_run,
+        'candidates': [],
+        'regression': False,
+        'missing': False,
+        'inconclusive': False,
+    }
+    for candidate_dir in args.results_dirs[1:]:
+        candidate = loaded[candidate_dir]
+        candidate_name = os.path.basename(os.path.normpath(candidate_dir))
+        entry = {'results_dir': os.path.abspath(candidate_dir), 'rounds': {}, 'regression': False,
+                 'missing_rounds': [], 'inconclusive': False}
+        candidate_rounds = {r.round for r in candidate}
+        for round_name in rounds:
+            entry['rounds'][round_name] = {}
+            if round_name not in candidate_rounds:
+                # Uma rodada da referência sem resultados no candidato é uma falha, não um resultado inconclusivo.
+                entry['missing_rounds'].append(round_name)
+                print(f"FALHA: {candidate_name} / {round_name}: sem resultados no candidato", file=sys.stderr)
+                continue
+            for name, metric, worse in METRICS:
+                comparison = compare_metric(metric_values(baseline, round_name, metric),
+                                            metric_values(candidate, round_name, metric),
+                                            worse, args.threshold, args.iterations, args.confidence, rng)
+                entry['rounds'][round_name][name] = comparison
+                if comparison['status'] == 'inconclusive':
+                    entry['inconclusive'] = True
+                if comparison['regression']:
+                    entry['regression'] = True
+                    print(f"REGRESSÃO: {candidate_name} / {round_name} / {name}: "
+                          f"{comparison['relative_change']:+.1%} "
+                          f"(IC {args.confidence:.0%}: {comparison['ci_low']:+.1%} a {comparison['ci_high']:+.1%})",
+                          file=sys.stderr)
+        report['candidates'].append(entry)
+        report['regression'] = report['regression'] or entry['regression']
+        report['missing'] = report['missing'] or bool(entry['missing_rounds'])
+        report['inconclusive'] = report['inconclusive'] or entry['inconclusive']
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    # Código de saída diferente de zero permite bloquear um deploy quando há regressão.
+    if report['regression'] or report['missing']:
+        sys.exit(EXIT_FAILURE)
+    if report['inconclusive']:
+        print("Aviso: há rodadas com menos de 2 execuções num dos lados; sem repetições não é possível detetar "
+              "regressões (aumente o número de repetições ou use --allow-inconclusive).", file=sys.stderr)
+        if not args.allow_inconclusive:
+            sys.exit(EXIT_INCONCLUSIVE)
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import os
+import argparse
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from generateGraphs import load_jmeter_results
+from generateGraphsCaliper import load_caliper_results
+from result_model import ROUNDS, TOOL_COLORS, TOOL_LABELS, consolidate_by_round, results_table
+
+TOOLS = ['jmeter', 'caliper']
+
+def plot_metric_by_round(consolidated, metric, ylabel, title, filename, output_path, errors=None):
+    """Gráfico de barras agrupadas: uma barra por ferramenta em cada rodada, no mesmo eixo."""
+    x = np.arange(len(ROUNDS))
+    width = 0.38
+    plt.figure(figsize=(10, 6))
+    for i, tool in enumerate(TOOLS):
+        values = [getattr(consolidated[(tool, r)], metric) if (tool, r) in consolidated else np.nan for r in ROUNDS]
+        yerr = None
+        if errors is not None:
+            # Barras de erro assimétricas do mínimo ao máximo observados.
+            low = [values[j] - errors[0](consolidated[(tool, r)]) if (tool, r) in consolidated else 0 for j, r in enumerate(ROUNDS)]
+            high = [errors[1](consolidated[(tool, r)]) - values[j] if (tool, r) in consolidated else 0 for j, r in enumerate(ROUNDS)]
+            yerr = [np.maximum(low, 0), np.maximum(high, 0)]
+        bars = plt.bar(x + (i - 0.5) * width, values, width, yerr=yerr, capsize=4, label=TOOL_LABELS[tool], color=TOOL_COLORS[tool])
+        plt.bar_label(bars, fmt='%.2f')
+    plt.xticks(x, [r.capitalize() for r in ROUNDS])
+    plt.title(title)
+    plt.ylabel(ylabel)
+    plt.xlabel('Rodada')
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.legend()
+    plt.savefig(os.path.join(output_path, filename))
+    plt.close()
+
+def plot_latency_percentiles_by_round(consolidated, output_path):
+    """Percentis de latência do JMeter por rodada, com a latência média/máxima do Caliper como referência."""
+    plt.figure(figsize=(10, 6))
+    for round_name in ROUNDS:
+        jmeter = consolidated.get(('jmeter', round_name))
+        if jmeter is not None and jmeter.latency_percentiles_s():
+            percentiles = jmeter.latency_percentiles_s()
+            plt.plot([f"p{q:g}" for q in percentiles], list(percentiles.values()), marker='o', label=f'JMeter - {round_name.capitalize()}')
+        caliper = consolidated.get(('caliper', round_name))
+        if caliper is not None:
+            plt.axhline(caliper.latency_mean_s, linestyle='--', alpha=0.6, label=f'Caliper média - {round_name.capitalize()}')
+    plt.yscale('log')
+    plt.title('Distribuição de Latência por Rodada - JMeter vs Caliper')
+    plt.ylabel('Latência (s)')
+    plt.xlabel('Percentil (JMeter)')
+    plt.grid(True, which='both', alpha=0.5)
+    plt.legend(fontsize=8)
+    plt.savefig(os.path.join(output_path, "COMPARISON_latency_percentiles.png"))
+    plt.close()
+
+def plot_node_resources_by_round(consolidated, round_name, column, ylabel, output_path):
+    """Uso de um recurso por nó numa rodada, com as duas ferramentas lado a lado."""
+    frames = []
+    for tool in TOOLS:
+        result = consolidated.get((tool, round_name))
+        if result is not None and result.resources is not None:
+            frames.append(result.resources.assign(tool=tool))
+    if not frames:
+        return
+    data = pd.concat(frames).pivot_table(index='node', columns='tool', values=column)
+    nodes = sorted(data.index)
+    x = np.arange(len(nodes))
+    width = 0.38
+    plt.figure(figsize=(12, 6))
+    for i, tool in enumerate(TOOLS):
+        if tool in data.columns:
+            bars = plt.bar(x + (i - 0.5) * width, data.loc[nodes, tool], width, label=TOOL_LABELS[tool], color=TOOL_COLORS[tool])
+            plt.bar_label(bars, fmt='%.1f')
+    plt.xticks(x, nodes)
+    plt.title(f'{ylabel} por Nó - {round_name.capitalize()} (JMeter vs Caliper)')
+    plt.ylabel(ylabel)
+    plt.xlabel('Nó')
+    plt.grid(axis='y', linestyle='--', alpha=0.7)
+    plt.legend()
+    plt.savefig(os.path.join(output_path, f"COMPARISON_{column}_{round_name}.png"))
+    plt.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Relatório comparativo JMeter vs Caliper a partir dos agregados em cache.")
+    parser.add_argument('jmeter_dir', help="Diretório de resultados do JMeter (jmeter_runs_<N>_users)")
+    parser.add_argument('caliper_dir', help="Diretório de resultados do Caliper (caliper_runs_<N>_users)")
+    parser.add_argument('--output', help="Diretório de saída (por omissão, o diretório do JMeter)")
+    parser.add_argument('--jobs', type=int, default=1, help="Número de processos para ler os ficheiros sem cache válida")
+    parser.add_argument('--whole-run', action='store_true',
+                        help="Usa o throughput e a latência da execução completa do JMeter em vez dos da janela estável")
+    args = parser.parse_args()
+
+    output_path = args.output or args.jmeter_dir
+    os.makedirs(output_path, exist_ok=True)
+
+    print("--- A carregar resultados (agregados em cache sempre que possível)... ---")
+    results = load_jmeter_results(args.jmeter_dir, jobs=args.jobs, whole_run=args.whole_run) + load_caliper_results(args.caliper_dir, jobs=args.jobs)
+    if not results:
+        print("Aviso: Nenhum resultado encontrado nos diretórios indicados.")
+        return
+    consolidated = consolidate_by_round(results)
+
+    table = results_table(consolidated[key] for key in sorted(consolidated))
+    table.to_csv(os.path.join(output_path, "COMPARISON_summary.csv"), index=False)
+    results_table(results).sort_values(['tool', 'round', 'run']).to_csv(
+        os.path.join(output_path, "COMPARISON_runs.csv"), index=False)
+    print(table.to_string(index=False))
+
+    plot_metric_by_round(consolidated, 'throughput_tps', 'Throughput Médio (TPS)', 'Throughput por Rodada - JMeter vs Caliper',
+                         "COMPARISON_throughput.png", output_path)
+    plot_metric_by_round(consolidated, 'latency_mean_s', 'Latência (s)', 'Latência Média (mín-máx) por Rodada - JMeter vs Caliper',
+                         "COMPARISON_latency.png", output_path,
+                         errors=(lambda r: r.latency_min_s, lambda r: r.latency_max_s))
+    plot_latency_percentiles_by_round(consolidated, output_path)
+    for round_name in ROUNDS:
+        plot_node_resources_by_round(consolidated, round_name, 'cpu_avg', 'CPU Média (%)', output_path)
+        plot_node_resources_by_round(consolidated, round_name, 'mem_avg_mb', 'Memória Média (MB)', output_path)
+
+    print(f"\nRelatório comparativo gerado em: {output_path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,609 @@
 import pandas as pd
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import os
-import sys
 import glob
+import argparse
+from latency_histogram import (LatencyHistogram, PERCENTILES, PRECISION, bucket_index, merge_histograms,
+                               percentile_label, percentiles_over_time)
+from report_pool import map_files, run_tasks
+import results_cache
+from functools import partial
+import re
+from result_model import NODE_COLORS, RoundResult, resources_from_samples
+from resource_ring import read_ring, MISSING_CPU, MISSING_MEM, MISSING_IO, MISSING_NET
+from report_pages import REPORT_FORMATS, ReportBook, write_table
+from pipeline_profile import StageProfiler
+from steady_state import detect_steady_window
+from jtl_merge import estimate_clock_offsets, group_shards, merge_shards, read_clock_offsets, shard_host
 
-# Dicionário para garantir cores fixas para cada nó.
-NODE_COLORS = {
-    'node1': '#1f77b4',  # Azul
-    'node2': '#ff7f0e',  # Laranja
-    'node3': '#2ca02c',  # Verde
-    'node4': '#d62728',  # Vermelho
-    'node5': '#9467bd',  # Roxo
-    'node6': '#8c564b',  # Castanho
-}
-
-def analyze_jtl(jtl_file):
-    """Lê um ficheiro JTL e retorna um DataFrame do Pandas."""
+# Apenas as colunas do JTL usadas nos relatórios, com tipos compactos.
+JTL_COLUMNS = ['timeStamp', 'elapsed', 'label', 'success']
+JTL_DTYPES = {'timeStamp': 'int64', 'elapsed': 'int32', 'label': 'category', 'success': 'bool'}
+# Número de linhas lidas por bloco; limita o pico de memória independentemente do tamanho do ficheiro.
+JTL_CHUNKSIZE = 500_000
+
+# Identificadores das entradas na cache de resultados; devem mudar sempre que o formato do resultado mudar.
+JTL_CACHE_KIND = 'jtl_v1'
+DOCKER_CACHE_KIND = 'docker_v2'
+
+class JtlAggregate:
+    """
+    Acumula as métricas de um ficheiro JTL bloco a bloco, sem manter as amostras em memória.
+    As séries temporais são indexadas pelo segundo absoluto (epoch) do timeStamp.
+    """
+    def __init__(self):
+        self.samples = 0
+        self.successes = 0
+        self.histogram = LatencyHistogram()
+        self.first_ts = None
+        self.last_ts = None
+        self.tps = pd.Series(dtype='int64')
+        self.latency = pd.DataFrame({'count': pd.Series(dtype='int64'), 'sum': pd.Series(dtype='int64'),
+                                     'min': pd.Series(dtype='int64'), 'max': pd.Series(dtype='int64')})
+        # Contagens esparsas por (segundo, bucket do histograma), para os percentis ao longo do tempo.
+        self.latency_buckets = pd.Series(dtype='int64', index=pd.MultiIndex.from_arrays([[], []], names=['second', 'bucket']))
+
+    def update(self, chunk):
+        """Incorpora um bloco do JTL (DataFrame com as colunas de JTL_COLUMNS)."""
+        if chunk.empty:
+            return
+        ts = chunk['timeStamp']
+        elapsed = chunk['elapsed'].astype('int64')
+        success = chunk['success']
+
+        self.samples += len(chunk)
+        self.successes += int(success.sum())
+        self.histogram.record(elapsed.values)
+        self.first_ts = _min_or(self.first_ts, int(ts.min()))
+        self.last_ts = _max_or(self.last_ts, int(ts.max()))
+
+        second = ts // 1000
+        tps = second[success].value_counts()
+        self.tps = self.tps.add(tps, fill_value=0).astype('int64')
+
+        latency = elapsed.groupby(second).agg(['count', 'sum', 'min', 'max'])
+        self.latency = (pd.concat([self.latency, latency])
+                        .groupby(level=0)
+                        .agg({'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'}))
+
+        buckets = pd.Series(bucket_index(elapsed.values), index=chunk.index)
+        bucket_counts = elapsed.groupby([second.rename('second'), buckets.rename('bucket')]).size()
+        self.latency_buckets = self.latency_buckets.add(bucket_counts, fill_value=0).astype('int64')
+
+    def duration(self):
+        """Duração da execução em segundos (do primeiro ao último timeStamp)."""
+        if self.first_ts is None:
+            return 0
+        return (self.last_ts - self.first_ts) / 1000
+
+    def summary(self):
+        """Resumo da execução, no mesmo formato usado pela tabela consolidada."""
+        total_duration = self.duration()
+        throughput = self.successes / total_duration if total_duration > 0 else 0
+        summary = {
+            'Total de Amostras': self.samples,
+            'Sucesso': self.successes,
+            'Falha': self.samples - self.successes,
+        }
+        summary.update(latency_summary(self.histogram))
+        summary['Throughput Médio (TPS)'] = throughput
+        return summary
+
+    def window_histogram(self, start, end):
+        """
+        Histograma de latência dos pedidos iniciados em [start, end) segundos desde o início da execução, montado a
+        partir das contagens por (segundo, bucket); total, soma, mínimo e máximo vêm da latência por segundo.
+        """
+        latency = self.latency_series()
+        latency = latency[(latency['second'] >= start) & (latency['second'] < end)]
+        buckets = self.relative_latency_buckets()
+        seconds = buckets.index.get_level_values('second')
+        buckets = buckets[(seconds >= start) & (seconds < end)]
+
+        histogram = LatencyHistogram()
+        np.add.at(histogram.counts, buckets.index.get_level_values('bucket').to_numpy(), buckets.to_numpy())
+        histogram.total = int(latency['count'].sum())
+        histogram.sum = int(latency['sum'].sum())
+        if histogram.total:
+            histogram.min, histogram.max = int(latency['min'].min()), int(latency['max'].max())
+        return histogram
+
+    def window_summary(self, start, end):
+        """
+        Resumo no mesmo formato de summary(), mas só com os pedidos iniciados em [start, end) segundos desde o
+        início da execução (a janela estável).
+        """
+        histogram = self.window_histogram(start, end)
+        tps = self.tps_series()
+        successes = int(tps.loc[(tps['second'] >= start) & (tps['second'] < end), 'tps'].sum())
+        duration = end - start
+        summary = {
+            'Total de Amostras': histogram.total,
+            'Sucesso': successes,
+            'Falha': histogram.total - successes,
+        }
+        summary.update(latency_summary(histogram))
+        summary['Throughput Médio (TPS)'] = successes / duration if duration > 0 else 0
+        return summary
+
+    def tps_series(self):
+        """TPS por segundo, relativo ao início da execução (colunas: second, tps)."""
+        origin = self.first_ts // 1000 if self.first_ts is not None else 0
+        tps = self.tps.sort_index()
+        return pd.DataFrame({'second': tps.index - origin, 'tps': tps.values})
+
+    def latency_series(self):
+        """Latência agregada por segundo, relativa ao início da execução (colunas: second, count, sum, min, max)."""
+        origin = self.first_ts // 1000 if self.first_ts is not None else 0
+        latency = self.latency.sort_index()
+        latency.index = latency.index - origin
+        return latency.rename_axis('second').reset_index()
+
+    def relative_latency_buckets(self):
+        """Contagens por (segundo relativo ao início da execução, bucket)."""
+        origin = self.first_ts // 1000 if self.first_ts is not None else 0
+        buckets = self.latency_buckets
+        seconds = buckets.index.get_level_values('second') - origin
+        return pd.Series(buckets.values, index=pd.MultiIndex.from_arrays(
+            [seconds, buckets.index.get_level_values('bucket')], names=['second', 'bucket']))
+
+    def to_frames(self):
+        """Serializa o agregado em DataFrames colunares e atributos escalares (usado pela cache)."""
+        nonzero = self.histogram.counts.nonzero()[0]
+        frames = {
+            'tps': self.tps.rename_axis('second').reset_index(name='tps'),
+            'latency': self.latency.rename_axis('second').reset_index(),
+            'buckets': self.latency_buckets.reset_index(name='count'),
+            'histogram': pd.DataFrame({'bucket': nonzero, 'count': self.histogram.counts[nonzero]}),
+        }
+        attrs = {
+            'samples': self.samples, 'successes': self.successes,
+            'first_ts': self.first_ts, 'last_ts': self.last_ts,
+            'histogram_total': self.histogram.total, 'histogram_sum': self.histogram.sum,
+            'histogram_min': self.histogram.min, 'histogram_max': self.histogram.max,
+        }
+        return frames, attrs
+
+    @classmethod
+    def from_frames(cls, frames, attrs):
+        """Reconstrói um agregado a partir do resultado de to_frames()."""
+        aggregate = cls()
+        aggregate.samples = attrs['samples']
+        aggregate.successes = attrs['successes']
+        aggregate.first_ts = attrs['first_ts']
+        aggregate.last_ts = attrs['last_ts']
+        aggregate.tps = frames['tps'].set_index('second')['tps']
+        aggregate.latency = frames['latency'].set_index('second')
+        aggregate.latency_buckets = frames['buckets'].set_index(['second', 'bucket'])['count']
+        histogram = aggregate.histogram
+        histogram.counts[frames['histogram']['bucket'].values] = frames['histogram']['count'].values
+        histogram.total = attrs['histogram_total']
+        histogram.sum = attrs['histogram_sum']
+        histogram.min = attrs['histogram_min']
+        histogram.max = attrs['histogram_max']
+        return aggregate
+
+def latency_summary(histogram):
+    """Métricas de latência (ms) de um histograma: média, mínimo, máximo e percentis."""
+    summary = {
+        'Latência Média (ms)': histogram.mean(),
+        'Latência Mínima (ms)': histogram.min or 0,
+        'Latência Máxima (ms)': histogram.max or 0,
+    }
+    for q, value in histogram.percentiles().items():
+        summary[f'Latência {percentile_label(q)} (ms)'] = value
+    return summary
+
+def _min_or(current, value):
+    return value if current is None else min(current, value)
+
+def _max_or(current, value):
+    return value if current is None else max(current, value)
+
+def stream_jtl(jtl_file, chunksize=JTL_CHUNKSIZE):
+    """Lê um ficheiro JTL uma única vez, em blocos, e retorna um JtlAggregate com as métricas da execução."""
+    aggregate = JtlAggregate()
     try:
-        df = pd.read_csv(jtl_file)
-        # Calcula o tempo decorrido em segundos desde a primeira transação
-        df['elapsed_time'] = (df['timeStamp'] - df['timeStamp'].min()) / 1000
-        return df
+        reader = pd.read_csv(jtl_file, usecols=JTL_COLUMNS, dtype=JTL_DTYPES, chunksize=chunksize)
+        for chunk in reader:
+            aggregate.update(chunk)
+        return aggregate
     except Exception as e:
         print(f"  -> Erro ao ler o ficheiro {os.path.basename(jtl_file)}: {e}")
         return None
 
+def load_jtl(jtl_file, use_cache=True):
+    """Retorna o JtlAggregate de um ficheiro JTL, reutilizando a cache colunar quando ela é válida."""
+    if not use_cache:
+        return stream_jtl(jtl_file)
+    return results_cache.cached(jtl_file, JTL_CACHE_KIND, stream_jtl, JtlAggregate.to_frames, JtlAggregate.from_frames)
+
+def load_jtl_shards(paths, clock_offsets=None, merged_output=None):
+    """
+    Um JtlAggregate para uma execução feita em paralelo por vários injetores, a partir da junção ordenada por
+    timeStamp dos seus fragmentos, com os relógios corrigidos. Os desvios vêm de 'clock_offsets' (host -> ms,
+    medidos) ou, se não forem dados, são estimados a partir dos próprios fragmentos. Se 'merged_output' for dado,
+    grava também o JTL combinado. Retorna (agregado, {host: (desvio_ms, correlação, linhas fora de ordem)}).
+    """
+    if clock_offsets is not None:
+        offsets = {path: (clock_offsets.get(shard_host(path), 0.0), None) for path in paths}
+    else:
+        offsets = estimate_clock_offsets(paths)
+    aggregate = JtlAggregate()
+    blocks, shards = merge_shards(paths, {path: offset for path, (offset, _) in offsets.items()},
+                                  columns=None if merged_output else JTL_COLUMNS)
+    output = open(merged_output, 'w', newline='') if merged_output else None
+    try:
+        header = True
+        for block in blocks:
+            aggregate.update(block)
+            if output is not None:
+                block.assign(success=block['success'].map({True: 'true', False: 'false'})).to_csv(output, header=header, index=False)
+                header = False
+    finally:
+        if output is not None:
+            output.close()
+    info = {shard_host(path): (offsets.get(path, (0.0, None))[0], offsets.get(path, (0.0, None))[1], shard.late_rows)
+            for path, shard in zip(paths, shards)}
+    return aggregate, info
+
+def load_docker_stats(stats_file, use_cache=True):
+    """Retorna o DataFrame de um log de estatísticas do Docker, reutilizando a cache colunar quando ela é válida."""
+    if not use_cache:
+        return analyze_docker_stats(stats_file)
+    return results_cache.cached(stats_file, DOCKER_CACHE_KIND, analyze_docker_stats,
+                                lambda df: ({'stats': df}, {}), lambda frames, attrs: frames['stats'])
+
+def combine_series(series_list, aggregations):
+    """Combina séries por segundo relativo de várias execuções numa única série consolidada."""
+    if not series_list:
+        return pd.DataFrame()
+    return pd.concat(series_list, ignore_index=True).groupby('second').agg(aggregations).reset_index()
+
+# Uma linha do log de monitorização: container,cpu%,memMiB,rxKB,txKB,leituraKB,escritaKB[,timestamp_ms].
+# Os contadores de rede e disco são cumulativos; o timestamp só existe nos logs gerados pela versão atual da API.
+DOCKER_STATS_PATTERN = (r'^\s*([^,]+),([\d.]+)%,([\d.]+)MiB,([\d.]+)KB,([\d.]+)KB,([\d.]+)KB,([\d.]+)KB'
+                        r'(?:,(\d+))?\s*$')
+DOCKER_METRICS = ['cpu', 'mem', 'net_rx', 'net_tx', 'disk_r', 'disk_w']
+DOCKER_COUNTERS = ['net_rx', 'net_tx', 'disk_r', 'disk_w']
+
 def analyze_docker_stats(stats_file):
-    """Lê um ficheiro de log do Docker e retorna um DataFrame do Pandas."""
+    """
+    Lê um ficheiro de log do Docker e retorna um DataFrame do Pandas.
+    Além dos valores brutos, inclui 'time' (segundos desde a primeira amostra do ficheiro) e, para cada
+    contador cumulativo de rede/disco, a taxa '<contador>_rate' em KB/s calculada por container sobre o
+    tempo real entre amostras.
+    """
     try:
-        col_names = ['container', 'cpu', 'mem', 'net_rx', 'net_tx', 'disk_r', 'disk_w']
-        df = pd.read_csv(stats_file, names=col_names, header=None)
-        df['cpu'] = df['cpu'].str.replace('%', '').astype(float)
-        df['mem'] = df['mem'].str.replace('MiB', '').astype(float)
-        df['net_rx'] = df['net_rx'].str.replace('KB', '').astype(float)
-        df['net_tx'] = df['net_tx'].str.replace('KB', '').astype(float)
-        df['disk_r'] = df['disk_r'].str.replace('KB', '').astype(float)
-        df['disk_w'] = df['disk_w'].str.replace('KB', '').astype(float)
-        # Adiciona uma coluna de tempo para os gráficos de linha
-        df['time'] = df.groupby('container').cumcount() + 1
-        return df
+        with open(stats_file, 'r') as f:
+            lines = pd.Series(f.read().splitlines())
+        # Uma única extração por expressão regular para todas as colunas.
+        fields = lines.str.extract(DOCKER_STATS_PATTERN).dropna(subset=[0])
+        df = pd.DataFrame({'container': fields[0].str.strip().values})
+        for i, column in enumerate(DOCKER_METRICS, start=1):
+            # Contadores cumulativos em float64: em float32 as diferenças entre amostras perdem precisão.
+            df[column] = fields[i].astype('float64' if column in DOCKER_COUNTERS else 'float32').values
+        df['timestamp'] = pd.to_numeric(fields[7], errors='coerce').values
+
+        sample = df.groupby('container').cumcount()
+        if df['timestamp'].notna().all() and not df.empty:
+            df['time'] = (df['timestamp'] - df['timestamp'].min()) / 1000
+        else:
+            # Logs antigos, sem timestamp: assume uma amostra por segundo, como o docker stats em streaming.
+            df['time'] = (sample + 1).astype('float64')
+
+        return add_counter_rates(df)
     except Exception as e:
         print(f"Erro ao ler o ficheiro de estatísticas do Docker {stats_file}: {e}")
         return None
 
-def parse_backend_errors(results_dir):
-    """Lê o log de erros do back-end e retorna um dicionário com a contagem de erros por rodada."""
+def add_counter_rates(df):
+    """Ordena por container e tempo e acrescenta '<contador>_rate' (KB/s) a cada contador cumulativo."""
+    df = df.sort_values(['container', 'time'], kind='stable').reset_index(drop=True)
+    by_container = df.groupby('container')
+    elapsed = by_container['time'].diff()
+    for column in DOCKER_COUNTERS:
+        delta = by_container[column].diff()
+        # Contadores que recomeçam (reinício do container) não geram taxas negativas.
+        df[f'{column}_rate'] = (delta.clip(lower=0) / elapsed.where(elapsed > 0)).astype('float32')
+    return df
+
+def analyze_cgroup_stats(ring_file):
+    """
+    Lê um ficheiro resources_<rodada>_run_<N>.bin do cgroupCollector.py (mapeado em memória, sem cópia) e
+    retorna um DataFrame com as mesmas colunas que analyze_docker_stats. A CPU (%) é calculada a partir do
+    tempo de CPU acumulado entre amostras consecutivas de cada container (100% = um núcleo).
+    """
+    try:
+        names, records = read_ring(ring_file)
+    except Exception as e:
+        print(f"Erro ao ler o ficheiro de recursos {ring_file}: {e}")
+        return None
+    missing = records['missing']
+
+    def counter(field, flag, scale):
+        values = records[field] / scale
+        return np.where(missing & flag, np.nan, values)
+
+    df = pd.DataFrame({
+        'container': pd.Categorical.from_codes(records['container'].astype('int32'), categories=names).astype(str),
+        'cpu_usec': counter('cpu_usec', MISSING_CPU, 1),
+        'mem': counter('mem_bytes', MISSING_MEM, 1024 * 1024).astype('float32'),
+        'net_rx': counter('net_rx_bytes', MISSING_NET, 1024),
+        'net_tx': counter('net_tx_bytes', MISSING_NET, 1024),
+        'disk_r': counter('io_read_bytes', MISSING_IO, 1024),
+        'disk_w': counter('io_write_bytes', MISSING_IO, 1024),
+        'timestamp': records['timestamp_ns'] // 1_000_000,
+        'time_ns': records['timestamp_ns'],
+    })
+    if df.empty:
+        return df
+    df['time'] = (df['time_ns'] - df['time_ns'].min()) / 1e9
+    df = add_counter_rates(df)
+    by_container = df.groupby('container')
+    elapsed_usec = by_container['time_ns'].diff() / 1000
+    df['cpu'] = (by_container['cpu_usec'].diff().clip(lower=0) / elapsed_usec.where(elapsed_usec > 0) * 100).astype('float32')
+    return df.drop(columns=['cpu_usec', 'time_ns'])
+
+def load_resource_stats(stats_file, use_cache=True):
+    """DataFrame de recursos de uma execução, a partir do log do Docker ou do ficheiro binário do cgroupCollector.py."""
+    if stats_file.endswith('.bin'):
+        return analyze_cgroup_stats(stats_file)
+    return load_docker_stats(stats_file, use_cache)
+
+def resource_stats_files(results_dir, round_name):
+    """
+    Ficheiro de recursos de cada execução de uma rodada, por ordem do número da execução: o resources_*.bin do
+    cgroupCollector.py quando existe, senão o docker_stats_*.log da API.
+    """
+    files = {}
+    for pattern in (f"docker_stats_{round_name.lower()}_run_*.log", f"resources_{round_name.lower()}_run_*.bin"):
+        for path in glob.glob(os.path.join(results_dir, pattern)):
+            files[run_number(path)] = path
+    return [files[run] for run in sorted(files)]
+
+# Série temporal gravada pelo chainSampler.py (chain_metrics_<rodada>_run_<N>.csv), uma linha por nó e amostra.
+CHAIN_METRICS_DTYPES = {'timestamp': 'int64', 'node': 'category', 'block': 'Int64', 'gas_used': 'Int64',
+                        'gas_limit': 'Int64', 'txpool_local': 'Int64', 'txpool_remote': 'Int64', 'peers': 'Int64',
+                        'rpc_ms': 'Int32'}
+
+def analyze_chain_metrics(metrics_file):
+    """
+    Lê as métricas da cadeia de uma execução e acrescenta, por nó: 'txpool' (transações pendentes),
+    'gas_utilization' (% do limite de gas usado no último bloco) e 'blocks_per_s' (taxa de produção de blocos).
+    """
+    try:
+        df = pd.read_csv(metrics_file, dtype=CHAIN_METRICS_DTYPES)
+    except Exception as e:
+        print(f"Erro ao ler o ficheiro de métricas da cadeia {metrics_file}: {e}")
+        return None
+    df = df.sort_values(['node', 'timestamp'], kind='stable').reset_index(drop=True)
+    df['txpool'] = (df['txpool_local'] + df['txpool_remote']).astype('float64')
+    df['gas_utilization'] = (df['gas_used'] / df['gas_limit'].where(df['gas_limit'] > 0) * 100).astype('float64')
+    by_node = df.groupby('node', observed=True)
+    elapsed_s = by_node['timestamp'].diff() / 1000
+    df['blocks_per_s'] = (by_node['block'].diff().astype('float64') / elapsed_s.where(elapsed_s > 0)).clip(lower=0)
+    return df
+
+def align_chain_metrics(df, origin_ts):
+    """Coluna 'time' em segundos no mesmo eixo que as séries do JTL (segundo do primeiro timeStamp = 0)."""
+    origin_ms = (origin_ts // 1000 if origin_ts is not None else df['timestamp'].min() // 1000) * 1000
+    return df.assign(time=(df['timestamp'] - origin_ms) / 1000)
+
+def parse_backend_errors_by_run(results_dir):
+    """Lê o log de erros do back-end e retorna um dicionário (rodada, execução) -> contagem de erros."""
     error_file = os.path.join(results_dir, "backend_errors.log")
-    backend_errors = {"Open": 0, "Query": 0, "Transfer": 0}
+    errors_by_run = {}
     if not os.path.exists(error_file):
-        return backend_errors
+        return errors_by_run
 
     try:
         with open(error_file, 'r') as f:
             for line in f:
                 parts = line.strip().split(',')
                 if len(parts) >= 3:
-                    round_name = parts[0]
-                    error_count = int(parts[2])
-                    if round_name in backend_errors:
-                        backend_errors[round_name] += error_count
+                    key = (parts[0], int(parts[1]))
+                    errors_by_run[key] = errors_by_run.get(key, 0) + int(parts[2])
     except Exception as e:
         print(f"  -> Aviso: Não foi possível ler o ficheiro de erros do back-end: {e}")
-    
+
+    return errors_by_run
+
+def parse_backend_errors(results_dir):
+    """Lê o log de erros do back-end e retorna um dicionário com a contagem de erros por rodada."""
+    backend_errors = {"Open": 0, "Query": 0, "Transfer": 0}
+    for (round_name, _), error_count in parse_backend_errors_by_run(results_dir).items():
+        if round_name in backend_errors:
+            backend_errors[round_name] += error_count
     return backend_errors
 
-def plot_latency_over_time(df, title, output_path):
-    """Gera e guarda um gráfico de latência ao longo do tempo em segundos."""
-    df_copy = df.copy()
-    df_copy['elapsed_s'] = df_copy['elapsed'] / 1000  # Converte para segundos
+def run_number(path):
+    """Número da execução a partir do nome do ficheiro (..._run_<N>.<ext>)."""
+    match = re.search(r'_run_(\d+)', os.path.basename(path))
+    return int(match.group(1)) if match else None
 
-    plt.figure(figsize=(12, 6))
-    plt.scatter(df_copy['elapsed_time'], df_copy['elapsed_s'], label='Latência (s)', alpha=0.5, s=10)
-    
-    df_sorted = df_copy.sort_values(by='elapsed_time')
-    # Calcula a média móvel na latência em segundos
-    df_sorted['rolling_avg'] = df_sorted['elapsed_s'].rolling(window=200, min_periods=1).mean()
-    
-    plt.plot(df_sorted['elapsed_time'], df_sorted['rolling_avg'], color='red', linestyle='--', label='Média Móvel (200 amostras)')
-    plt.title(f'Latência Consolidada ao Longo do Tempo - {title}')
-    plt.xlabel('Tempo (segundos)')
-    plt.ylabel('Latência da Resposta (s)')
-    plt.grid(True)
-    plt.legend()
-    plt.savefig(os.path.join(output_path, f"CONSOLIDATED_latency_{title.lower()}.png"))
-    plt.close()
+def load_jmeter_results(results_dir, rounds=("Open", "Query", "Transfer"), jobs=1, use_cache=True, whole_run=False):
+    """
+    Retorna um RoundResult por execução e rodada do JMeter, calculado a partir dos agregados em cache
+    (JtlAggregate e estatísticas do Docker), sem reler os ficheiros originais quando a cache é válida.
+    Como no relatório, o throughput e a latência são os da janela estável de cada execução (sem o ramp-up nem a
+    cauda final), com os valores da execução completa em whole_run_*; com whole_run=True, são os da execução
+    completa. As contagens de sucessos e falhas são sempre as da execução completa.
+    """
+    errors_by_run = parse_backend_errors_by_run(results_dir)
+    jtl_files = [f for r in rounds for f in glob.glob(os.path.join(results_dir, f"results_{r.lower()}_run_*.jtl"))]
+    stats_files = {(r, run_number(f)): f for r in rounds for f in resource_stats_files(results_dir, r)}
+    aggregates = map_files(partial(load_jtl, use_cache=use_cache), jtl_files, jobs)
+    docker_dfs = map_files(partial(load_resource_stats, use_cache=use_cache), list(stats_files.values()), jobs)
 
-def plot_throughput_over_time(df, title, output_path):
-    """Gera e guarda um gráfico de throughput (TPS) ao longo do tempo."""
-    tps_df = df[df['success'] == True].copy()
-    tps_df['second'] = tps_df['elapsed_time'].astype(int)
-    tps_summary = tps_df.groupby('second').size().reset_index(name='tps')
-    
-    plt.figure(figsize=(12, 6))
-    plt.plot(tps_summary['second'], tps_summary['tps'], label='Throughput (TPS)', color='green', marker='o', markersize=4, linestyle='-')
-    plt.title(f'Throughput Consolidado ao Longo do Tempo - {title}')
-    plt.xlabel('Tempo (segundos)')
-    plt.ylabel('Transações por Segundo (TPS)')
-    plt.grid(True)
-    plt.legend()
-    plt.savefig(os.path.join(output_path, f"CONSOLIDATED_throughput_{title.lower()}.png"))
-    plt.close()
+    results = []
+    for round_name in rounds:
+        for jtl_file, aggregate in aggregates.items():
+            if not os.path.basename(jtl_file).startswith(f"results_{round_name.lower()}_run_"):
+                continue
+            if aggregate is None or aggregate.samples == 0:
+                continue
+            run = run_number(jtl_file)
+            summary = aggregate.summary()
+            headline, histogram, window = summary, aggregate.histogram, None
+            if not whole_run:
+                window = detect_steady_window(aggregate.tps_series(), aggregate.latency_series())
+                headline = aggregate.window_summary(*window)
+                histogram = aggregate.window_histogram(*window)
+                if headline['Total de Amostras'] == 0:
+                    headline, histogram, window = summary, aggregate.histogram, None
+            failures = summary['Falha'] + errors_by_run.get((round_name, run), 0)
+            docker_df = docker_dfs.get(stats_files.get((round_name, run)))
+            results.append(RoundResult(
+                tool='jmeter',
+                round=round_name.lower(),
+                run=run,
+                successes=summary['Total de Amostras'] - failures,
+                failures=failures,
+                throughput_tps=headline['Throughput Médio (TPS)'],
+                latency_mean_s=headline['Latência Média (ms)'] / 1000,
+                latency_min_s=headline['Latência Mínima (ms)'] / 1000,
+                latency_max_s=headline['Latência Máxima (ms)'] / 1000,
+                latency_histogram=histogram,
+                resources=resources_from_samples(docker_df, 'container', 'cpu', 'mem') if docker_df is not None else None,
+                runs=[run],
+                steady_window=window,
+                whole_run_throughput_tps=summary['Throughput Médio (TPS)'],
+                whole_run_latency_mean_s=summary['Latência Média (ms)'] / 1000,
+                whole_run_latency_histogram=aggregate.histogram,
+            ))
+    return results
 
-def plot_summary_table_from_dict(summary_data, title, output_path):
-    """Gera e guarda uma tabela com métricas de resumo consolidadas a partir de um dicionário."""
+# Janela temporal da média móvel de latência (independente do número de amostras por segundo).
+LATENCY_ROLLING_WINDOW = '10s'
+# Buckets do histograma agrupados por linha no mapa de densidade de latência.
+HEATMAP_BUCKET_GROUP = 10
+
+# Linhas extra da tabela de resumo com os valores da execução completa, para comparar com os da janela estável.
+WHOLE_RUN_SUFFIX = ' (exec. completa)'
+WHOLE_RUN_ROWS = ['Throughput Médio (TPS)', 'Latência Média (ms)'] + [f'Latência {percentile_label(q)} (ms)' for q in (95, 99)]
+
+def mark_transients(ax, window, first_second, last_second):
+    """Sombreia o aquecimento e o arrefecimento (fora da janela estável [início, fim)) num gráfico ao longo do tempo."""
+    if window is None:
+        return
+    start, end = window
+    if start > first_second:
+        ax.axvspan(first_second, start, color='grey', alpha=0.15, label='Aquecimento')
+    if end <= last_second:
+        ax.axvspan(end, last_second + 1, color='grey', alpha=0.3, label='Arrefecimento')
+
+def draw_latency_series(ax, latency_df, percentiles_df, title, window=None):
+    """
+    Desenha a latência ao longo do tempo a partir da latência agregada por segundo:
+    faixas mínimo-máximo e mediana-p95 por segundo e média móvel sobre uma janela temporal.
+    O custo de desenho depende da duração do teste e não do número de amostras.
+    """
+    seconds = latency_df['second']
+    # Média móvel temporal ponderada pelo número de amostras de cada segundo.
+    by_time = latency_df.set_index(pd.to_timedelta(seconds, unit='s'))[['sum', 'count']]
+    rolling = by_time.rolling(LATENCY_ROLLING_WINDOW, min_periods=1).sum()
+    rolling_mean_s = (rolling['sum'] / rolling['count']).to_numpy() / 1000
+    bands = percentiles_df.set_index('second').reindex(seconds)
+
+    ax.fill_between(seconds, latency_df['min'] / 1000, latency_df['max'] / 1000, color='tab:blue', alpha=0.15, label='Mínimo - Máximo (s)')
+    ax.fill_between(seconds, bands['p50'] / 1000, bands['p95'] / 1000, color='tab:blue', alpha=0.35, label='Mediana - p95 (s)')
+    ax.plot(seconds, bands['p50'] / 1000, color='tab:blue', linewidth=1, label='Mediana por Segundo (s)')
+    ax.plot(seconds, rolling_mean_s, color='red', linestyle='--', label=f'Média Móvel ({LATENCY_ROLLING_WINDOW})')
+    if not seconds.empty:
+        mark_transients(ax, window, seconds.min(), seconds.max())
+    ax.set_title(f'Latência Consolidada ao Longo do Tempo - {title}')
+    ax.set_xlabel('Tempo (segundos)')
+    ax.set_ylabel('Latência da Resposta (s)')
+    ax.grid(True)
+    ax.legend()
+
+def plot_latency_series(latency_df, percentiles_df, title, output_path, window=None):
+    """Gera e guarda o gráfico de draw_latency_series."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    draw_latency_series(ax, latency_df, percentiles_df, title, window)
+    fig.savefig(os.path.join(output_path, f"CONSOLIDATED_latency_{title.lower()}.png"))
+    plt.close(fig)
+
+def draw_latency_heatmap(ax, bucket_counts, title):
+    """Desenha um mapa de densidade (tempo x latência) a partir das contagens por (second, bucket)."""
+    seconds = bucket_counts.index.get_level_values('second').to_numpy()
+    # Linhas do mapa com HEATMAP_BUCKET_GROUP buckets consecutivos (~10% de largura relativa cada).
+    rows = bucket_counts.index.get_level_values('bucket').to_numpy() // HEATMAP_BUCKET_GROUP
+    first_second, first_row = seconds.min(), rows.min()
+    grid = np.zeros((rows.max() - first_row + 1, seconds.max() - first_second + 1))
+    np.add.at(grid, (rows - first_row, seconds - first_second), bucket_counts.to_numpy())
+    edges_ms = np.expm1(np.arange(first_row, rows.max() + 2) * HEATMAP_BUCKET_GROUP * np.log1p(PRECISION))
+    edges_s = np.maximum(edges_ms, 0.5) / 1000
+    edges_t = np.arange(first_second, seconds.max() + 2)
+
+    mesh = ax.pcolormesh(edges_t, edges_s, np.ma.masked_equal(grid, 0),
+                         norm=matplotlib.colors.LogNorm(), cmap='viridis', shading='flat')
+    ax.figure.colorbar(mesh, ax=ax, label='Amostras')
+    ax.set_yscale('log')
+    ax.set_title(f'Densidade de Latência ao Longo do Tempo - {title}')
+    ax.set_xlabel('Tempo (segundos)')
+    ax.set_ylabel('Latência da Resposta (s)')
+
+def plot_latency_heatmap(bucket_counts, title, output_path):
+    """Gera e guarda o mapa de densidade de draw_latency_heatmap."""
+    if bucket_counts.empty:
+        return
+    fig, ax = plt.subplots(figsize=(12, 6))
+    draw_latency_heatmap(ax, bucket_counts, title)
+    fig.savefig(os.path.join(output_path, f"CONSOLIDATED_latency_heatmap_{title.lower()}.png"))
+    plt.close(fig)
+
+def draw_latency_percentiles_over_time(ax, percentiles_df, title, window=None):
+    """Desenha os percentis de latência por segundo, calculados sobre todas as execuções."""
+    for q in PERCENTILES:
+        label = percentile_label(q)
+        ax.plot(percentiles_df['second'], percentiles_df[label] / 1000, label=label, linewidth=1)
+    if not percentiles_df.empty:
+        mark_transients(ax, window, percentiles_df['second'].min(), percentiles_df['second'].max())
+    ax.set_title(f'Percentis de Latência ao Longo do Tempo - {title}')
+    ax.set_xlabel('Tempo (segundos)')
+    ax.set_ylabel('Latência da Resposta (s)')
+    ax.set_yscale('log')
+    ax.grid(True, which='both', alpha=0.5)
+    ax.legend()
+
+def plot_latency_percentiles_over_time(percentiles_df, title, output_path, window=None):
+    """Gera e guarda o gráfico de draw_latency_percentiles_over_time."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    draw_latency_percentiles_over_time(ax, percentiles_df, title, window)
+    fig.savefig(os.path.join(output_path, f"CONSOLIDATED_latency_percentiles_{title.lower()}.png"))
+    plt.close(fig)
+
+def draw_throughput_over_time(ax, tps_summary, title, window=None):
+    """Desenha o throughput (TPS) ao longo do tempo a partir das transações com sucesso por segundo."""
+    ax.plot(tps_summary['second'], tps_summary['tps'], label='Throughput (TPS)', color='green', marker='o', markersize=4, linestyle='-')
+    if not tps_summary.empty:
+        mark_transients(ax, window, tps_summary['second'].min(), tps_summary['second'].max())
+    ax.set_title(f'Throughput Consolidado ao Longo do Tempo - {title}')
+    ax.set_xlabel('Tempo (segundos)')
+    ax.set_ylabel('Transações por Segundo (TPS)')
+    ax.grid(True)
+    ax.legend()
+
+def plot_throughput_over_time(tps_summary, title, output_path, window=None):
+    """Gera e guarda o gráfico de draw_throughput_over_time."""
+    fig, ax = plt.subplots(figsize=(12, 6))
+    draw_throughput_over_time(ax, tps_summary, title, window)
+    fig.savefig(os.path.join(output_path, f"CONSOLIDATED_throughput_{title.lower()}.png"))
+    plt.close(fig)
+
+def summary_table(summary_data):
+    """Tabela (Métricas, Valor) com as métricas de resumo consolidadas, já formatadas como texto."""
+    percentile_rows = [f'Latência {percentile_label(q)} (s)' for q in PERCENTILES]
     summary = {
         'Métricas': [
             'Total de Amostras', 'Sucesso', 'Falha', 
             'Latência Média (s)', 'Latência Mínima (s)', 'Latência Máxima (s)', 
+        ] + percentile_rows + [
             'Throughput Médio (TPS)'
         ],
         'Valor': [
@@ -116,76 +613,201 @@ def plot_summary_table_from_dict(summary_data, title, output_path):
             f"{summary_data['Latência Média (ms)'] / 1000:.2f}",
             f"{summary_data['Latência Mínima (ms)'] / 1000:.2f}",
             f"{summary_data['Latência Máxima (ms)'] / 1000:.2f}",
+        ] + [
+            f"{summary_data[f'Latência {percentile_label(q)} (ms)'] / 1000:.3f}" for q in PERCENTILES
+        ] + [
             f"{summary_data['Throughput Médio (TPS)']:.2f}"
         ]
     }
+    if 'Janela Estável (s)' in summary_data:
+        # Os valores principais são os da janela estável; os da execução completa ficam ao lado para comparação.
+        start, end = summary_data['Janela Estável (s)']
+        summary['Métricas'].append('Janela Estável (s)')
+        summary['Valor'].append(f"{start:.0f} - {end:.0f}")
+        for key in WHOLE_RUN_ROWS:
+            value = summary_data[key + WHOLE_RUN_SUFFIX]
+            summary['Métricas'].append(key.replace('(ms)', '(s)') + WHOLE_RUN_SUFFIX)
+            summary['Valor'].append(f"{value:.2f}" if key.startswith('Throughput') else f"{value / 1000:.3f}")
+    return pd.DataFrame(summary)
 
-    summary_df = pd.DataFrame(summary)
+def plot_summary_table_from_dict(summary_data, title, output_path):
+    """Gera e guarda uma tabela com métricas de resumo consolidadas a partir de um dicionário."""
+    summary_df = summary_table(summary_data)
     
-    fig, ax = plt.subplots(figsize=(6, 4))
+    fig, ax = plt.subplots(figsize=(6, 6))
     ax.axis('tight')
     ax.axis('off')
     table = ax.table(cellText=summary_df.values, colLabels=summary_df.columns, loc='center', cellLoc='center')
     table.auto_set_font_size(False)
     table.set_fontsize(14)
     table.scale(1.2, 1.5)
+    table.auto_set_column_width([0, 1])
     plt.title(f'Resumo Consolidado - {title}', fontsize=18, y=0.95)
 
     plt.savefig(os.path.join(output_path, f"CONSOLIDATED_summary_table_{title.lower()}.png"), bbox_inches='tight', pad_inches=0.1)
     plt.close()
-    
-def plot_resource_bar_charts(df, title, resource_name, unit, output_path):
-    """Gera gráficos de barras para o uso médio e máximo de um recurso."""
-    summary = df.groupby('container')[resource_name].agg(['mean', 'max']).reset_index()
-    summary = summary.sort_values(by='container').set_index('container')
-    colors = [NODE_COLORS.get(node, '#7f7f7f') for node in summary.index]
 
-    plt.figure(figsize=(10, 6))
-    bars = plt.bar(summary.index, summary['mean'], color=colors)
-    plt.title(f'Uso Médio de {resource_name.upper()} por Nó - {title}')
-    plt.ylabel(f'Uso Médio ({unit})')
-    plt.xlabel('Nó')
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.bar_label(bars, fmt='%.2f')
-    plt.savefig(os.path.join(output_path, f"CONSOLIDATED_avg_{resource_name}_usage_{title.lower()}.png"))
-    plt.close()
+def resource_usage_summary(df, resource_name):
+    """Uso médio e máximo de um recurso por container, ordenado pelo nome do container."""
+    return df.groupby('container')[resource_name].agg(['mean', 'max']).sort_index()
 
-    plt.figure(figsize=(10, 6))
-    bars = plt.bar(summary.index, summary['max'], color=colors)
-    plt.title(f'Uso Máximo de {resource_name.upper()} por Nó - {title}')
-    plt.ylabel(f'Uso Máximo ({unit})')
-    plt.xlabel('Nó')
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.bar_label(bars, fmt='%.2f')
-    plt.savefig(os.path.join(output_path, f"CONSOLIDATED_max_{resource_name}_usage_{title.lower()}.png"))
-    plt.close()
+def draw_resource_bars(ax, summary, stat, title, resource_name, unit):
+    """Desenha as barras do uso médio (stat='mean') ou máximo (stat='max') de um recurso por nó."""
+    label = 'Médio' if stat == 'mean' else 'Máximo'
+    colors = [NODE_COLORS.get(node, '#7f7f7f') for node in summary.index]
+    bars = ax.bar(summary.index, summary[stat], color=colors)
+    ax.set_title(f'Uso {label} de {resource_name.upper()} por Nó - {title}')
+    ax.set_ylabel(f'Uso {label} ({unit})')
+    ax.set_xlabel('Nó')
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.bar_label(bars, fmt='%.2f')
 
-def plot_resource_line_chart(df, title, column, y_label, output_path):
-    """Função para gerar gráficos de linha para Rede e Disco."""
-    plt.figure(figsize=(15, 7))
+def plot_resource_bar_charts(df, title, resource_name, unit, output_path):
+    """Gera gráficos de barras para o uso médio e máximo de um recurso."""
+    summary = resource_usage_summary(df, resource_name)
+    for stat, prefix in (('mean', 'avg'), ('max', 'max')):
+        fig, ax = plt.subplots(figsize=(10, 6))
+        draw_resource_bars(ax, summary, stat, title, resource_name, unit)
+        fig.savefig(os.path.join(output_path, f"CONSOLIDATED_{prefix}_{resource_name}_usage_{title.lower()}.png"))
+        plt.close(fig)
+
+def draw_resource_line_chart(ax, df, title, column, y_label):
+    """Desenha uma série por container (Rede e Disco) ao longo do tempo."""
     sorted_containers = sorted(df['container'].unique())
     for container in sorted_containers:
         container_df = df[df['container'] == container]
         color = NODE_COLORS.get(container, '#7f7f7f')
-        plt.plot(container_df['time'], container_df[column], label=container, color=color, alpha=0.8, marker='.', linestyle='-')
-    plt.title(f'{y_label} ao Longo do Tempo - {title}')
-    plt.xlabel('Tempo (segundos)')
-    plt.ylabel(y_label)
-    plt.grid(True)
-    handles, labels = plt.gca().get_legend_handles_labels()
+        ax.plot(container_df['time'], container_df[column], label=container, color=color, alpha=0.8, marker='.', linestyle='-')
+    ax.set_title(f'{y_label} ao Longo do Tempo - {title}')
+    ax.set_xlabel('Tempo (segundos)')
+    ax.set_ylabel(y_label)
+    ax.grid(True)
+    handles, labels = ax.get_legend_handles_labels()
     order = [labels.index(s) for s in sorted_containers]
-    plt.legend([handles[idx] for idx in order],[labels[idx] for idx in order])
-    plt.savefig(os.path.join(output_path, f"CONSOLIDATED_{column}_usage_{title.lower()}.png"))
-    plt.close()
+    ax.legend([handles[idx] for idx in order],[labels[idx] for idx in order])
+
+def plot_resource_line_chart(df, title, column, y_label, output_path):
+    """Função para gerar gráficos de linha para Rede e Disco."""
+    fig, ax = plt.subplots(figsize=(15, 7))
+    draw_resource_line_chart(ax, df, title, column, y_label)
+    fig.savefig(os.path.join(output_path, f"CONSOLIDATED_{column}_usage_{title.lower()}.png"))
+    plt.close(fig)
+
+CHAIN_PANELS = [
+    ('txpool', 'Transações Pendentes (txpool)'),
+    ('blocks_per_s', 'Blocos por Segundo'),
+    ('gas_utilization', 'Gas Usado no Último Bloco (%)'),
+    ('peers', 'Peers'),
+]
+
+def draw_chain_metrics(axes, df, title):
+    """Métricas da cadeia por nó ao longo do tempo, um painel de CHAIN_PANELS em cada um dos eixos dados."""
+    nodes = sorted(df['node'].unique())
+    for ax, (column, label) in zip(axes, CHAIN_PANELS):
+        for node in nodes:
+            node_df = df[df['node'] == node]
+            ax.plot(node_df['time'], node_df[column], label=node, color=NODE_COLORS.get(node, '#7f7f7f'), alpha=0.8,
+                    marker='.', markersize=3, linestyle='-')
+        ax.set_ylabel(label)
+        ax.grid(True)
+    axes[0].set_title(f'Métricas da Cadeia por Nó - {title}')
+    axes[0].legend(ncol=len(nodes), fontsize=8)
+    axes[-1].set_xlabel('Tempo (segundos)')
+
+def plot_chain_metrics(df, title, output_path):
+    """Métricas da cadeia por nó ao longo do tempo: transações pendentes, blocos/s, utilização de gas e peers."""
+    fig, axes = plt.subplots(len(CHAIN_PANELS), 1, figsize=(15, 14), sharex=True)
+    draw_chain_metrics(axes, df, title)
+    fig.savefig(os.path.join(output_path, f"CONSOLIDATED_chain_metrics_{title.lower()}.png"))
+    plt.close(fig)
+
+def write_report(report_rounds, fmt, output_path):
+    """
+    Modo --report pdf/html: todas as rodadas num único relatório (REPORT_jmeter.pdf/.html), uma página de vários
+    painéis por rodada (mais uma com as métricas da cadeia, se existirem), desenhadas numa figura reutilizada.
+    O resumo de todas as rodadas é gravado como texto (CONSOLIDATED_summary.csv/.txt e tabela no HTML).
+    Retorna o caminho do relatório.
+    """
+    summaries = {r: data['summary'] for r, data in report_rounds.items() if 'summary' in data}
+    if summaries:
+        columns = {r: summary_table(s).set_index('Métricas')['Valor'] for r, s in summaries.items()}
+        summary_df = pd.DataFrame(columns).rename_axis('Métricas').reset_index()
+        print(write_table(summary_df, os.path.join(output_path, 'CONSOLIDATED_summary')))
+
+    path = os.path.join(output_path, f'REPORT_jmeter.{fmt}')
+    book = ReportBook(path, fmt, f'Relatório Consolidado JMeter - {output_path}')
+    if summaries:
+        book.table(summary_df, 'Resumo Consolidado')
+    for round_name, data in report_rounds.items():
+        if 'latency' in data or 'docker' in data:
+            axes = book.page(5, 2)
+            if 'latency' in data:
+                window = data.get('window')
+                draw_latency_series(axes[0, 0], data['latency'], data['percentiles'], round_name, window)
+                draw_throughput_over_time(axes[0, 1], data['tps'], round_name, window)
+                draw_latency_percentiles_over_time(axes[1, 0], data['percentiles'], round_name, window)
+                if not data['buckets'].empty:
+                    draw_latency_heatmap(axes[1, 1], data['buckets'], round_name)
+            if 'docker' in data:
+                docker_df = data['docker']
+                for row, (resource_name, unit) in ((2, ('cpu', '%')), (3, ('mem', 'MB'))):
+                    usage = resource_usage_summary(docker_df, resource_name)
+                    draw_resource_bars(axes[row, 0], usage, 'mean', round_name, resource_name, unit)
+                    draw_resource_bars(axes[row, 1], usage, 'max', round_name, resource_name, unit)
+                draw_resource_line_chart(axes[4, 0], docker_df, round_name, 'net_io', 'I/O de Rede Consolidado (KB/s)')
+                draw_resource_line_chart(axes[4, 1], docker_df, round_name, 'disk_io', 'I/O de Disco Consolidado (KB/s)')
+            book.save_page(f'Rodada {round_name}')
+        if 'chain' in data:
+            axes = book.page(len(CHAIN_PANELS), 1, row_height=3.5, sharex=True)
+            draw_chain_metrics(axes[:, 0], data['chain'], round_name)
+            book.save_page(f'Rodada {round_name} - Cadeia')
+    book.close()
+    return path
 
 def main():
-    if len(sys.argv) < 2:
-        print("Uso: python generateGraphs.py <diretório_de_resultados>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Gera gráficos consolidados a partir dos resultados do JMeter.")
+    parser.add_argument('results_dir', help="Diretório com os ficheiros results_*_run_*.jtl e docker_stats_*_run_*.log")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Número de processos para ler ficheiros e gerar gráficos (1 = execução em série)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignora a cache colunar (.report_cache) e relê todos os ficheiros originais")
+    parser.add_argument('--follow', action='store_true',
+                        help="Modo ao vivo: acompanha os ficheiros durante a execução e atualiza um resumo periodicamente")
+    parser.add_argument('--interval', type=float, default=5,
+                        help="Intervalo (s) entre atualizações do resumo no modo --follow")
+    parser.add_argument('--window', type=int, default=30,
+                        help="Janela (s) do TPS e dos percentis deslizantes no modo --follow")
+    parser.add_argument('--stats-dir',
+                        help="Diretório dos logs docker_stats_*.log no modo --follow (por omissão, o diretório de resultados)")
+    parser.add_argument('--report', choices=REPORT_FORMATS, default='png',
+                        help="png: um ficheiro por gráfico; pdf/html: todas as rodadas num só relatório de várias páginas, "
+                             "com o resumo em CSV/texto em vez de imagens")
+    parser.add_argument('--merge-shards', action='store_true',
+                        help="Vários injetores: os ficheiros results_<rodada>_run_<N>[_<host>].jtl com o mesmo N são "
+                             "fragmentos de uma só execução e são juntos numa linha temporal única, com os relógios corrigidos")
+    parser.add_argument('--clock-offsets',
+                        help="Com --merge-shards: CSV host,offset_ms com os desvios medidos dos relógios dos injetores "
+                             "(por omissão, estimados a partir dos próprios ficheiros)")
+    parser.add_argument('--merged-jtl', action='store_true',
+                        help="Com --merge-shards: grava também o JTL combinado de cada execução (merged_<rodada>_run_<N>.jtl)")
+    parser.add_argument('--whole-run', action='store_true',
+                        help="Calcula o throughput e a latência sobre a execução completa, sem detetar a janela estável "
+                             "(aquecimento e arrefecimento incluídos)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Mostra o tempo real, o tempo de CPU e o pico de RSS de cada etapa (leitura, agregação, desenho)")
+    parser.add_argument('--profile-output', help="Grava o perfil por etapa neste ficheiro JSON")
+    args = parser.parse_args()
+
+    results_dir = args.results_dir
+    if args.follow:
+        from live_report import follow
+        follow(results_dir, args.stats_dir or results_dir, DOCKER_STATS_PATTERN, args.interval, args.window)
+        return
 
-    results_dir = sys.argv[1]
+    profiler = StageProfiler(args.profile or bool(args.profile_output))
     rounds = ["Open", "Query", "Transfer"]
 
+    profiler.begin('parse')
     print("\n--- Analisando erros de processamento assíncrono (back-end)... ---")
     backend_errors = parse_backend_errors(results_dir)
     for round_name, count in backend_errors.items():
@@ -194,34 +816,56 @@ def main():
 
     print(f"\n--- Gerando gráficos consolidados para os resultados em: {results_dir} ---")
 
+    jtl_files = {r: sorted(glob.glob(os.path.join(results_dir, f"results_{r.lower()}_run_*.jtl"))) for r in rounds}
+    stats_files = {r: resource_stats_files(results_dir, r) for r in rounds}
+    chain_files = {r: sorted(glob.glob(os.path.join(results_dir, f"chain_metrics_{r.lower()}_run_*.csv"))) for r in rounds}
+
+    # Todos os ficheiros de todas as rodadas são lidos de uma só vez, distribuídos pelo pool de processos.
+    print(f"A ler {sum(len(f) for f in jtl_files.values())} ficheiros JTL e "
+          f"{sum(len(f) for f in stats_files.values())} ficheiros de recursos (Docker/cgroup) com {args.jobs} processo(s)...")
+    use_cache = not args.no_cache
+    if args.merge_shards:
+        # Cada execução passa a ser representada pelo seu primeiro fragmento, com o agregado da junção de todos.
+        clock_offsets = read_clock_offsets(args.clock_offsets) if args.clock_offsets else None
+        merge_tasks, merged_files = [], {}
+        for r in rounds:
+            for run, paths in group_shards(jtl_files[r]).items():
+                merged_output = os.path.join(results_dir, f"merged_{r.lower()}_run_{run}.jtl") if args.merged_jtl else None
+                merge_tasks.append((load_jtl_shards, (paths, clock_offsets, merged_output)))
+                merged_files[paths[0]] = (r, run)
+            jtl_files[r] = [p for p, (round_name, _) in merged_files.items() if round_name == r]
+        print(f"A juntar os fragmentos de {len(merge_tasks)} execuções com {args.jobs} processo(s)...")
+        aggregates = {}
+        for key, (aggregate, info) in zip(merged_files, run_tasks(merge_tasks, args.jobs)):
+            aggregates[key] = aggregate
+            round_name, run = merged_files[key]
+            for host, (offset, correlation, late_rows) in info.items():
+                source = 'medido' if correlation is None else f'estimado, correlação {correlation:.2f}'
+                print(f"  -> {round_name} execução {run}, injetor '{host}': desvio {offset:+.1f} ms ({source})"
+                      + (f", {late_rows} linhas fora de ordem" if late_rows else ""))
+    else:
+        aggregates = map_files(partial(load_jtl, use_cache=use_cache), [f for r in rounds for f in jtl_files[r]], args.jobs)
+    docker_dfs = map_files(partial(load_resource_stats, use_cache=use_cache), [f for r in rounds for f in stats_files[r]], args.jobs)
+    chain_dfs = map_files(analyze_chain_metrics, [f for r in rounds for f in chain_files[r]], args.jobs)
+
+    profiler.begin('aggregate')
+    plot_tasks = []
+    report_rounds = {}
+    steady_rows = []
     for round_name in rounds:
+        report_data = report_rounds.setdefault(round_name, {})
         print(f"\n--- Processando Rodada Consolidada: {round_name} ---")
 
-        jtl_files = glob.glob(os.path.join(results_dir, f"results_{round_name.lower()}_run_*.jtl"))
-        stats_files = glob.glob(os.path.join(results_dir, f"docker_stats_{round_name.lower()}_run_*.log"))
-
         run_summaries = []
-        if not jtl_files:
+        if not jtl_files[round_name]:
             print(f"Aviso: Nenhum ficheiro JTL encontrado para a rodada '{round_name}'.")
         else:
-            print(f"Ficheiros JTL encontrados: {len(jtl_files)}")
-            for jtl_file in jtl_files:
-                df = analyze_jtl(jtl_file)
-                if df is not None and not df.empty:
-                    total_duration = df['elapsed_time'].max()
-                    successful_tx = df['success'].sum()
-                    throughput = successful_tx / total_duration if total_duration > 0 else 0
-                    
-                    run_summary = {
-                        'Total de Amostras': len(df),
-                        'Sucesso': successful_tx,
-                        'Falha': len(df) - successful_tx,
-                        'Latência Média (ms)': df['elapsed'].mean(),
-                        'Latência Mínima (ms)': df['elapsed'].min(),
-                        'Latência Máxima (ms)': df['elapsed'].max(),
-                        'Throughput Médio (TPS)': throughput
-                    }
-                    run_summaries.append(run_summary)
+            print(f"Ficheiros JTL encontrados: {len(jtl_files[round_name])}")
+            # (ficheiro, agregado) das execuções com amostras; o ficheiro dá o número da execução.
+            run_pairs = [(jtl_file, aggregates[jtl_file]) for jtl_file in jtl_files[round_name]
+                         if aggregates[jtl_file] is not None and aggregates[jtl_file].samples > 0]
+            run_aggregates = [aggregate for _, aggregate in run_pairs]
+            run_summaries = [aggregate.summary() for aggregate in run_aggregates]
             
             if run_summaries:
                 summary_df = pd.DataFrame(run_summaries)
@@ -237,44 +881,115 @@ def main():
                 # O número correto de sucessos é o total de amostras MENOS o total de falhas de TODAS as fontes.
                 sucesso_corrigido = total_amostras - total_failures
                 
+                # A latência consolidada vem da fusão dos histogramas de todas as execuções,
+                # e não da média das médias/mínimos/máximos de cada execução.
+                merged_histogram = merge_histograms(a.histogram for a in run_aggregates)
                 final_summary_data = {
                     'Total de Amostras': total_amostras,
                     'Sucesso': sucesso_corrigido, # <- Alterado de summary_df['Sucesso'].sum() para o valor corrigido
                     'Falha': total_failures,
-                    'Latência Média (ms)': summary_df['Latência Média (ms)'].mean(),
-                    'Latência Mínima (ms)': summary_df['Latência Mínima (ms)'].mean(),
-                    'Latência Máxima (ms)': summary_df['Latência Máxima (ms)'].mean(),
-                    'Throughput Médio (TPS)': summary_df['Throughput Médio (TPS)'].mean()
                 }
+                final_summary_data.update(latency_summary(merged_histogram))
+                final_summary_data['Throughput Médio (TPS)'] = summary_df['Throughput Médio (TPS)'].mean()
                 # --- MODIFICAÇÃO TERMINA AQUI ---
 
                 print(f"  -> Resumo da rodada '{round_name}': {final_summary_data['Sucesso']:.0f} Sucessos, {jmeter_failures:.0f} Falhas (JMeter), {backend_failures} Falhas (API)")
+
+                window = None
+                if not args.whole_run:
+                    # O throughput e a latência principais passam a ser os da janela estável de cada execução
+                    # (sem o ramp-up do JMeter nem a cauda final); as contagens continuam a ser as da execução completa.
+                    windows = [detect_steady_window(a.tps_series(), a.latency_series()) for a in run_aggregates]
+                    steady_summaries = [a.window_summary(*w) for a, w in zip(run_aggregates, windows)]
+                    for key in WHOLE_RUN_ROWS:
+                        final_summary_data[key + WHOLE_RUN_SUFFIX] = final_summary_data[key]
+                    final_summary_data.update(latency_summary(merge_histograms(
+                        a.window_histogram(*w) for a, w in zip(run_aggregates, windows))))
+                    final_summary_data['Throughput Médio (TPS)'] = np.mean([s['Throughput Médio (TPS)'] for s in steady_summaries])
+                    # Nos gráficos consolidados (execuções alinhadas no início) marca-se a janela mediana.
+                    window = tuple(np.median(windows, axis=0))
+                    final_summary_data['Janela Estável (s)'] = window
+                    for (jtl_file, a), w, steady in zip(run_pairs, windows, steady_summaries):
+                        whole = a.summary()
+                        row = {'rodada': round_name, 'execução': run_number(jtl_file), 'início (s)': w[0], 'fim (s)': w[1],
+                               'duração total (s)': round(a.duration(), 1)}
+                        for key in WHOLE_RUN_ROWS:
+                            row[f'{key} estável'] = round(steady[key], 3)
+                            row[f'{key} completa'] = round(whole[key], 3)
+                        steady_rows.append(row)
+                    print(f"  -> Janela estável da rodada '{round_name}': {window[0]:.0f} - {window[1]:.0f} s; throughput "
+                          f"{final_summary_data['Throughput Médio (TPS)']:.2f} TPS (execução completa: "
+                          f"{final_summary_data['Throughput Médio (TPS)' + WHOLE_RUN_SUFFIX]:.2f} TPS)")
                 
-                plot_summary_table_from_dict(final_summary_data, round_name, results_dir)
+                plot_tasks.append((plot_summary_table_from_dict, (final_summary_data, round_name, results_dir)))
+                report_data['summary'] = final_summary_data
 
-                all_jtl_dfs = [analyze_jtl(f) for f in jtl_files]
-                consolidated_jtl_df = pd.concat([df for df in all_jtl_dfs if df is not None], ignore_index=True)
-                if not consolidated_jtl_df.empty:
-                    plot_latency_over_time(consolidated_jtl_df, round_name, results_dir)
-                    plot_throughput_over_time(consolidated_jtl_df, round_name, results_dir)
-                print(f"Gráficos de performance consolidados para '{round_name}' gerados.")
+                # As séries por segundo já foram calculadas durante a leitura; não é preciso reler os ficheiros.
+                consolidated_latency = combine_series([a.latency_series() for a in run_aggregates],
+                                                      {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max'})
+                consolidated_tps = combine_series([a.tps_series() for a in run_aggregates], {'tps': 'sum'})
+                consolidated_buckets = pd.concat([a.relative_latency_buckets() for a in run_aggregates]).groupby(level=[0, 1]).sum()
+                if not consolidated_latency.empty:
+                    consolidated_percentiles = percentiles_over_time(consolidated_buckets)
+                    plot_tasks.append((plot_latency_series, (consolidated_latency, consolidated_percentiles, round_name, results_dir, window)))
+                    plot_tasks.append((plot_latency_percentiles_over_time, (consolidated_percentiles, round_name, results_dir, window)))
+                    plot_tasks.append((plot_latency_heatmap, (consolidated_buckets, round_name, results_dir)))
+                    plot_tasks.append((plot_throughput_over_time, (consolidated_tps, round_name, results_dir, window)))
+                    report_data.update(latency=consolidated_latency, percentiles=consolidated_percentiles,
+                                       buckets=consolidated_buckets, tps=consolidated_tps, window=window)
+                print(f"Gráficos de performance consolidados para '{round_name}' preparados.")
 
-        if not stats_files:
-            print(f"Aviso: Nenhum ficheiro de estatísticas do Docker encontrado para '{round_name}'.")
+        if not stats_files[round_name]:
+            print(f"Aviso: Nenhum ficheiro de recursos (Docker/cgroup) encontrado para '{round_name}'.")
         else:
-            print(f"Ficheiros de log do Docker encontrados: {len(stats_files)}")
-            all_docker_dfs = [analyze_docker_stats(f) for f in stats_files]
-            consolidated_docker_df = pd.concat([df for df in all_docker_dfs if df is not None], ignore_index=True)
+            print(f"Ficheiros de recursos (Docker/cgroup) encontrados: {len(stats_files[round_name])}")
+            all_docker_dfs = [docker_dfs[f] for f in stats_files[round_name] if docker_dfs[f] is not None]
+            consolidated_docker_df = pd.concat(all_docker_dfs, ignore_index=True) if all_docker_dfs else pd.DataFrame()
             if not consolidated_docker_df.empty:
-                plot_resource_bar_charts(consolidated_docker_df, round_name, 'cpu', '%', results_dir)
-                plot_resource_bar_charts(consolidated_docker_df, round_name, 'mem', 'MB', results_dir)
-                consolidated_docker_df['net_io'] = consolidated_docker_df['net_rx'] + consolidated_docker_df['net_tx']
-                plot_resource_line_chart(consolidated_docker_df, round_name, 'net_io', 'I/O de Rede Consolidado (KB/s)', results_dir)
-                consolidated_docker_df['disk_io'] = consolidated_docker_df['disk_r'] + consolidated_docker_df['disk_w']
-                plot_resource_line_chart(consolidated_docker_df, round_name, 'disk_io', 'I/O de Disco Consolidado (KB/s)', results_dir)
-                print(f"Gráficos de recursos consolidados para '{round_name}' gerados.")
+                # Os contadores do log são cumulativos; os gráficos de linha usam as taxas por segundo.
+                consolidated_docker_df['net_io'] = consolidated_docker_df['net_rx_rate'] + consolidated_docker_df['net_tx_rate']
+                consolidated_docker_df['disk_io'] = consolidated_docker_df['disk_r_rate'] + consolidated_docker_df['disk_w_rate']
+                plot_tasks.append((plot_resource_bar_charts, (consolidated_docker_df, round_name, 'cpu', '%', results_dir)))
+                plot_tasks.append((plot_resource_bar_charts, (consolidated_docker_df, round_name, 'mem', 'MB', results_dir)))
+                plot_tasks.append((plot_resource_line_chart, (consolidated_docker_df, round_name, 'net_io', 'I/O de Rede Consolidado (KB/s)', results_dir)))
+                plot_tasks.append((plot_resource_line_chart, (consolidated_docker_df, round_name, 'disk_io', 'I/O de Disco Consolidado (KB/s)', results_dir)))
+                report_data['docker'] = consolidated_docker_df
+                print(f"Gráficos de recursos consolidados para '{round_name}' preparados.")
+
+        if chain_files[round_name]:
+            # Cada execução é alinhada com o início do seu JTL, tal como as séries de TPS e latência.
+            first_ts_by_run = {run_number(f): aggregates[f].first_ts for f in jtl_files[round_name] if aggregates[f] is not None}
+            aligned = [align_chain_metrics(chain_dfs[f], first_ts_by_run.get(run_number(f)))
+                       for f in chain_files[round_name] if chain_dfs[f] is not None and not chain_dfs[f].empty]
+            if aligned:
+                report_data['chain'] = pd.concat(aligned, ignore_index=True)
+                plot_tasks.append((plot_chain_metrics, (report_data['chain'], round_name, results_dir)))
+                print(f"Gráfico de métricas da cadeia para '{round_name}' preparado.")
+
+    steady_path = os.path.join(results_dir, 'CONSOLIDATED_steady_state.csv')
+    if steady_rows:
+        # Valores por execução, na janela estável e na execução completa, para comparação.
+        pd.DataFrame(steady_rows).to_csv(steady_path, index=False)
+        print(f"\nJanelas estáveis por execução gravadas em {steady_path}")
+    elif os.path.exists(steady_path):
+        # Com --whole-run (ou sem execuções válidas) não há janelas estáveis: um CSV de uma análise anterior
+        # ficaria ao lado de gráficos que já não lhe correspondem.
+        os.remove(steady_path)
+
+    profiler.begin('render')
+    if args.report != 'png':
+        print(f"\n--- A gerar o relatório {args.report.upper()} de todas as rodadas... ---")
+        print(f"Relatório gravado em {write_report(report_rounds, args.report, results_dir)}")
+    else:
+        print(f"\n--- A gerar {len(plot_tasks)} gráficos com {args.jobs} processo(s)... ---")
+        run_tasks(plot_tasks, args.jobs)
+    profiler.end()
 
     print("\nProcesso de geração de gráficos concluído!")
+    if args.profile:
+        profiler.print_report()
+    if args.profile_output:
+        profiler.write_json(args.profile_output)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
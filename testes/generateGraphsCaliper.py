@@ -1,80 +1,167 @@
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
 import os
-import sys
 import glob
 import re
+import argparse
+from datetime import datetime
+from report_pool import map_files, run_tasks
+import results_cache
+from functools import partial
+from result_model import NODE_COLORS, RoundResult
+from report_pages import REPORT_FORMATS, ReportBook, write_table
+from pipeline_profile import StageProfiler
 
-# Dictionary to ensure fixed colors for each node.
-NODE_COLORS = {
-    'node1': '#1f77b4',  # Blue
-    'node2': '#ff7f0e',  # Orange
-    'node3': '#2ca02c',  # Green
-    'node4': '#d62728',  # Red
-    'node5': '#9467bd',  # Purple
-    'node6': '#8c564b',  # Brown
-}
+# Results cache entry identifier; must change whenever the parsed format changes.
+CALIPER_CACHE_KIND = 'caliper_v2'
+
+PERFORMANCE_COLUMNS = ['Name', 'Succ', 'Fail', 'Send Rate (TPS)', 'Max Latency (s)', 'Min Latency (s)', 'Avg Latency (s)', 'Throughput (TPS)']
+RESOURCE_COLUMNS = ['Name', 'CPU%(max)', 'CPU%(avg)', 'Memory(max) [MB]', 'Memory(avg) [MB]', 'Traffic In [B]', 'Traffic Out [B]', 'Disc Write [KB]', 'Disc Read [B]']
+
+# Caliper log line prefix, e.g. "2024.03.12-10:15:01.123 info  [caliper] ..."
+LOG_TIMESTAMP_RE = re.compile(r'^(\d{4}\.\d{2}\.\d{2}-\d{2}:\d{2}:\d{2}\.\d{3})')
+ROUND_STARTED_RE = re.compile(r'Started round (\d+) \((\w+)\)')
+ROUND_FINISHED_RE = re.compile(r'Finished round (\d+) \((\w+)\)')
+NUMBER_RE = re.compile(r'(\d+\.?\d*)')
+
+def _log_timestamp(line):
+    match = LOG_TIMESTAMP_RE.match(line)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), '%Y.%m.%d-%H:%M:%S.%f')
+
+def _number(text):
+    match = NUMBER_RE.search(text)
+    return float(match.group(1)) if match else float('nan')
+
+def iter_caliper_records(lines):
+    """
+    Streams Caliper log lines once with a small state machine and yields typed records:
+      ('round_start', round_name, timestamp), ('round_end', round_name, timestamp),
+      ('performance', round_name, [name, succ, fail, ...]) and ('resource', round_name, [name, cpu_max, ...]).
+    Only the current line and the current table state are kept in memory.
+    """
+    round_name = None
+    table = None          # 'performance' or 'resource' while inside a result table
+    header_seen = False
+
+    for line in lines:
+        started = ROUND_STARTED_RE.search(line)
+        if started:
+            # A new round always closes an unterminated table from a truncated log.
+            table = None
+            round_name = started.group(2)
+            yield ('round_start', round_name, _log_timestamp(line))
+            continue
+
+        if table is not None:
+            stripped = line.strip()
+            if not header_seen:
+                header_seen = stripped.startswith('|') and 'Name' in stripped
+            elif stripped.startswith('+--'):
+                table = None
+            elif '|' in stripped and '------' not in stripped:
+                # Anything before the first '|' (e.g. a log prefix) is not part of the table.
+                parts = [p.strip() for p in stripped[stripped.index('|'):].split('|') if p.strip()]
+                if table == 'performance' and len(parts) == len(PERFORMANCE_COLUMNS):
+                    yield ('performance', round_name, [parts[0]] + [_number(p) for p in parts[1:]])
+                elif table == 'resource' and len(parts) == len(RESOURCE_COLUMNS):
+                    yield ('resource', round_name, [parts[0].replace('/', '')] + [_number(p) for p in parts[1:]])
+            continue
+
+        if round_name is None:
+            continue
+        if '### Test result ###' in line:
+            table, header_seen = 'performance', False
+        elif '### docker resource stats ###' in line:
+            table, header_seen = 'resource', False
+        else:
+            finished = ROUND_FINISHED_RE.search(line)
+            if finished:
+                yield ('round_end', finished.group(2), _log_timestamp(line))
 
 def parse_caliper_log(log_file):
-    """Reads a Caliper log file and extracts the performance and resource tables."""
+    """
+    Reads a Caliper log file and extracts the performance and resource tables.
+    The performance table also carries each round's start/end timestamps ('Round Start', 'Round End'),
+    so Caliper rounds can be correlated with resource stats over time.
+    """
+    performance_data = []
+    resource_data = []
+    round_times = {}
     try:
         with open(log_file, 'r') as f:
-            content = f.read()
+            for kind, round_name, value in iter_caliper_records(f):
+                if kind == 'performance':
+                    performance_data.append([round_name] + value)
+                elif kind == 'resource':
+                    resource_data.append([round_name] + value)
+                elif kind == 'round_start':
+                    round_times[round_name] = [value, None]
+                elif kind == 'round_end':
+                    round_times.setdefault(round_name, [None, None])[1] = value
     except Exception as e:
         print(f"Error reading log file {log_file}: {e}")
         return None, None
 
-    performance_data = []
-    resource_data = []
-    round_sections = re.split(r'Started round \d+ \((\w+)\)', content)
-
-    for i in range(1, len(round_sections), 2):
-        round_name = round_sections[i]
-        round_content = round_sections[i+1]
-        
-        perf_match = re.search(r'### Test result ###\s*.*?Name\s*\| Succ.*?\n(.*?)\n\+--[+\-]*--', round_content, re.S)
-        if perf_match:
-            perf_table_str = perf_match.group(1)
-            perf_lines = [line.strip() for line in perf_table_str.strip().split('\n') if '|' in line and '------' not in line]
-            for line in perf_lines:
-                parts = [p.strip() for p in line.split('|') if p.strip()]
-                if len(parts) == 8: performance_data.append([round_name] + parts)
-
-        res_match = re.search(r'### docker resource stats ###\s*.*?Name\s*\| CPU%\(max\).*?\n(.*?)\n\+--[+\-]*--', round_content, re.S)
-        if res_match:
-            res_table_str = res_match.group(1)
-            res_lines = [line.strip() for line in res_table_str.strip().split('\n') if '|' in line and '------' not in line]
-            for line in res_lines:
-                parts = [p.strip().replace('/', '') for p in line.split('|') if p.strip()]
-                if len(parts) == 9:
-                    parts[7] = f"{parts[7]} KB" if 'KB' not in parts[7] else parts[7]
-                    resource_data.append([round_name] + parts)
-
     if not performance_data:
         print(f"Warning: No performance tables found in file {os.path.basename(log_file)}")
         return None, None
-        
-    perf_df = pd.DataFrame(performance_data, columns=['Round', 'Name', 'Succ', 'Fail', 'Send Rate (TPS)', 'Max Latency (s)', 'Min Latency (s)', 'Avg Latency (s)', 'Throughput (TPS)'])
+
+    perf_df = pd.DataFrame(performance_data, columns=['Round'] + PERFORMANCE_COLUMNS)
+    perf_df['Round Start'] = pd.to_datetime(perf_df['Round'].map(lambda r: round_times.get(r, [None, None])[0]))
+    perf_df['Round End'] = pd.to_datetime(perf_df['Round'].map(lambda r: round_times.get(r, [None, None])[1]))
     res_df = None
     if resource_data:
-        res_df = pd.DataFrame(resource_data, columns=['Round', 'Name', 'CPU%(max)', 'CPU%(avg)', 'Memory(max) [MB]', 'Memory(avg) [MB]', 'Traffic In [B]', 'Traffic Out [B]', 'Disc Write', 'Disc Read [B]'])
-        res_df.rename(columns={'Disc Write': 'Disc Write [KB]'}, inplace=True)
-
-    for col in perf_df.columns[2:]: perf_df[col] = pd.to_numeric(perf_df[col], errors='coerce')
-    if res_df is not None:
-        for col in res_df.columns[2:]:
-             if isinstance(res_df[col].iloc[0], str):
-                res_df[col] = pd.to_numeric(res_df[col].str.extract(r'(\d+\.?\d*)')[0], errors='coerce')
-             else:
-                res_df[col] = pd.to_numeric(res_df[col], errors='coerce')
+        res_df = pd.DataFrame(resource_data, columns=['Round'] + RESOURCE_COLUMNS)
 
     return perf_df, res_df
 
-def plot_summary_table_per_round(df_round, num_repetitions, output_path):
-    """Generates a performance summary table for a single round."""
-    if df_round.empty: return
-    
-    round_name = df_round['Name'].iloc[0]
+def load_caliper_log(log_file, use_cache=True):
+    """Returns parse_caliper_log(log_file), reusing the columnar cache while it is still valid."""
+    if not use_cache:
+        return parse_caliper_log(log_file)
+    return results_cache.cached(log_file, CALIPER_CACHE_KIND, parse_caliper_log,
+                                lambda tables: ({'perf': tables[0], 'res': tables[1]}, {}),
+                                lambda frames, attrs: (frames['perf'], frames['res']))
+
+def load_caliper_results(results_dir, jobs=1, use_cache=True):
+    """Returns one RoundResult per Caliper run and round, built from the cached parsed logs."""
+    log_files = glob.glob(os.path.join(results_dir, "caliper_log_run_*.txt"))
+    results = []
+    for log_file, (perf_df, res_df) in map_files(partial(load_caliper_log, use_cache=use_cache), log_files, jobs).items():
+        if perf_df is None:
+            continue
+        match = re.search(r'_run_(\d+)', os.path.basename(log_file))
+        run = int(match.group(1)) if match else None
+        for _, row in perf_df.iterrows():
+            resources = None
+            if res_df is not None:
+                round_res = res_df[res_df['Round'] == row['Round']]
+                resources = pd.DataFrame({
+                    'node': round_res['Name'].values,
+                    'cpu_avg': round_res['CPU%(avg)'].values, 'cpu_max': round_res['CPU%(max)'].values,
+                    'mem_avg_mb': round_res['Memory(avg) [MB]'].values, 'mem_max_mb': round_res['Memory(max) [MB]'].values,
+                })
+            results.append(RoundResult(
+                tool='caliper',
+                round=row['Name'].lower(),
+                run=run,
+                successes=row['Succ'],
+                failures=row['Fail'],
+                throughput_tps=row['Throughput (TPS)'],
+                latency_mean_s=row['Avg Latency (s)'],
+                latency_min_s=row['Min Latency (s)'],
+                latency_max_s=row['Max Latency (s)'],
+                resources=resources,
+                runs=[run] if run is not None else [],
+            ))
+    return results
+
+def caliper_summary_table(df_round):
+    """Returns the (Metrics, Value) summary table of a single consolidated round, formatted as text."""
     base_tx_counts = {'open': 1000, 'query': 1000, 'transfer': 50}
     successful_tx = df_round['Succ'].iloc[0]
     failed_tx = df_round['Fail'].iloc[0]
@@ -97,7 +184,14 @@ def plot_summary_table_per_round(df_round, num_repetitions, output_path):
             f"{df_round['Throughput (TPS)'].iloc[0]:.2f}"
         ]
     }
-    summary_df = pd.DataFrame(summary_data)
+    return pd.DataFrame(summary_data)
+
+def plot_summary_table_per_round(df_round, num_repetitions, output_path):
+    """Generates a performance summary table for a single round."""
+    if df_round.empty: return
+    
+    round_name = df_round['Name'].iloc[0]
+    summary_df = caliper_summary_table(df_round)
 
     fig, ax = plt.subplots(figsize=(6, 4))
     ax.axis('tight')
@@ -111,34 +205,78 @@ def plot_summary_table_per_round(df_round, num_repetitions, output_path):
     plt.savefig(os.path.join(output_path, f"CONSOLIDATED_caliper_summary_{round_name}.png"), bbox_inches='tight', pad_inches=0.1)
     plt.close()
 
-def plot_resource_bar_chart_per_round(df_round, metric, unit, round_name, output_path):
-    """Generates a resource bar chart for a single round."""
-    if df_round.empty: return
-
+def draw_resource_bar_chart(ax, df_round, metric, unit, round_name):
+    """Draws the per-node bars of one resource metric of a single round."""
     summary = df_round.sort_values(by='Name').set_index('Name')
     colors = [NODE_COLORS.get(node, '#7f7f7f') for node in summary.index]
 
-    plt.figure(figsize=(10, 6))
-    bars = plt.bar(summary.index, summary[metric], color=colors)
+    bars = ax.bar(summary.index, summary[metric], color=colors)
     # MODIFICATION: Title and labels translated to English
     metric_name = metric.replace('(avg)', 'Average').replace('[MB]', '').replace('%', '')
-    plt.title(f'{metric_name} Usage per Node - {round_name.capitalize()}')
-    plt.ylabel(f'Usage ({unit})')
-    plt.xlabel('Node')
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    plt.bar_label(bars, fmt='%.2f')
-    plt.tight_layout()
+    ax.set_title(f'{metric_name} Usage per Node - {round_name.capitalize()}')
+    ax.set_ylabel(f'Usage ({unit})')
+    ax.set_xlabel('Node')
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    ax.bar_label(bars, fmt='%.2f')
+
+def plot_resource_bar_chart_per_round(df_round, metric, unit, round_name, output_path):
+    """Generates a resource bar chart for a single round."""
+    if df_round.empty: return
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    draw_resource_bar_chart(ax, df_round, metric, unit, round_name)
+    fig.tight_layout()
     safe_metric_name = re.sub(r'[^a-zA-Z0-9]', '_', metric)
-    plt.savefig(os.path.join(output_path, f"CONSOLIDATED_caliper_resource_{safe_metric_name}_{round_name}.png"))
-    plt.close()
+    fig.savefig(os.path.join(output_path, f"CONSOLIDATED_caliper_resource_{safe_metric_name}_{round_name}.png"))
+    plt.close(fig)
+
+RESOURCE_PANELS = [('CPU%(avg)', '%'), ('Memory(avg) [MB]', 'MB')]
+
+def write_caliper_report(perf_df, res_df, fmt, output_path):
+    """
+    --report pdf/html: every round in a single REPORT_caliper.pdf/.html, with the resource bars of all rounds
+    on one shared page (one row per round) drawn on a reused figure. The performance summary of all rounds is
+    written as text (CONSOLIDATED_caliper_summary.csv/.txt and an HTML table) instead of table images.
+    Returns the report path.
+    """
+    path = os.path.join(output_path, f'REPORT_caliper.{fmt}')
+    book = ReportBook(path, fmt, f'Caliper Consolidated Report - {output_path}')
+    if perf_df is not None:
+        columns = {name: caliper_summary_table(perf_df[perf_df['Name'] == name]).set_index('Metrics')['Value']
+                   for name in perf_df['Name'].unique()}
+        summary_df = pd.DataFrame(columns).rename_axis('Metrics').reset_index()
+        print(write_table(summary_df, os.path.join(output_path, 'CONSOLIDATED_caliper_summary')))
+        book.table(summary_df, 'Consolidated Summary')
+    if res_df is not None:
+        round_names = list(res_df['Round'].unique())
+        axes = book.page(len(round_names), len(RESOURCE_PANELS), row_height=5)
+        for row, round_name in zip(axes, round_names):
+            round_df = res_df[res_df['Round'] == round_name]
+            for ax, (metric, unit) in zip(row, RESOURCE_PANELS):
+                draw_resource_bar_chart(ax, round_df, metric, unit, round_name)
+        book.save_page('Resource Usage per Round')
+    book.close()
+    return path
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python generate_caliper_graphs.py <results_directory> <number_of_repetitions>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Generates consolidated graphs from Caliper logs.")
+    parser.add_argument('results_dir', help="Directory containing the caliper_log_run_*.txt files")
+    parser.add_argument('num_repetitions', type=int, help="Number of Caliper repetitions")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Number of processes used to parse logs and render graphs (1 = serial)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Ignore the columnar cache (.report_cache) and re-parse every raw log")
+    parser.add_argument('--report', choices=REPORT_FORMATS, default='png',
+                        help="png: one file per graph/table; pdf/html: all rounds in one multi-page report, "
+                             "with the summary as CSV/text instead of images")
+    parser.add_argument('--profile', action='store_true',
+                        help="Print wall time, CPU time and peak RSS per stage (parse, aggregate, render)")
+    parser.add_argument('--profile-output', help="Write the per-stage profile to this JSON file")
+    args = parser.parse_args()
+    profiler = StageProfiler(args.profile or bool(args.profile_output))
 
-    results_dir = sys.argv[1]
-    num_repetitions = int(sys.argv[2])
+    results_dir = args.results_dir
+    num_repetitions = args.num_repetitions
     
     print("Step 1: Starting script and finding log files...")
     log_files = glob.glob(os.path.join(results_dir, "caliper_log_run_*.txt"))
@@ -146,16 +284,20 @@ def main():
         print(f"Warning: No Caliper log files found in {results_dir}")
         return
 
-    print("Step 2: Parsing log files...")
+    print(f"Step 2: Parsing log files with {args.jobs} process(es)...")
+    profiler.begin('parse')
     all_perf_dfs = []
     all_res_dfs = []
 
-    for log_file in log_files:
-        perf_df, res_df = parse_caliper_log(log_file)
+    parsed_logs = map_files(partial(load_caliper_log, use_cache=not args.no_cache), log_files, args.jobs)
+    for log_file, (perf_df, res_df) in parsed_logs.items():
         if perf_df is not None: all_perf_dfs.append(perf_df)
         if res_df is not None: all_res_dfs.append(res_df)
 
     print("Step 3: Consolidating data and generating tables...")
+    profiler.begin('aggregate')
+    plot_tasks = []
+    consolidated_perf_df = consolidated_res_df = None
     if all_perf_dfs:
         full_perf_df = pd.concat(all_perf_dfs, ignore_index=True)
         agg_rules = {
@@ -167,20 +309,33 @@ def main():
 
         for round_name in consolidated_perf_df['Name'].unique():
             round_df = consolidated_perf_df[consolidated_perf_df['Name'] == round_name]
-            plot_summary_table_per_round(round_df, num_repetitions, results_dir)
-        print("Caliper performance tables generated.")
-        print("Step 4: Caliper performance tables generated.")
+            plot_tasks.append((plot_summary_table_per_round, (round_df, num_repetitions, results_dir)))
 
     if all_res_dfs:
         consolidated_res_df = pd.concat(all_res_dfs).groupby(['Round', 'Name']).mean(numeric_only=True).reset_index()
         for round_name in consolidated_res_df['Round'].unique():
             round_df = consolidated_res_df[consolidated_res_df['Round'] == round_name]
-            plot_resource_bar_chart_per_round(round_df, 'CPU%(avg)', '%', round_name, results_dir)
-            plot_resource_bar_chart_per_round(round_df, 'Memory(avg) [MB]', 'MB', round_name, results_dir)
+            for metric, unit in RESOURCE_PANELS:
+                plot_tasks.append((plot_resource_bar_chart_per_round, (round_df, metric, unit, round_name, results_dir)))
+
+    profiler.begin('render')
+    if args.report != 'png':
+        print(f"Report written to {write_caliper_report(consolidated_perf_df, consolidated_res_df, args.report, results_dir)}")
+    else:
+        run_tasks(plot_tasks, args.jobs)
+    profiler.end()
+    if all_perf_dfs:
+        print("Caliper performance tables generated.")
+        print("Step 4: Caliper performance tables generated.")
+    if all_res_dfs:
         print("Caliper resource bar charts generated.")
         print("Step 5: Caliper resource bar charts generated.")
 
     print("\nCaliper graph generation process completed!")
+    if args.profile:
+        profiler.print_report()
+    if args.profile_output:
+        profiler.write_json(args.profile_output)
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
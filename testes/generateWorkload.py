@@ -0,0 +1,141 @@
+import os
+import argparse
+
+import numpy as np
+
+# Mesmo formato de nomes que o gerador anterior em Node.js ('userJmeter' + número em base 26 bijetiva: a..z, aa..).
+ACCOUNT_PREFIX = 'userJmeter'
+# Linhas geradas e escritas de cada vez; limita a memória independentemente do total de linhas.
+CHUNK_SIZE = 1_000_000
+DISTRIBUTIONS = ['uniform', 'zipf', 'hotspot']
+
+def account_names(indices, prefix=ACCOUNT_PREFIX):
+    """Nomes das contas para um array de índices, calculados de forma vetorizada (array numpy de bytes)."""
+    n = np.asarray(indices, dtype=np.int64)
+    if n.size == 0:
+        return np.array([], dtype='S1')
+    digits = []  # dígito menos significativo primeiro; -1 quando o número já não tem mais dígitos
+    active = np.ones(n.shape, dtype=bool)
+    while active.any():
+        digits.append(np.where(active, n % 26, -1))
+        n = np.where(active, n // 26 - 1, -1)
+        active = n >= 0
+    matrix = np.stack(digits[::-1], axis=1)
+    # Alinha os dígitos à esquerda: as posições vazias (-1) passam para o fim e tornam-se bytes nulos,
+    # que o tipo 'S' do numpy ignora.
+    order = np.argsort(matrix < 0, axis=1, kind='stable')
+    matrix = np.take_along_axis(matrix, order, axis=1)
+    chars = np.ascontiguousarray(np.where(matrix >= 0, matrix + ord('a'), 0).astype(np.uint8))
+    return np.char.add(prefix.encode(), chars.view(f'S{chars.shape[1]}').ravel())
+
+def write_lines(f, values):
+    if len(values):
+        f.write(b'\n'.join(values.tolist()) + b'\n')
+
+class AccountSampler:
+    """
+    Escolhe contas segundo uma distribuição:
+    - uniform: todas as contas com a mesma probabilidade;
+    - zipf: a k-ésima conta mais popular tem probabilidade proporcional a 1/k^s;
+    - hotspot: uma fração 'hot_fraction' das contas recebe 'hot_probability' das escolhas.
+    As contas populares são espalhadas aleatoriamente (permutação com a mesma semente), e não as primeiras abertas.
+    """
+    def __init__(self, num_accounts, distribution, rng, zipf_s=1.1, hot_fraction=0.01, hot_probability=0.9):
+        self.num_accounts = num_accounts
+        self.distribution = distribution
+        self.rng = rng
+        self.hot_probability = hot_probability
+        self.permutation = rng.permutation(num_accounts) if distribution != 'uniform' else None
+        if distribution == 'zipf':
+            weights = 1.0 / np.arange(1, num_accounts + 1, dtype=np.float64) ** zipf_s
+            self.cdf = np.cumsum(weights)
+            self.cdf /= self.cdf[-1]
+        elif distribution == 'hotspot':
+            self.num_hot = min(max(int(round(num_accounts * hot_fraction)), 1), num_accounts)
+
+    def sample(self, size):
+        if self.distribution == 'uniform':
+            return self.rng.integers(0, self.num_accounts, size)
+        if self.distribution == 'zipf':
+            ranks = np.searchsorted(self.cdf, self.rng.random(size), side='right')
+            return self.permutation[np.minimum(ranks, self.num_accounts - 1)]
+        hot = self.rng.random(size) < self.hot_probability
+        ranks = np.where(hot, self.rng.integers(0, self.num_hot, size),
+                         self.rng.integers(self.num_hot, max(self.num_accounts, self.num_hot + 1), size))
+        return self.permutation[np.minimum(ranks, self.num_accounts - 1)]
+
+    def sample_pairs(self, size):
+        """Pares (origem, destino) com origem != destino."""
+        source = self.sample(size)
+        target = self.sample(size)
+        same = source == target
+        while same.any():
+            target[same] = self.sample(int(same.sum()))
+            same = source == target
+        return source, target
+
+def write_open_accounts(output_dir, num_accounts, num_threads, chunk_size=CHUNK_SIZE):
+    """
+    open_accounts.csv e all_accounts.txt com todas as contas, e open_accounts_thread_<N>.csv com uma parte
+    contígua das contas por thread do JMeter, tal como o gerador anterior.
+    """
+    per_thread = num_accounts // num_threads
+    open_csv = open(os.path.join(output_dir, 'open_accounts.csv'), 'wb')
+    all_txt = open(os.path.join(output_dir, 'all_accounts.txt'), 'wb')
+    thread_files = [open(os.path.join(output_dir, f'open_accounts_thread_{t}.csv'), 'wb') for t in range(1, num_threads + 1)]
+    try:
+        open_csv.write(b'accountId\n')
+        for f in thread_files:
+            f.write(b'accountId\n')
+        for start in range(0, num_accounts, chunk_size):
+            indices = np.arange(start, min(start + chunk_size, num_accounts))
+            names = account_names(indices)
+            write_lines(open_csv, names)
+            write_lines(all_txt, names)
+            # Cada thread recebe o intervalo [t * per_thread, (t + 1) * per_thread).
+            thread_of = indices // per_thread if per_thread else np.full(len(indices), num_threads)
+            for t in np.unique(thread_of[thread_of < num_threads]):
+                write_lines(thread_files[t], names[thread_of == t])
+    finally:
+        for f in [open_csv, all_txt] + thread_files:
+            f.close()
+
+def write_transfers(output_dir, sampler, num_transfers, chunk_size=CHUNK_SIZE):
+    """transfer_accounts.csv com 'num_transfers' pares origem/destino gerados bloco a bloco."""
+    with open(os.path.join(output_dir, 'transfer_accounts.csv'), 'wb') as f:
+        f.write(b'source_account,target_account\n')
+        for start in range(0, num_transfers, chunk_size):
+            source, target = sampler.sample_pairs(min(chunk_size, num_transfers - start))
+            write_lines(f, np.char.add(np.char.add(account_names(source), b','), account_names(target)))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera os CSV de contas e de pares de transferência usados pelos planos JMX, numa única passagem "
+                    "vetorizada e com memória constante, com distribuição configurável e semente fixa.")
+    parser.add_argument('output_dir', help="Diretório de saída (ex.: jmeter_runs_5_users)")
+    parser.add_argument('--accounts', type=int, required=True, help="Número de contas a abrir")
+    parser.add_argument('--threads', type=int, required=True, help="Número de threads do JMeter (um CSV de contas por thread)")
+    parser.add_argument('--transfers', type=int, required=True, help="Número de pares de transferência")
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='uniform', help="Distribuição das contas nas transferências")
+    parser.add_argument('--zipf-s', type=float, default=1.1, help="Expoente da distribuição Zipf")
+    parser.add_argument('--hot-fraction', type=float, default=0.01, help="Fração de contas 'quentes' na distribuição hotspot")
+    parser.add_argument('--hot-probability', type=float, default=0.9, help="Probabilidade de escolher uma conta 'quente' (hotspot)")
+    parser.add_argument('--seed', type=int, default=42, help="Semente para resultados reprodutíveis")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="Linhas geradas por bloco")
+    args = parser.parse_args()
+
+    if args.accounts < 2:
+        parser.error("são necessárias pelo menos 2 contas para gerar transferências")
+    if args.threads < 1:
+        parser.error("--threads deve ser positivo")
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    rng = np.random.default_rng(args.seed)
+    write_open_accounts(args.output_dir, args.accounts, args.threads, args.chunk_size)
+    print(f"{args.accounts} contas geradas e divididas em {args.threads} arquivos.")
+    sampler = AccountSampler(args.accounts, args.distribution, rng, args.zipf_s, args.hot_fraction, args.hot_probability)
+    write_transfers(args.output_dir, sampler, args.transfers, args.chunk_size)
+    print(f"{args.transfers} pares de transferência gerados (distribuição {args.distribution}, semente {args.seed}).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import os
+import re
+import csv
+import heapq
+
+import numpy as np
+import pandas as pd
+
+# Fragmentos (shards) de uma execução com vários injetores JMeter: results_<rodada>_run_<N>_<host>.jtl.
+# O ficheiro sem sufixo (results_<rodada>_run_<N>.jtl), se existir, é o fragmento do host 'local'.
+SHARD_RE = re.compile(r'_run_(\d+)(?:_(.+))?\.jtl$')
+LOCAL_HOST = 'local'
+# Resolução da série de conclusões usada para estimar o desvio dos relógios e desvio máximo procurado.
+SKEW_BIN_MS = 20
+MAX_SKEW_MS = 5000
+# Janela (em bins) da média móvel retirada às séries antes da correlação: fica só a flutuação rápida.
+DETREND_BINS = 50
+# Correlação mínima para aceitar a estimativa; abaixo disto não há sinal comum e assume-se desvio 0.
+MIN_CORRELATION = 0.1
+CHUNK_SIZE = 500_000
+
+def shard_host(path):
+    match = SHARD_RE.search(os.path.basename(path))
+    return (match.group(2) or LOCAL_HOST) if match else os.path.basename(path)
+
+def group_shards(jtl_files):
+    """Agrupa os ficheiros JTL por execução: número da execução -> lista de fragmentos (um por injetor)."""
+    groups = {}
+    for path in sorted(jtl_files):
+        match = SHARD_RE.search(os.path.basename(path))
+        if match:
+            groups.setdefault(int(match.group(1)), []).append(path)
+    return groups
+
+def read_clock_offsets(path):
+    """Desvios medidos (ex.: com chronyc/ntpdate) num CSV host,offset_ms: o valor a somar aos timestamps do host."""
+    with open(path, newline='') as f:
+        return {row['host']: float(row['offset_ms']) for row in csv.DictReader(f)}
+
+def completion_counts(path, origin_ms, length, bin_ms=SKEW_BIN_MS, chunksize=CHUNK_SIZE):
+    """Número de pedidos concluídos (timeStamp + elapsed) por bin de 'bin_ms', lido em blocos."""
+    counts = np.zeros(length, dtype='float64')
+    for chunk in pd.read_csv(path, usecols=['timeStamp', 'elapsed'], dtype='int64', chunksize=chunksize):
+        bins = ((chunk['timeStamp'] + chunk['elapsed']).to_numpy() - origin_ms) // bin_ms
+        bins = bins[(bins >= 0) & (bins < length)]
+        counts += np.bincount(bins, minlength=length)[:length]
+    return counts
+
+def time_range(path, chunksize=CHUNK_SIZE):
+    first, last = None, None
+    for chunk in pd.read_csv(path, usecols=['timeStamp', 'elapsed'], dtype='int64', chunksize=chunksize):
+        start, end = int(chunk['timeStamp'].min()), int((chunk['timeStamp'] + chunk['elapsed']).max())
+        first = start if first is None else min(first, start)
+        last = end if last is None else max(last, end)
+    return first, last
+
+def detrend(series, window=DETREND_BINS):
+    smooth = np.convolve(series, np.ones(window) / window, mode='same')
+    return series - smooth
+
+def best_lag(reference, series, max_lag):
+    """
+    Desfasamento (em bins, com afinação sub-bin) que maximiza a correlação normalizada entre series[t + lag] e
+    reference[t], e o valor dessa correlação.
+    """
+    lags = np.arange(-max_lag, max_lag + 1)
+    correlations = np.zeros(len(lags))
+    n = len(reference)
+    for i, lag in enumerate(lags):
+        a = reference[max(0, -lag):n - max(0, lag)]
+        b = series[max(0, lag):n - max(0, -lag)]
+        denominator = np.sqrt((a * a).sum() * (b * b).sum())
+        correlations[i] = (a * b).sum() / denominator if denominator > 0 else 0
+    peak = int(np.argmax(correlations))
+    lag = float(lags[peak])
+    if 0 < peak < len(lags) - 1:
+        # Interpolação parabólica em torno do pico.
+        left, center, right = correlations[peak - 1:peak + 2]
+        curvature = left - 2 * center + right
+        if curvature < 0:
+            lag += 0.5 * (left - right) / curvature
+    return lag, float(correlations[peak])
+
+def estimate_clock_offsets(paths, max_skew_ms=MAX_SKEW_MS, bin_ms=SKEW_BIN_MS, min_correlation=MIN_CORRELATION):
+    """
+    Estima, para cada fragmento, o desvio (ms) a somar aos seus timestamps para os pôr no relógio do fragmento
+    de referência (o maior). Todos os injetores atacam o mesmo back-end, por isso as flutuações rápidas das
+    conclusões (pausas de produção de blocos, GC, filas da API) são comuns a todos: o desvio é o desfasamento
+    que maximiza a correlação cruzada dessas flutuações. Retorna {caminho: (desvio_ms, correlação)}; sem sinal
+    comum suficiente (correlação < min_correlation) o desvio fica 0.
+    """
+    ranges = {path: time_range(path) for path in paths}
+    ranges = {path: r for path, r in ranges.items() if r[0] is not None}
+    if not ranges:
+        return {}
+    origin = min(r[0] for r in ranges.values()) - max_skew_ms
+    length = int((max(r[1] for r in ranges.values()) + max_skew_ms - origin) // bin_ms) + 1
+    series = {path: detrend(completion_counts(path, origin, length, bin_ms)) for path in ranges}
+    reference = max(ranges, key=os.path.getsize)
+    offsets = {}
+    for path, values in series.items():
+        if path == reference:
+            offsets[path] = (0.0, 1.0)
+            continue
+        lag, correlation = best_lag(series[reference], values, int(max_skew_ms // bin_ms))
+        offsets[path] = (-lag * bin_ms if correlation >= min_correlation else 0.0, correlation)
+    return offsets
+
+class SortedShard:
+    """
+    Lê um fragmento em blocos, corrige os timestamps com o desvio do relógio e entrega-os por ordem de timeStamp.
+    O JMeter grava cada amostra quando ela termina, por isso o ficheiro só está quase ordenado pelo início: uma
+    linha ainda por ler terminou depois das já lidas e, logo, começou no máximo 'maior elapsed visto' antes delas.
+    As linhas até essa marca são entregues; as restantes ficam retidas até ao bloco seguinte.
+    """
+    def __init__(self, path, offset_ms, columns=None, chunksize=CHUNK_SIZE):
+        self.reader = pd.read_csv(path, usecols=columns, dtype={'timeStamp': 'int64', 'elapsed': 'int64'},
+                                  keep_default_na=False, chunksize=chunksize)
+        self.offset = int(round(offset_ms))
+        self.pending = None
+        self.max_elapsed = 0
+        self.emitted_until = None
+        self.late_rows = 0
+
+    def next_block(self):
+        """Próximo bloco ordenado (DataFrame) ou None no fim do ficheiro."""
+        for chunk in self.reader:
+            if chunk.empty:
+                continue
+            chunk['timeStamp'] += self.offset
+            self.max_elapsed = max(self.max_elapsed, int(chunk['elapsed'].max()))
+            completion = chunk['timeStamp'] + chunk['elapsed']
+            watermark = int(completion.iloc[-min(len(chunk), 1000):].min()) - self.max_elapsed
+            pending = chunk if self.pending is None else pd.concat([self.pending, chunk], ignore_index=True)
+            pending = pending.sort_values('timeStamp', kind='stable', ignore_index=True)
+            ready = int(pending['timeStamp'].searchsorted(watermark, side='left'))
+            self.pending = pending.iloc[ready:]
+            if ready:
+                return self._emit(pending.iloc[:ready])
+        if self.pending is not None and not self.pending.empty:
+            block, self.pending = self.pending, None
+            return self._emit(block)
+        return None
+
+    def _emit(self, block):
+        if self.emitted_until is not None:
+            self.late_rows += int((block['timeStamp'] < self.emitted_until).sum())
+        self.emitted_until = int(block['timeStamp'].iloc[-1])
+        return block.reset_index(drop=True)
+
+def merge_shards(paths, offsets, columns=None, chunksize=CHUNK_SIZE):
+    """
+    Junta os fragmentos numa única sequência de blocos ordenada por timeStamp (já corrigido), sem carregar os
+    ficheiros inteiros: k-way merge com um heap indexado pelo último timeStamp do bloco atual de cada fragmento.
+    O fragmento com o menor último timeStamp define o limite; todas as linhas até esse limite, de todos os
+    fragmentos, já não podem ser precedidas por nenhuma outra e são entregues juntas, ordenadas.
+    Retorna um gerador de DataFrames e a lista de leitores (para consultar late_rows no fim).
+    """
+    shards = [SortedShard(path, offsets.get(path, 0.0), columns, chunksize) for path in paths]
+
+    def blocks():
+        buffers, heap = {}, []
+        for i, shard in enumerate(shards):
+            block = shard.next_block()
+            if block is not None:
+                buffers[i] = block
+                heapq.heappush(heap, (int(block['timeStamp'].iloc[-1]), i))
+        while heap:
+            bound, i = heapq.heappop(heap)
+            pieces = []
+            for j, buffer in buffers.items():
+                cut = len(buffer) if j == i else int(buffer['timeStamp'].searchsorted(bound, side='right'))
+                if cut:
+                    pieces.append(buffer.iloc[:cut])
+                    buffers[j] = buffer.iloc[cut:]
+            if pieces:
+                merged = pd.concat(pieces, ignore_index=True) if len(pieces) > 1 else pieces[0]
+                yield merged.sort_values('timeStamp', kind='stable', ignore_index=True)
+            block = shards[i].next_block()
+            if block is None:
+                del buffers[i]
+            else:
+                buffers[i] = pd.concat([buffers[i], block], ignore_index=True) if len(buffers[i]) else block
+                heapq.heappush(heap, (int(buffers[i]['timeStamp'].iloc[-1]), i))
+
+    return blocks(), shards
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+# Percentis reportados nas tabelas e gráficos de latência.
+PERCENTILES = [50, 90, 95, 99, 99.9]
+
+# Maior latência representável (1 hora, em ms) e erro relativo máximo de cada bucket (1%).
+MAX_LATENCY_MS = 3_600_000
+PRECISION = 0.01
+
+def bucket_count(max_value=MAX_LATENCY_MS, precision=PRECISION):
+    """Número de buckets logarítmicos necessários para cobrir [0, max_value] com o erro relativo dado."""
+    return int(np.ceil(np.log1p(max_value) / np.log1p(precision))) + 1
+
+def bucket_index(values, max_value=MAX_LATENCY_MS, precision=PRECISION):
+    """Converte latências (ms) nos índices dos buckets logarítmicos: o bucket k cobre [(1+p)^k - 1, (1+p)^(k+1) - 1)."""
+    values = np.clip(np.asarray(values, dtype='float64'), 0, max_value)
+    return (np.log1p(values) / np.log1p(precision)).astype('int64')
+
+def bucket_value(indexes, precision=PRECISION):
+    """Valor representativo (ponto médio) de cada bucket, em ms."""
+    indexes = np.asarray(indexes, dtype='float64')
+    lower = np.expm1(indexes * np.log1p(precision))
+    upper = np.expm1((indexes + 1) * np.log1p(precision))
+    return (lower + upper) / 2
+
+class LatencyHistogram:
+    """
+    Histograma de latências com buckets logarítmicos (estilo HDR): memória fixa e fundível entre ficheiros.
+    Os percentis são aproximados, com erro relativo de no máximo PRECISION (1%), e a fusão permite
+    calculá-los sobre várias execuções sem concatenar as amostras.
+    """
+    def __init__(self, max_value=MAX_LATENCY_MS, precision=PRECISION):
+        self.max_value = max_value
+        self.precision = precision
+        self.counts = np.zeros(bucket_count(max_value, precision), dtype='int64')
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = None
+
+    def record(self, values):
+        """Regista um array de latências (ms)."""
+        values = np.asarray(values)
+        if values.size == 0:
+            return
+        indexes = bucket_index(values, self.max_value, self.precision)
+        self.counts += np.bincount(indexes, minlength=len(self.counts))[:len(self.counts)]
+        self.total += int(values.size)
+        self.sum += int(values.sum(dtype='int64'))
+        vmin, vmax = int(values.min()), int(values.max())
+        self.min = vmin if self.min is None else min(self.min, vmin)
+        self.max = vmax if self.max is None else max(self.max, vmax)
+
+    def merge(self, other):
+        """Acumula outro histograma (com a mesma configuração) neste e retorna-o."""
+        if len(other.counts) != len(self.counts) or other.precision != self.precision:
+            raise ValueError("Histogramas com configurações diferentes não podem ser combinados.")
+        self.counts += other.counts
+        self.total += other.total
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0
+
+    def percentile(self, q):
+        """Latência (ms) do percentil q (0-100)."""
+        if self.total == 0:
+            return 0
+        rank = max(1, int(np.ceil(q / 100 * self.total)))
+        index = int(np.searchsorted(np.cumsum(self.counts), rank))
+        value = float(bucket_value(index, self.precision))
+        # O ponto médio do bucket nunca pode sair do intervalo realmente observado.
+        return min(max(value, self.min), self.max)
+
+    def percentiles(self, quantiles=PERCENTILES):
+        return {q: self.percentile(q) for q in quantiles}
+
+def merge_histograms(histograms):
+    """Funde uma lista de histogramas num novo LatencyHistogram."""
+    merged = LatencyHistogram()
+    for histogram in histograms:
+        merged.merge(histogram)
+    return merged
+
+def percentiles_over_time(bucket_counts, quantiles=PERCENTILES, precision=PRECISION):
+    """
+    Calcula os percentis por segundo a partir de contagens esparsas indexadas por (second, bucket).
+    Retorna um DataFrame com a coluna 'second' e uma coluna 'p<q>' por percentil, em ms.
+    """
+    if bucket_counts.empty:
+        return pd.DataFrame(columns=['second'] + [percentile_label(q) for q in quantiles])
+    counts = bucket_counts.sort_index()
+    seconds = counts.index.get_level_values(0)
+    buckets = counts.index.get_level_values(1)
+    cumulative = counts.groupby(level=0).cumsum().values
+    totals = counts.groupby(level=0).transform('sum').values
+
+    result = pd.DataFrame({'second': np.unique(seconds)})
+    for q in quantiles:
+        rank = np.maximum(1, np.ceil(q / 100 * totals))
+        # Primeiro bucket de cada segundo cuja contagem acumulada atinge o rank do percentil.
+        hit = pd.DataFrame({'second': seconds, 'bucket': buckets, 'reached': cumulative >= rank})
+        first = hit[hit['reached']].groupby('second')['bucket'].first()
+        result[percentile_label(q)] = bucket_value(first.reindex(result['second']).values, precision)
+    return result
+
+def percentile_label(q):
+    """Nome da coluna/linha de um percentil, p.ex. 99.9 -> 'p99.9'."""
+    return f"p{q:g}"
@@ -0,0 +1,211 @@
+import os
+import io
+import re
+import glob
+import json
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from latency_histogram import LatencyHistogram, PERCENTILES, percentile_label
+
+# Máximo de bytes lidos de um ficheiro por atualização; o resto fica para a próxima.
+MAX_READ_BYTES = 64 * 1024 * 1024
+
+class FileTail:
+    """
+    Lê apenas as linhas completas acrescentadas a um ficheiro desde a última leitura. Com from_end, começa no fim
+    atual do ficheiro; como o JMeter escreve em blocos, esse ponto cai muitas vezes a meio de uma linha, cujo resto
+    é descartado (partial = None) até à primeira quebra de linha.
+    """
+    def __init__(self, path, from_end=False):
+        self.path = path
+        self.offset = os.path.getsize(path) if from_end else 0
+        self.partial = b''
+        if self.offset:
+            with open(path, 'rb') as f:
+                f.seek(self.offset - 1)
+                if f.read(1) != b'\n':
+                    self.partial = None
+
+    def read_lines(self):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self.offset:
+            # O ficheiro foi truncado ou recriado: recomeça do início.
+            self.offset, self.partial = 0, b''
+        if size == self.offset:
+            return []
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(MAX_READ_BYTES)
+        self.offset += len(data)
+        if self.partial is None:
+            newline = data.find(b'\n')
+            if newline < 0:
+                return []
+            data, self.partial = data[newline + 1:], b''
+        data = self.partial + data
+        lines = data.split(b'\n')
+        self.partial = lines.pop()
+        return [line.decode('utf-8', errors='replace') for line in lines if line]
+
+def read_header(path):
+    """Primeira linha de um JTL: (nomes das colunas, tamanho em bytes), ou (None, 0) se ainda não foi escrita."""
+    with open(path, 'rb') as f:
+        line = f.readline()
+    if not line.endswith(b'\n'):
+        return None, 0
+    return line.decode('utf-8').strip().split(','), len(line)
+
+class RollingJtl:
+    """Métricas de uma janela deslizante de segundos de um JTL em crescimento: TPS, erros e percentis."""
+    def __init__(self, path, window, from_end):
+        self.path = path
+        self.window = window
+        self.header = None
+        self.tail = FileTail(path, from_end=from_end)
+        self._read_header()
+        self.seconds = {}  # segundo (epoch) -> [sucessos, falhas, LatencyHistogram]
+        self.total = 0
+        self.last_update = time.monotonic()
+
+    def _read_header(self):
+        self.header, header_size = read_header(self.path)
+        if self.header is not None and self.tail.offset == 0:
+            self.tail.offset = header_size  # os dados começam depois do cabeçalho
+
+    def poll(self):
+        if self.header is None:
+            self._read_header()
+            if self.header is None:
+                return
+        lines = self.tail.read_lines()
+        if not lines:
+            return
+        chunk = pd.read_csv(io.StringIO('\n'.join(lines)), header=None, names=self.header,
+                            usecols=['timeStamp', 'elapsed', 'success'], on_bad_lines='skip')
+        # Uma linha malformada (ex.: escrita a meio) não pode interromper o modo --follow: é descartada.
+        for column in ('timeStamp', 'elapsed'):
+            chunk[column] = pd.to_numeric(chunk[column], errors='coerce')
+        chunk = chunk.dropna(subset=['timeStamp', 'elapsed']).astype({'timeStamp': 'int64', 'elapsed': 'int64'})
+        if chunk.empty:
+            return
+        chunk['success'] = chunk['success'].astype(str).str.lower() == 'true'
+        for second, group in chunk.groupby(chunk['timeStamp'] // 1000):
+            entry = self.seconds.setdefault(int(second), [0, 0, LatencyHistogram()])
+            successes = int(group['success'].sum())
+            entry[0] += successes
+            entry[1] += len(group) - successes
+            entry[2].record(group['elapsed'].values)
+        self.total += len(chunk)
+        self.last_update = time.monotonic()
+        # Mantém apenas a janela mais recente: a memória não depende do tamanho do ficheiro.
+        newest = max(self.seconds)
+        for second in [s for s in self.seconds if s <= newest - self.window]:
+            del self.seconds[second]
+
+    def snapshot(self):
+        if not self.seconds:
+            return None
+        span = max(self.seconds) - min(self.seconds) + 1
+        successes = sum(entry[0] for entry in self.seconds.values())
+        failures = sum(entry[1] for entry in self.seconds.values())
+        histogram = LatencyHistogram()
+        for entry in self.seconds.values():
+            histogram.merge(entry[2])
+        snapshot = {
+            'ficheiro': os.path.basename(self.path),
+            'amostras_totais': self.total,
+            'tps_janela': successes / span,
+            'taxa_erro_janela': failures / (successes + failures) if successes + failures else 0,
+        }
+        for q, value in histogram.percentiles(PERCENTILES).items():
+            snapshot[f'latencia_{percentile_label(q)}_ms'] = value
+        return snapshot
+
+class RollingDockerStats:
+    """CPU e memória recentes de cada container a partir de um log de estatísticas do Docker em crescimento."""
+    def __init__(self, path, pattern, samples, from_end):
+        self.path = path
+        self.pattern = re.compile(pattern)
+        self.tail = FileTail(path, from_end=from_end)
+        self.cpu = {}
+        self.mem = {}
+        self.samples = samples
+        self.last_update = time.monotonic()
+
+    def poll(self):
+        lines = self.tail.read_lines()
+        for line in lines:
+            match = self.pattern.match(line)
+            if not match:
+                continue
+            container = match.group(1).strip()
+            self.cpu.setdefault(container, deque(maxlen=self.samples)).append(float(match.group(2)))
+            self.mem[container] = float(match.group(3))
+        if lines:
+            self.last_update = time.monotonic()
+
+    def snapshot(self):
+        return {container: {'cpu_medio': float(np.mean(values)), 'cpu_atual': values[-1], 'mem_mib': self.mem[container]}
+                for container, values in sorted(self.cpu.items())}
+
+def format_summary(jtl_snapshots, docker_snapshots):
+    lines = [time.strftime('--- Resumo em tempo real (%H:%M:%S) ---')]
+    for snap in jtl_snapshots:
+        percentiles = ' '.join(f"{percentile_label(q)}={snap[f'latencia_{percentile_label(q)}_ms'] / 1000:.3f}s" for q in PERCENTILES)
+        lines.append(f"{snap['ficheiro']}: {snap['tps_janela']:.1f} TPS, erros {snap['taxa_erro_janela']:.1%}, {percentiles}")
+    for name, containers in docker_snapshots.items():
+        nodes = ', '.join(f"{c} {v['cpu_medio']:.1f}%" for c, v in containers.items())
+        lines.append(f"{name}: CPU {nodes}")
+    if len(lines) == 1:
+        lines.append("A aguardar dados...")
+    return '\n'.join(lines)
+
+def follow(results_dir, stats_dir, docker_pattern, interval=5, window=30):
+    """
+    Acompanha os JTL e logs do Docker que estão a ser escritos e atualiza as métricas de forma incremental,
+    lendo apenas o que foi acrescentado. A cada 'interval' segundos imprime um resumo e grava-o em
+    live_summary.json/live_summary.txt no diretório de resultados. Termina com Ctrl+C.
+    """
+    jtls = {}
+    stats = {}
+    started = True
+    print(f"--- Modo ao vivo: a acompanhar {results_dir} (atualização a cada {interval}s, janela de {window}s) ---")
+    try:
+        while True:
+            for path in glob.glob(os.path.join(results_dir, "results_*_run_*.jtl")):
+                if path not in jtls:
+                    # Ficheiros já existentes no arranque são seguidos a partir do fim.
+                    jtls[path] = RollingJtl(path, window, from_end=started)
+            for path in glob.glob(os.path.join(stats_dir, "docker_stats_*_run_*.log")):
+                if path not in stats:
+                    stats[path] = RollingDockerStats(path, docker_pattern, window, from_end=started)
+            started = False
+
+            for source in list(jtls.values()) + list(stats.values()):
+                source.poll()
+
+            # Só são mostrados ficheiros que receberam dados recentemente; os restantes libertam a janela.
+            active_after = time.monotonic() - 2 * window
+            for source in jtls.values():
+                if source.last_update < active_after:
+                    source.seconds.clear()
+            jtl_snapshots = [s for s in (j.snapshot() for j in jtls.values() if j.last_update >= active_after) if s]
+            docker_snapshots = {os.path.basename(p): s.snapshot() for p, s in stats.items()
+                                if s.last_update >= active_after and s.cpu}
+
+            text = format_summary(jtl_snapshots, docker_snapshots)
+            print(text)
+            with open(os.path.join(results_dir, 'live_summary.txt'), 'w') as f:
+                f.write(text + '\n')
+            with open(os.path.join(results_dir, 'live_summary.json'), 'w') as f:
+                json.dump({'jtl': jtl_snapshots, 'docker': docker_snapshots}, f, indent=2)
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nModo ao vivo terminado.")
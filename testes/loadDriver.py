@@ -0,0 +1,186 @@
+import os
+import sys
+import csv
+import json
+import time
+import asyncio
+import argparse
+from urllib.parse import quote
+
+import numpy as np
+
+from async_http import HttpPool
+
+try:
+    import uvloop  # opcional: reduz o custo por pedido do ciclo de eventos
+except ImportError:
+    uvloop = None
+
+# Pedido de cada rodada: (rótulo no JTL, método, função que constrói (caminho, corpo) a partir de uma linha do CSV).
+ROUNDS = {
+    'open': ('HTTP Request - Open Async', 'POST',
+             lambda row, amount: ('/open-async', {'accountId': row['accountId'], 'amount': amount})),
+    'query': ('HTTP Request - Query', 'GET',
+              lambda row, amount: (f"/query/{quote(row['accountId'])}", None)),
+    'transfer': ('HTTP Request - Transfer Async', 'POST',
+                 lambda row, amount: ('/transfer-async', {'from': row['source_account'], 'to': row['target_account'],
+                                                          'amount': amount})),
+}
+DEFAULT_AMOUNTS = {'open': 10000, 'query': 0, 'transfer': 100}
+
+# Colunas do JTL gerado. timeStamp/elapsed seguem o JMeter (ms) mas são medidos a partir do instante
+# previsto pelo escalonamento (evita a omissão coordenada); actualStart e serviceTime guardam o instante
+# real de envio e o tempo de serviço sem a espera por uma ligação livre.
+JTL_HEADER = ['timeStamp', 'elapsed', 'label', 'responseCode', 'responseMessage', 'threadName', 'success', 'bytes',
+              'actualStart', 'serviceTime']
+# Número de linhas acumuladas antes de escrever no ficheiro.
+WRITE_BATCH = 5000
+
+def arrival_offsets(rate, arrival, rng, block=10000):
+    """Gera indefinidamente os instantes (s, relativos ao início) das chegadas, fixas ou de Poisson."""
+    start = 0.0
+    while True:
+        if arrival == 'poisson':
+            gaps = rng.exponential(1.0 / rate, block)
+        else:
+            gaps = np.full(block, 1.0 / rate)
+        offsets = start + np.cumsum(gaps)
+        yield from offsets.tolist()
+        start = offsets[-1]
+
+def read_rows(csv_file):
+    with open(csv_file, newline='') as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        raise ValueError(f"O ficheiro {csv_file} não tem linhas de dados")
+    return rows
+
+class JtlWriter:
+    """Escreve as amostras em lotes num ficheiro CSV com o formato de JTL lido pelo generateGraphs.py."""
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(JTL_HEADER)
+        self.rows = []
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= WRITE_BATCH:
+            self.flush()
+
+    def flush(self):
+        self.writer.writerows(self.rows)
+        self.rows = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+class LoadDriver:
+    """
+    Gerador de carga em malha aberta: os pedidos são enviados nos instantes do escalonamento,
+    independentemente de os anteriores já terem terminado. Se todas as ligações estiverem ocupadas,
+    o pedido espera por uma livre e essa espera conta para a latência registada.
+    """
+    def __init__(self, pool, round_name, rows, amount, writer, timeout):
+        self.pool = pool
+        self.label, self.method, self.build = ROUNDS[round_name]
+        self.rows = rows
+        self.amount = amount
+        self.writer = writer
+        self.timeout = timeout
+        self.sent = 0
+        self.failures = 0
+        self.max_lag = 0.0
+
+    async def send(self, index, intended_wall):
+        path, payload = self.build(self.rows[index % len(self.rows)], self.amount)
+        body = json.dumps(payload).encode() if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else None
+        actual_wall = time.time()
+        actual = time.perf_counter()
+        try:
+            status, _, data = await self.pool.request(self.method, path, body, headers, timeout=self.timeout)
+            code, message, size = str(status), 'OK' if status < 400 else 'Error', len(data)
+            success = 200 <= status < 300
+        except Exception as e:
+            code, message, size, success = f"Non HTTP response code: {type(e).__name__}", str(e) or type(e).__name__, 0, False
+        end = time.perf_counter()
+        end_wall = actual_wall + (end - actual)
+        if not success:
+            self.failures += 1
+        self.writer.add([int(intended_wall * 1000), int(round((end_wall - intended_wall) * 1000)), self.label, code,
+                         message, 'loadDriver', 'true' if success else 'false', size,
+                         int(actual_wall * 1000), int(round((end - actual) * 1000))])
+
+    async def run(self, rate, arrival, duration, max_requests, seed):
+        rng = np.random.default_rng(seed)
+        pending = set()
+        start_wall = time.time()
+        start = time.perf_counter()
+        for index, offset in enumerate(arrival_offsets(rate, arrival, rng)):
+            if (max_requests and index >= max_requests) or (duration and offset >= duration):
+                break
+            delay = offset - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Atraso do próprio gerador em relação ao escalonamento; se crescer, o gerador é o gargalo.
+                self.max_lag = max(self.max_lag, -delay)
+                if index % 256 == 0:
+                    await asyncio.sleep(0)  # deixa as respostas serem processadas mesmo quando atrasado
+            task = asyncio.ensure_future(self.send(index, start_wall + offset))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+            self.sent += 1
+        if pending:
+            await asyncio.wait(pending)
+        return time.perf_counter() - start
+
+async def run_driver(args):
+    rows = read_rows(args.csv_file)
+    writer = JtlWriter(args.output)
+    amount = args.amount if args.amount is not None else DEFAULT_AMOUNTS[args.round]
+    try:
+        async with HttpPool(args.api_url, size=args.connections, timeout=args.timeout) as pool:
+            driver = LoadDriver(pool, args.round, rows, amount, writer, args.timeout)
+            elapsed = await driver.run(args.rate, args.arrival, args.duration, args.requests, args.seed)
+    finally:
+        writer.close()
+    print(f"Pedidos enviados: {driver.sent} em {elapsed:.1f}s ({driver.sent / elapsed:.1f} req/s; alvo {args.rate:g} req/s). "
+          f"Falhas: {driver.failures}. Atraso máximo do gerador: {driver.max_lag * 1000:.1f} ms.")
+    if driver.max_lag > 0.1:
+        print("Aviso: o gerador atrasou-se mais de 100 ms face ao escalonamento; a taxa pedida pode estar acima "
+              "da capacidade deste processo.", file=sys.stderr)
+    print(f"Resultados gravados em: {args.output}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gerador de carga em malha aberta (chegadas fixas ou de Poisson) para a API, com ligações "
+                    "keep-alive reutilizadas. Escreve um JTL compatível com o generateGraphs.py.")
+    parser.add_argument('api_url', help="URL base da API, ex.: http://localhost:3000")
+    parser.add_argument('round', choices=sorted(ROUNDS), help="Rodada a executar")
+    parser.add_argument('csv_file', help="CSV de dados (open_accounts.csv para open/query, transfer_accounts.csv para transfer)")
+    parser.add_argument('--rate', type=float, required=True, help="Taxa de chegada pretendida (pedidos/s)")
+    parser.add_argument('--arrival', choices=['fixed', 'poisson'], default='poisson', help="Distribuição dos intervalos entre chegadas")
+    parser.add_argument('--duration', type=float, help="Duração do escalonamento (s)")
+    parser.add_argument('--requests', type=int, help="Número total de pedidos (termina no que ocorrer primeiro com --duration)")
+    parser.add_argument('--connections', type=int, default=64, help="Número máximo de ligações keep-alive (pedidos em curso)")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Timeout por pedido (s)")
+    parser.add_argument('--amount', type=int, help="Valor enviado em open/transfer (por omissão, o mesmo dos planos JMX)")
+    parser.add_argument('--seed', type=int, default=0, help="Semente das chegadas de Poisson")
+    parser.add_argument('--output', required=True, help="Ficheiro JTL de saída")
+    args = parser.parse_args()
+
+    if args.rate <= 0:
+        parser.error("--rate deve ser positivo")
+    if not args.duration and not args.requests:
+        parser.error("indique --duration e/ou --requests")
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+    if uvloop is not None:
+        uvloop.install()
+    asyncio.run(run_driver(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,705 @@
+import os
+import sys
+import json
+import time
+import random
+import signal
+import asyncio
+import hashlib
+import argparse
+from collections import Counter
+
+try:
+    import uvloop  # opcional: reduz o custo por pedido do ciclo de eventos
+except ImportError:
+    uvloop = None
+
+try:
+    from Crypto.Hash import keccak as _keccak  # opcional (pycryptodome): Keccak-256 em C
+except ImportError:
+    _keccak = None
+
+# Rede Besu simulada para medir a API e os scripts de análise sem a rede de seis nós do docker-compose.yaml:
+# um processo asyncio serve o JSON-RPC de vários "nós" (um por porta, como node1..node6 em 8545..8550), todos
+# sobre a mesma cadeia em memória. Os blocos são produzidos a intervalos fixos com as transações pendentes por
+# ordem de nonce. Cada método tem uma latência sorteada de uma distribuição configurável, que pode ser
+# multiplicada por nó para simular nós lentos, e podem ser injetados erros de nonce.
+#
+# O remetente das transações não é recuperado da assinatura (exigiria secp256k1): como na API, que assina tudo
+# com DEPLOYER_PRIVATE_KEY, há uma única conta e uma única sequência de nonces. O hash da transação é o real
+# (Keccak-256 da transação assinada), porque o ethers verifica-o na resposta ao eth_sendRawTransaction.
+#
+# Dependência: pycryptodome (pip install pycryptodome) para o Keccak-256. Sem ela, usa-se uma implementação em
+# Python puro de ~1 ms por hash, no mesmo ciclo de eventos de todos os nós, o que limita a rede inteira a algumas
+# centenas de eth_sendRawTransaction/s; o limite estimado é mostrado no arranque.
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_GENESIS = os.path.join(SCRIPT_DIR, '..', 'genesis_QBFT.json')
+BASE_PORT = 8545
+BASE_P2P_PORT = 30303
+ZERO_ADDRESS = '0x' + '00' * 20
+ZERO_HASH = '0x' + '00' * 32
+EMPTY_BLOOM = '0x' + '00' * 256
+EMPTY_UNCLES_HASH = '0x1dcc4de8dec75d7aab85b567b6ccd41ad312451b948a7413f0a142fd40d49347'
+# Tamanho máximo do pool de transações, como --tx-pool-max-size no docker-compose.yaml.
+DEFAULT_POOL_SIZE = 4096
+# Nonces acima do próximo esperado que o pool ainda aceita (ficam à espera das anteriores).
+MAX_FUTURE_NONCES = 1000
+DEFAULT_TX_GAS = 60000
+
+# Erros JSON-RPC com os códigos e mensagens do Besu.
+PARSE_ERROR = (-32700, 'Parse error')
+INVALID_REQUEST = (-32600, 'Invalid Request')
+METHOD_NOT_FOUND = (-32601, 'Method not found')
+INVALID_PARAMS = (-32602, 'Invalid params')
+NONCE_TOO_LOW = (-32001, 'Nonce too low')
+NONCE_TOO_FAR = (-32001, 'Transaction nonce is too distant from current sender nonce')
+KNOWN_TRANSACTION = (-32000, 'Known transaction')
+REPLACEMENT_UNDERPRICED = (-32000, 'Replacement transaction underpriced')
+POOL_FULL = (-32000, 'Transaction pool is full')
+
+class RpcError(Exception):
+    def __init__(self, error):
+        super().__init__(error[1])
+        self.code, self.message = error
+
+# --- Keccak-256 ---------------------------------------------------------------------------------------------
+
+def _round_constants():
+    def bit(t):
+        r = 1
+        for _ in range(t % 255):
+            r <<= 1
+            if r & 0x100:
+                r ^= 0x171
+        return r & 1
+    return [sum(bit(j + 7 * i) << (2 ** j - 1) for j in range(7)) for i in range(24)]
+
+def _rotation_offsets():
+    offsets = [0] * 25
+    x, y = 1, 0
+    for t in range(24):
+        offsets[x + 5 * y] = ((t + 1) * (t + 2) // 2) % 64
+        x, y = y, (2 * x + 3 * y) % 5
+    return offsets
+
+_RC = _round_constants()
+_ROT = _rotation_offsets()
+# Posição de destino de cada faixa no passo pi: (x, y) -> (y, 2x + 3y).
+_PI = [y + 5 * ((2 * x + 3 * y) % 5) for y in range(5) for x in range(5)]
+_MASK = (1 << 64) - 1
+
+def _keccak_f(a):
+    for rc in _RC:
+        c = [a[x] ^ a[x + 5] ^ a[x + 10] ^ a[x + 15] ^ a[x + 20] for x in range(5)]
+        d = [c[(x - 1) % 5] ^ (((c[(x + 1) % 5] << 1) | (c[(x + 1) % 5] >> 63)) & _MASK) for x in range(5)]
+        b = [0] * 25
+        for i in range(25):
+            lane, shift = a[i] ^ d[i % 5], _ROT[i]
+            b[_PI[i]] = ((lane << shift) | (lane >> (64 - shift))) & _MASK
+        a = [b[i] ^ (~b[i - i % 5 + (i + 1) % 5] & b[i - i % 5 + (i + 2) % 5]) for i in range(25)]
+        a[0] ^= rc
+    return a
+
+def keccak256(data):
+    """Keccak-256 do Ethereum (não é o SHA3-256 do hashlib, que usa outro padding)."""
+    if _keccak is not None:
+        return _keccak.new(digest_bits=256, data=data).digest()
+    rate = 136
+    padded = bytearray(data) + b'\x01' + b'\x00' * (-(len(data) + 1) % rate)
+    padded[-1] |= 0x80
+    state = [0] * 25
+    for offset in range(0, len(padded), rate):
+        for i in range(rate // 8):
+            state[i] ^= int.from_bytes(padded[offset + 8 * i:offset + 8 * i + 8], 'little')
+        state = _keccak_f(state)
+    return b''.join(lane.to_bytes(8, 'little') for lane in state[:4])
+
+# --- Transações ---------------------------------------------------------------------------------------------
+
+def rlp_decode(data, pos=0):
+    """Descodifica um item RLP a partir de 'pos'; retorna (bytes ou lista, posição seguinte)."""
+    prefix = data[pos]
+    if prefix < 0x80:
+        return data[pos:pos + 1], pos + 1
+    if prefix <= 0xbf:
+        if prefix <= 0xb7:
+            start, length = pos + 1, prefix - 0x80
+        else:
+            size = prefix - 0xb7
+            start, length = pos + 1 + size, int.from_bytes(data[pos + 1:pos + 1 + size], 'big')
+        if start + length > len(data):
+            raise ValueError("RLP truncado")
+        return data[start:start + length], start + length
+    if prefix <= 0xf7:
+        start, length = pos + 1, prefix - 0xc0
+    else:
+        size = prefix - 0xf7
+        start, length = pos + 1 + size, int.from_bytes(data[pos + 1:pos + 1 + size], 'big')
+    end = start + length
+    if end > len(data):
+        raise ValueError("RLP truncado")
+    items = []
+    while start < end:
+        item, start = rlp_decode(data, start)
+        items.append(item)
+    return items, end
+
+# Campos de cada tipo de transação, pela ordem em que estão codificados.
+TX_FIELDS = {
+    0: ['nonce', 'gasPrice', 'gas', 'to', 'value', 'input', 'v', 'r', 's'],
+    1: ['chainId', 'nonce', 'gasPrice', 'gas', 'to', 'value', 'input', 'accessList', 'v', 'r', 's'],
+    2: ['chainId', 'nonce', 'maxPriorityFeePerGas', 'maxFeePerGas', 'gas', 'to', 'value', 'input', 'accessList',
+        'v', 'r', 's'],
+}
+
+def decode_transaction(raw):
+    """Campos de uma transação assinada (legacy, EIP-2930 ou EIP-1559), com os inteiros já convertidos."""
+    tx_type = raw[0] if raw and raw[0] < 0x7f else 0
+    items, end = rlp_decode(raw, 1 if tx_type else 0)
+    fields = TX_FIELDS.get(tx_type)
+    if fields is None or not isinstance(items, list) or len(items) != len(fields) or end != len(raw):
+        raise ValueError("transação inválida")
+    tx = dict(zip(fields, items))
+    for name, value in tx.items():
+        if name not in ('to', 'input', 'accessList'):
+            tx[name] = int.from_bytes(value, 'big')
+    tx['type'] = tx_type
+    return tx
+
+class Transaction:
+    __slots__ = ('hash', 'raw', 'nonce', 'gas', 'block', 'index')
+
+    def __init__(self, tx_hash, raw, nonce, gas):
+        self.hash = tx_hash
+        self.raw = raw
+        self.nonce = nonce
+        self.gas = gas
+        self.block = None
+        self.index = None
+
+# --- Latências ----------------------------------------------------------------------------------------------
+
+class LatencyModel:
+    """
+    Distribuição da latência (ms) de um método, a partir de uma especificação:
+    'none', 'fixed:MS', 'uniform:MIN,MAX', 'exp:MÉDIA' ou 'lognormal:MEDIANA,SIGMA'.
+    """
+    KINDS = {'none': 0, 'fixed': 1, 'uniform': 2, 'exp': 1, 'lognormal': 2}
+
+    def __init__(self, spec):
+        kind, _, values = spec.partition(':')
+        self.kind = kind.strip().lower()
+        if self.kind not in self.KINDS:
+            raise ValueError(f"distribuição desconhecida: '{spec}' (use {', '.join(self.KINDS)})")
+        self.params = [float(v) for v in values.split(',')] if values else []
+        if len(self.params) != self.KINDS[self.kind]:
+            raise ValueError(f"'{spec}': '{self.kind}' precisa de {self.KINDS[self.kind]} parâmetro(s)")
+        self.spec = spec
+
+    def sample(self, rng):
+        if self.kind == 'none':
+            return 0.0
+        if self.kind == 'fixed':
+            return self.params[0]
+        if self.kind == 'uniform':
+            return rng.uniform(*self.params)
+        if self.kind == 'exp':
+            return rng.expovariate(1.0 / self.params[0]) if self.params[0] > 0 else 0.0
+        return rng.lognormvariate(0.0, self.params[1]) * self.params[0]
+
+# --- Cadeia partilhada --------------------------------------------------------------------------------------
+
+class Block:
+    __slots__ = ('number', 'hash', 'parent_hash', 'timestamp', 'transactions', 'gas_used')
+
+    def __init__(self, number, parent_hash, timestamp, transactions):
+        self.number = number
+        self.parent_hash = parent_hash
+        self.timestamp = timestamp
+        self.transactions = transactions
+        self.gas_used = sum(tx.gas for tx in transactions)
+        # O hash do bloco não é verificado pelos clientes: basta ser único e estável.
+        self.hash = '0x' + hashlib.sha256(f'{number}:{parent_hash}:{timestamp}'.encode()).hexdigest()
+
+class Chain:
+    """
+    Estado comum a todos os nós: blocos, pool de transações pendentes e nonces de uma única conta.
+    O nonce 'latest' é o número de transações já incluídas; o 'pending' inclui as do pool sem lacunas.
+    """
+    def __init__(self, chain_id, gas_limit, tx_gas, london_block=0, pool_size=DEFAULT_POOL_SIZE,
+                 max_block_txs=0, sender=None):
+        self.chain_id = chain_id
+        self.gas_limit = gas_limit
+        self.tx_gas = tx_gas
+        self.london_block = london_block
+        self.pool_size = pool_size
+        self.max_block_txs = max_block_txs or max(gas_limit // tx_gas, 1)
+        self.sender = sender
+        self.blocks = [Block(0, ZERO_HASH, int(time.time()), [])]
+        self.blocks_by_hash = {self.blocks[0].hash: self.blocks[0]}
+        self.transactions = {}
+        self.pool = {}
+        self.confirmed_nonce = 0
+        self.pending_nonce = 0
+
+    @property
+    def latest(self):
+        return self.blocks[-1]
+
+    def submit(self, raw):
+        """Valida o nonce e põe a transação no pool; retorna o hash. Erros como os do Besu."""
+        try:
+            tx = decode_transaction(raw)
+        except (ValueError, IndexError):
+            raise RpcError(INVALID_PARAMS)
+        tx_hash = '0x' + keccak256(raw).hex()
+        nonce = tx['nonce']
+        if nonce < self.confirmed_nonce:
+            raise RpcError(NONCE_TOO_LOW)
+        if nonce in self.pool:
+            raise RpcError(KNOWN_TRANSACTION if self.pool[nonce].hash == tx_hash else REPLACEMENT_UNDERPRICED)
+        if nonce > self.pending_nonce + MAX_FUTURE_NONCES:
+            raise RpcError(NONCE_TOO_FAR)
+        if len(self.pool) >= self.pool_size:
+            raise RpcError(POOL_FULL)
+        entry = Transaction(tx_hash, raw, nonce, min(tx['gas'], self.tx_gas))
+        self.pool[nonce] = entry
+        self.transactions[tx_hash] = entry
+        while self.pending_nonce in self.pool:
+            self.pending_nonce += 1
+        return tx_hash
+
+    def produce_block(self, timestamp):
+        """Inclui num novo bloco as transações pendentes seguidas (sem lacunas de nonce), até ao limite do bloco."""
+        included = []
+        while self.confirmed_nonce < self.pending_nonce and len(included) < self.max_block_txs:
+            tx = self.pool.pop(self.confirmed_nonce)
+            tx.block, tx.index = len(self.blocks), len(included)
+            included.append(tx)
+            self.confirmed_nonce += 1
+        block = Block(len(self.blocks), self.latest.hash, max(timestamp, self.latest.timestamp), included)
+        self.blocks.append(block)
+        self.blocks_by_hash[block.hash] = block
+        return block
+
+    def block_by_tag(self, tag):
+        if tag in ('latest', 'pending', 'safe', 'finalized'):
+            return self.latest
+        if tag == 'earliest':
+            return self.blocks[0]
+        number = int(tag, 16)
+        return self.blocks[number] if 0 <= number < len(self.blocks) else None
+
+    def format_transaction(self, entry):
+        tx = decode_transaction(entry.raw)
+        block = self.blocks[entry.block] if entry.block is not None else None
+        result = {
+            'hash': entry.hash,
+            'type': hex(tx['type']),
+            'nonce': hex(tx['nonce']),
+            'blockHash': block.hash if block else None,
+            'blockNumber': hex(block.number) if block else None,
+            'transactionIndex': hex(entry.index) if block else None,
+            'from': self.sender or ZERO_ADDRESS,
+            'to': '0x' + tx['to'].hex() if tx['to'] else None,
+            'value': hex(tx['value']),
+            'gas': hex(tx['gas']),
+            'input': '0x' + tx['input'].hex(),
+            'v': hex(tx['v']),
+            'r': hex(tx['r']),
+            's': hex(tx['s']),
+        }
+        if tx['type'] == 2:
+            result.update(maxPriorityFeePerGas=hex(tx['maxPriorityFeePerGas']), maxFeePerGas=hex(tx['maxFeePerGas']),
+                          gasPrice=hex(tx['maxFeePerGas']))
+        else:
+            result['gasPrice'] = hex(tx['gasPrice'])
+        if tx['type']:
+            result.update(chainId=hex(tx['chainId']), accessList=[], yParity=hex(tx['v']))
+        return result
+
+    def format_receipt(self, entry):
+        block = self.blocks[entry.block]
+        tx = decode_transaction(entry.raw)
+        cumulative = sum(t.gas for t in block.transactions[:entry.index + 1])
+        return {
+            'transactionHash': entry.hash,
+            'transactionIndex': hex(entry.index),
+            'blockHash': block.hash,
+            'blockNumber': hex(block.number),
+            'from': self.sender or ZERO_ADDRESS,
+            'to': '0x' + tx['to'].hex() if tx['to'] else None,
+            'contractAddress': None,
+            'cumulativeGasUsed': hex(cumulative),
+            'gasUsed': hex(entry.gas),
+            'effectiveGasPrice': '0x0',
+            'logs': [],
+            'logsBloom': EMPTY_BLOOM,
+            'status': '0x1',
+            'type': hex(tx['type']),
+        }
+
+    def format_block(self, block, full):
+        result = {
+            'number': hex(block.number),
+            'hash': block.hash,
+            'parentHash': block.parent_hash,
+            'mixHash': ZERO_HASH,
+            'nonce': '0x0000000000000000',
+            'sha3Uncles': EMPTY_UNCLES_HASH,
+            'logsBloom': EMPTY_BLOOM,
+            'transactionsRoot': ZERO_HASH,
+            'stateRoot': ZERO_HASH,
+            'receiptsRoot': ZERO_HASH,
+            'miner': ZERO_ADDRESS,
+            'difficulty': '0x1',
+            'totalDifficulty': hex(block.number + 1),
+            'extraData': '0x',
+            'size': hex(600 + sum(len(tx.raw) for tx in block.transactions)),
+            'gasLimit': hex(self.gas_limit),
+            'gasUsed': hex(block.gas_used),
+            'timestamp': hex(block.timestamp),
+            'uncles': [],
+            'transactions': [self.format_transaction(tx) if full else tx.hash for tx in block.transactions],
+        }
+        # Antes do londonBlock do génesis não há taxa base e o ethers usa transações legacy, como na rede real.
+        if block.number >= self.london_block:
+            result['baseFeePerGas'] = '0x0'
+        return result
+
+# --- Nós ----------------------------------------------------------------------------------------------------
+
+class MockNode:
+    """
+    Um nó: métodos JSON-RPC sobre a cadeia partilhada, com latência sorteada por pedido (multiplicada por
+    'slowness') e, em eth_sendRawTransaction, uma fração 'nonce_error_rate' de erros 'Nonce too low' injetados.
+    """
+    def __init__(self, index, chain, latencies, slowness=1.0, nonce_error_rate=0.0, rng=None):
+        self.index = index
+        self.name = f'node{index + 1}'
+        self.chain = chain
+        self.latencies = latencies
+        self.slowness = slowness
+        self.nonce_error_rate = nonce_error_rate
+        self.rng = rng or random.Random()
+        self.enode = (f"enode://{hashlib.sha512(self.name.encode()).hexdigest()}"
+                      f"@127.0.0.1:{BASE_P2P_PORT + index}")
+        self.requests = Counter()
+        self.errors = Counter()
+        self.injected_errors = 0
+        self.methods = {
+            'eth_sendRawTransaction': self.send_raw_transaction,
+            'eth_call': lambda params: '0x' + '00' * 32,
+            'eth_estimateGas': lambda params: hex(chain.tx_gas),
+            'eth_getTransactionCount': self.get_transaction_count,
+            'eth_getBlockByNumber': lambda params: self.format_block(chain.block_by_tag(params[0]), params),
+            'eth_getBlockByHash': lambda params: self.format_block(chain.blocks_by_hash.get(params[0]), params),
+            'eth_getTransactionByHash': self.get_transaction,
+            'eth_getTransactionReceipt': self.get_receipt,
+            'eth_blockNumber': lambda params: hex(chain.latest.number),
+            'eth_chainId': lambda params: hex(chain.chain_id),
+            'eth_gasPrice': lambda params: '0x0',
+            'eth_maxPriorityFeePerGas': lambda params: '0x0',
+            'eth_syncing': lambda params: False,
+            'eth_accounts': lambda params: [],
+            'net_version': lambda params: str(chain.chain_id),
+            'net_peerCount': lambda params: hex(len(self.peers)),
+            'net_listening': lambda params: True,
+            'net_enode': lambda params: self.enode,
+            'web3_clientVersion': lambda params: 'besu/mock/python',
+            'txpool_besuStatistics': lambda params: {'maxSize': chain.pool_size, 'localCount': len(chain.pool),
+                                                     'remoteCount': 0},
+        }
+        self.peers = []
+
+    def latency_s(self, method):
+        model = self.latencies.get(method, self.latencies['default'])
+        return model.sample(self.rng) * self.slowness / 1000
+
+    def send_raw_transaction(self, params):
+        if self.nonce_error_rate and self.rng.random() < self.nonce_error_rate:
+            self.injected_errors += 1
+            raise RpcError(NONCE_TOO_LOW)
+        try:
+            raw = bytes.fromhex(params[0][2:] if params[0].startswith('0x') else params[0])
+        except (ValueError, AttributeError):
+            raise RpcError(INVALID_PARAMS)
+        return self.chain.submit(raw)
+
+    def get_transaction_count(self, params):
+        # A primeira conta consultada passa a ser o remetente de todas as transações (campo 'from').
+        if self.chain.sender is None:
+            self.chain.sender = params[0].lower()
+        tag = params[1] if len(params) > 1 else 'latest'
+        return hex(self.chain.pending_nonce if tag == 'pending' else self.chain.confirmed_nonce)
+
+    def format_block(self, block, params):
+        return self.chain.format_block(block, len(params) > 1 and bool(params[1])) if block else None
+
+    def get_transaction(self, params):
+        entry = self.chain.transactions.get(params[0].lower())
+        return self.chain.format_transaction(entry) if entry else None
+
+    def get_receipt(self, params):
+        entry = self.chain.transactions.get(params[0].lower())
+        return self.chain.format_receipt(entry) if entry and entry.block is not None else None
+
+    async def call(self, request):
+        """Executa um pedido JSON-RPC (dicionário) e retorna a resposta."""
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return {'jsonrpc': '2.0', 'id': None, 'error': {'code': INVALID_REQUEST[0], 'message': INVALID_REQUEST[1]}}
+        method, request_id = request['method'], request.get('id')
+        self.requests[method] += 1
+        delay = self.latency_s(method)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        handler = self.methods.get(method)
+        try:
+            if handler is None:
+                raise RpcError(METHOD_NOT_FOUND)
+            params = request.get('params') or []
+            try:
+                result = handler(params)
+            except (IndexError, TypeError, ValueError, AttributeError):
+                raise RpcError(INVALID_PARAMS)
+        except RpcError as e:
+            self.errors[e.message] += 1
+            return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': e.code, 'message': e.message}}
+        return {'jsonrpc': '2.0', 'id': request_id, 'result': result}
+
+    async def handle_body(self, body):
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return {'jsonrpc': '2.0', 'id': None, 'error': {'code': PARSE_ERROR[0], 'message': PARSE_ERROR[1]}}
+        if isinstance(payload, list):
+            if not payload:
+                return {'jsonrpc': '2.0', 'id': None, 'error': {'code': INVALID_REQUEST[0], 'message': INVALID_REQUEST[1]}}
+            return list(await asyncio.gather(*(self.call(request) for request in payload)))
+        return await self.call(payload)
+
+    async def serve_connection(self, reader, writer):
+        """Ligação HTTP/1.1 keep-alive: pedidos POST com JSON-RPC; GET (ex.: /liveness) responde que o nó está UP."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method = request_line.split(b' ', 1)[0]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                if headers.get('transfer-encoding', '').lower() == 'chunked':
+                    chunks = []
+                    while True:
+                        size = int((await reader.readline()).split(b';')[0], 16)
+                        if size == 0:
+                            await reader.readline()
+                            break
+                        chunks.append(await reader.readexactly(size))
+                        await reader.readexactly(2)
+                    body = b''.join(chunks)
+                else:
+                    length = int(headers.get('content-length', 0))
+                    body = await reader.readexactly(length) if length else b''
+
+                response = await self.handle_body(body) if method == b'POST' else {'status': 'UP'}
+                data = json.dumps(response, separators=(',', ':')).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n'
+                             b'Connection: %s\r\n\r\n' % (len(data), b'keep-alive' if keep_alive else b'close') + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+# --- Execução -----------------------------------------------------------------------------------------------
+
+def keccak_ceiling(samples=200, size=250):
+    """eth_sendRawTransaction/s máximos da rede inteira só pelo custo do Keccak-256 de transações de 'size' bytes."""
+    data = os.urandom(size)
+    start = time.perf_counter()
+    for _ in range(samples):
+        keccak256(data)
+    return samples / (time.perf_counter() - start)
+
+def read_genesis(path):
+    """chainId, gasLimit, londonBlock e período dos blocos (s) do génesis QBFT, ou None se não existir."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as f:
+        genesis = json.load(f)
+    # Aceita o génesis simples e o ficheiro de configuração do operator do Besu ({"genesis": {...}}).
+    genesis = genesis.get('genesis', genesis)
+    config = genesis.get('config', {})
+    return {
+        'chain_id': int(config.get('chainId', 1337)),
+        'gas_limit': int(genesis.get('gasLimit', '0x1fffffffffffff'), 16),
+        'london_block': int(config.get('londonBlock', 0)),
+        'block_interval': float(config.get('qbft', {}).get('blockperiodseconds', 5)),
+    }
+
+def parse_slow_nodes(values):
+    """['node3=4', ...] -> {'node3': 4.0}."""
+    slow = {}
+    for value in values or []:
+        name, _, factor = value.partition('=')
+        if not factor:
+            raise ValueError(f"--slow-node espera NOME=FATOR: '{value}'")
+        slow[name.strip()] = float(factor)
+    return slow
+
+async def produce_blocks(chain, interval, stop):
+    """Produz um bloco a cada 'interval' segundos, em instantes fixos (como o período de blocos do QBFT)."""
+    start = time.perf_counter()
+    tick = 0
+    while not stop.is_set():
+        tick += 1
+        try:
+            await asyncio.wait_for(stop.wait(), max(start + tick * interval - time.perf_counter(), 0))
+        except asyncio.TimeoutError:
+            chain.produce_block(int(time.time()))
+
+async def report_stats(nodes, chain, interval, stop):
+    """Imprime a cada 'interval' segundos os pedidos/s de cada nó, a altura da cadeia e o tamanho do pool."""
+    previous = {node.name: 0 for node in nodes}
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            rates = []
+            for node in nodes:
+                total = sum(node.requests.values())
+                rates.append(f"{node.name} {(total - previous[node.name]) / interval:.0f}")
+                previous[node.name] = total
+            print(f"[mock] bloco {chain.latest.number}, {chain.confirmed_nonce} tx incluídas, pool {len(chain.pool)} | "
+                  f"pedidos/s: {', '.join(rates)}", flush=True)
+
+def summary(nodes, chain, elapsed):
+    return {
+        'elapsed_s': round(elapsed, 3),
+        'blocks': chain.latest.number,
+        'included_tx': chain.confirmed_nonce,
+        'pending_tx': len(chain.pool),
+        'nodes': [{'node': node.name, 'slowness': node.slowness, 'requests': dict(node.requests),
+                   'errors': dict(node.errors), 'injected_nonce_errors': node.injected_errors} for node in nodes],
+    }
+
+def print_summary(result):
+    print(f"\n--- Rede simulada: {result['elapsed_s']:.1f} s, {result['blocks']} blocos, "
+          f"{result['included_tx']} transações incluídas, {result['pending_tx']} pendentes ---")
+    print(f"{'nó':<8}{'lentidão':>9}{'pedidos':>10}{'pedidos/s':>11}{'envios':>9}{'eth_call':>10}{'erros':>8}{'injetados':>11}")
+    for node in result['nodes']:
+        total = sum(node['requests'].values())
+        print(f"{node['node']:<8}{node['slowness']:>9.1f}{total:>10}{total / max(result['elapsed_s'], 1e-9):>11.1f}"
+              f"{node['requests'].get('eth_sendRawTransaction', 0):>9}{node['requests'].get('eth_call', 0):>10}"
+              f"{sum(node['errors'].values()):>8}{node['injected_nonce_errors']:>11}")
+
+async def run_network(args, genesis):
+    chain = Chain(genesis['chain_id'], genesis['gas_limit'], args.tx_gas, genesis['london_block'], args.pool_size,
+                  args.max_block_txs, args.sender.lower() if args.sender else None)
+    latencies = {
+        'default': LatencyModel(args.rpc_latency),
+        'eth_call': LatencyModel(args.call_latency),
+        'eth_sendRawTransaction': LatencyModel(args.send_latency),
+    }
+    slow = parse_slow_nodes(args.slow_node)
+    unknown = set(slow) - {f'node{i + 1}' for i in range(args.nodes)}
+    if unknown:
+        raise ValueError(f"--slow-node: nós inexistentes {sorted(unknown)}")
+    rng = random.Random(args.seed)
+    nodes = [MockNode(i, chain, latencies, slow.get(f'node{i + 1}', 1.0), args.nonce_error_rate,
+                      random.Random(rng.random())) for i in range(args.nodes)]
+    for node in nodes:
+        node.peers = [peer for peer in nodes if peer is not node]
+
+    servers = [await asyncio.start_server(node.serve_connection, args.host, args.base_port + node.index, backlog=1024)
+               for node in nodes]
+    for node in nodes:
+        print(f"  -> {node.name}: http://{args.host}:{args.base_port + node.index}"
+              + (f" (latência x{node.slowness:g})" if node.slowness != 1.0 else ""))
+    print(f"Rede simulada com {args.nodes} nós (chainId {chain.chain_id}, blocos a cada {args.block_interval:g} s). "
+          f"Ctrl+C para terminar.", flush=True)
+
+    if _keccak is None:
+        print(f"Aviso: pycryptodome não está instalado; o Keccak-256 em Python puro limita a rede simulada a cerca de "
+              f"{keccak_ceiling():.0f} eth_sendRawTransaction/s no total, o que pode torná-la o gargalo das medições de "
+              f"throughput. Instale-o com: pip install pycryptodome", file=sys.stderr, flush=True)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    if args.duration:
+        loop.call_later(args.duration, stop.set)
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(produce_blocks(chain, args.block_interval, stop))]
+    if args.stats_interval:
+        tasks.append(asyncio.create_task(report_stats(nodes, chain, args.stats_interval, stop)))
+    await stop.wait()
+    for server in servers:
+        server.close()
+    await asyncio.gather(*tasks)
+
+    result = summary(nodes, chain, time.perf_counter() - start)
+    print_summary(result)
+    if args.stats_output:
+        with open(args.stats_output, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Estatísticas gravadas em {args.stats_output}")
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rede Besu simulada: servidor JSON-RPC asyncio com vários nós (portas consecutivas, como "
+                    "node1..node6 em 8545..8550) sobre uma cadeia em memória, para medir a API e os scripts de "
+                    "análise sem a rede real. As latências aceitam 'none', 'fixed:MS', 'uniform:MIN,MAX', "
+                    "'exp:MÉDIA' ou 'lognormal:MEDIANA,SIGMA' (em ms). Requer pycryptodome para não limitar o "
+                    "throughput de eth_sendRawTransaction.")
+    parser.add_argument('--nodes', type=int, default=6, help="Número de nós")
+    parser.add_argument('--host', default='127.0.0.1', help="Endereço onde os nós escutam")
+    parser.add_argument('--base-port', type=int, default=BASE_PORT, help="Porta do node1; os seguintes usam as portas seguintes")
+    parser.add_argument('--genesis', default=DEFAULT_GENESIS,
+                        help="Génesis de onde vêm o chainId, o gasLimit, o londonBlock e o período dos blocos")
+    parser.add_argument('--chain-id', type=int, help="chainId (por omissão, o do génesis)")
+    parser.add_argument('--block-interval', type=float, help="Segundos entre blocos (por omissão, o blockperiodseconds do génesis)")
+    parser.add_argument('--max-block-txs', type=int, default=0, help="Máximo de transações por bloco (0: só o limite de gas)")
+    parser.add_argument('--tx-gas', type=int, default=DEFAULT_TX_GAS, help="Gas usado por transação (e devolvido em eth_estimateGas)")
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_POOL_SIZE, help="Tamanho máximo do pool de transações")
+    parser.add_argument('--send-latency', default='lognormal:5,0.5', help="Latência de eth_sendRawTransaction")
+    parser.add_argument('--call-latency', default='lognormal:3,0.5', help="Latência de eth_call")
+    parser.add_argument('--rpc-latency', default='fixed:1', help="Latência dos restantes métodos")
+    parser.add_argument('--slow-node', action='append', metavar='NÓ=FATOR',
+                        help="Multiplica as latências de um nó (ex.: node3=5); pode repetir-se")
+    parser.add_argument('--nonce-error-rate', type=float, default=0.0,
+                        help="Fração dos eth_sendRawTransaction rejeitados com 'Nonce too low' sem entrarem no pool")
+    parser.add_argument('--sender', help="Endereço devolvido no campo 'from' (por omissão, a primeira conta consultada)")
+    parser.add_argument('--duration', type=float, help="Termina ao fim de N segundos (por omissão, até Ctrl+C)")
+    parser.add_argument('--stats-interval', type=float, default=10.0, help="Intervalo (s) das estatísticas periódicas (0: desativa)")
+    parser.add_argument('--stats-output', help="JSON com os pedidos e erros por nó e método, gravado no fim")
+    parser.add_argument('--seed', type=int, default=0, help="Semente das latências e dos erros injetados")
+    args = parser.parse_args()
+
+    genesis = read_genesis(args.genesis) or {'chain_id': 1337, 'gas_limit': 0x1fffffffffffff, 'london_block': 0,
+                                             'block_interval': 5.0}
+    if args.chain_id is not None:
+        genesis['chain_id'] = args.chain_id
+    if args.block_interval is None:
+        args.block_interval = genesis['block_interval']
+    try:
+        if uvloop is not None:
+            uvloop.install()
+        asyncio.run(run_network(args, genesis))
+    except (ValueError, OSError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import json
+import time
+import resource
+
+# Sem /proc (fora de Linux) o pico de RSS vem do getrusage, que é o máximo desde o arranque do processo.
+PROC_STATUS = '/proc/self/status'
+PROC_CLEAR_REFS = '/proc/self/clear_refs'
+
+def _status_kb(field):
+    try:
+        with open(PROC_STATUS) as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def reset_peak_rss():
+    """Repõe o pico de RSS (VmHWM) do processo atual; retorna False se o sistema não o permitir."""
+    try:
+        with open(PROC_CLEAR_REFS, 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """Pico de RSS do processo atual (MB), desde o arranque ou desde o último reset_peak_rss()."""
+    peak_kb = _status_kb('VmHWM')
+    if peak_kb is None:
+        peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_kb / 1024
+
+def children_peak_rss_mb():
+    """Maior pico de RSS entre os processos filhos já terminados (ex.: os workers do report_pool)."""
+    return resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+class StageProfiler:
+    """
+    Tempo real, tempo de CPU e pico de RSS por etapa de um script de relatórios (ex.: parse, aggregate, render).
+    As etapas são sequenciais: begin() fecha a etapa em curso e abre a seguinte, para que o código medido não
+    precise de ser reindentado. Desativado, não faz nada.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.stages = []
+        self.current = None
+        self.started = time.perf_counter()
+
+    def begin(self, name):
+        if not self.enabled:
+            return
+        self.end()
+        per_stage = reset_peak_rss()
+        self.current = (name, time.perf_counter(), time.process_time(), per_stage)
+
+    def end(self):
+        if not self.enabled or self.current is None:
+            return
+        name, wall_start, cpu_start, per_stage = self.current
+        self.stages.append({
+            'stage': name,
+            'wall_s': round(time.perf_counter() - wall_start, 4),
+            'cpu_s': round(time.process_time() - cpu_start, 4),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            # Com reset, o pico é o desta etapa; sem ele, é o do processo até ao fim desta etapa.
+            'peak_rss_scope': 'stage' if per_stage else 'process',
+            'children_peak_rss_mb': round(children_peak_rss_mb(), 1),
+        })
+        self.current = None
+
+    def to_dict(self):
+        self.end()
+        return {'total_wall_s': round(time.perf_counter() - self.started, 4), 'stages': self.stages}
+
+    def print_report(self):
+        result = self.to_dict()
+        print("\n--- Perfil por etapa ---")
+        print(f"{'etapa':<12}{'real (s)':>10}{'CPU (s)':>10}{'pico RSS (MB)':>15}{'filhos (MB)':>13}")
+        for stage in result['stages']:
+            print(f"{stage['stage']:<12}{stage['wall_s']:>10.3f}{stage['cpu_s']:>10.3f}"
+                  f"{stage['peak_rss_mb']:>15.1f}{stage['children_peak_rss_mb']:>13.1f}")
+        print(f"{'total':<12}{result['total_wall_s']:>10.3f}")
+
+    def write_json(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
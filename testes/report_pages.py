@@ -0,0 +1,89 @@
+import io
+import html
+import base64
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_pdf import PdfPages
+
+# 'png' mantém um ficheiro por gráfico; 'pdf' e 'html' juntam todas as rodadas num único relatório de várias páginas.
+REPORT_FORMATS = ['png', 'pdf', 'html']
+
+HTML_STYLE = """
+body { font-family: sans-serif; margin: 2em; }
+table.summary { border-collapse: collapse; margin-bottom: 2em; }
+table.summary th, table.summary td { border: 1px solid #ccc; padding: 4px 10px; text-align: right; }
+table.summary th:first-child, table.summary td:first-child { text-align: left; }
+img { max-width: 100%; margin-bottom: 2em; }
+"""
+
+class ReportBook:
+    """
+    Relatório de várias páginas (PDF ou HTML) desenhado sobre uma única Figure do backend Agg, reutilizada de página
+    para página: cada página limpa a figura e cria a sua grelha de painéis, sem passar pelo gestor de figuras do
+    pyplot nem recriar o canvas. As margens são fixas, para evitar o custo do tight_layout/bbox_inches='tight'.
+    As tabelas entram no HTML como <table> (texto), nunca como imagens.
+    """
+    def __init__(self, path, fmt, title, dpi=100):
+        if fmt not in ('pdf', 'html'):
+            raise ValueError(f"Formato de relatório desconhecido: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.title = title
+        self.dpi = dpi
+        self.figure = Figure()
+        FigureCanvasAgg(self.figure)
+        self.pdf = PdfPages(path) if fmt == 'pdf' else None
+        self.sections = []
+        self.pages = 0
+
+    def page(self, rows, cols, width=16, row_height=4.5, **subplot_kw):
+        """Limpa a figura e retorna uma grelha rows x cols de eixos (sempre 2D)."""
+        self.figure.clear()
+        self.figure.set_size_inches(width, row_height * rows)
+        return self.figure.subplots(rows, cols, squeeze=False, **subplot_kw)
+
+    def save_page(self, title):
+        """Grava a página atual; os painéis que ficaram sem dados são escondidos."""
+        height = self.figure.get_figheight()
+        for ax in self.figure.axes:
+            if not ax.has_data():
+                ax.set_visible(False)
+        self.figure.suptitle(title, fontsize=16)
+        self.figure.subplots_adjust(left=0.06, right=0.97, bottom=0.6 / height, top=1 - 0.9 / height,
+                                    hspace=0.45, wspace=0.2)
+        if self.pdf is not None:
+            self.pdf.savefig(self.figure)
+        else:
+            buffer = io.BytesIO()
+            self.figure.savefig(buffer, format='png', dpi=self.dpi)
+            image = base64.b64encode(buffer.getvalue()).decode('ascii')
+            self.sections.append(f'<h2>{html.escape(title)}</h2>\n<img alt="{html.escape(title)}" '
+                                 f'src="data:image/png;base64,{image}">')
+        self.pages += 1
+
+    def table(self, df, title):
+        """Acrescenta uma tabela ao relatório HTML (no PDF as tabelas ficam só nos ficheiros de write_table)."""
+        if self.fmt == 'html':
+            self.sections.append(f'<h2>{html.escape(title)}</h2>\n' + df.to_html(index=False, border=0, classes='summary'))
+
+    def close(self):
+        if self.pdf is not None:
+            self.pdf.close()
+        else:
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.write(f'<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>{html.escape(self.title)}</title>'
+                        f'<style>{HTML_STYLE}</style></head>\n<body>\n<h1>{html.escape(self.title)}</h1>\n')
+                f.write('\n'.join(self.sections))
+                f.write('\n</body></html>\n')
+        self.figure.clear()
+
+def write_table(df, base_path):
+    """Grava uma tabela de resumo como CSV e como texto alinhado (base_path sem extensão); retorna o texto."""
+    text = df.to_string(index=False)
+    df.to_csv(base_path + '.csv', index=False)
+    with open(base_path + '.txt', 'w', encoding='utf-8') as f:
+        f.write(text + '\n')
+    return text
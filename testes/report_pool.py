@@ -0,0 +1,22 @@
+from concurrent.futures import ProcessPoolExecutor
+
+def _call(func, args):
+    return func(*args)
+
+def run_tasks(tasks, jobs=1):
+    """
+    Executa uma lista de tarefas (func, args) e retorna os resultados na mesma ordem das tarefas.
+    Com jobs > 1 as tarefas são distribuídas por um pool de processos; com jobs <= 1 correm em série
+    no processo atual. Como a ordem dos resultados é a das tarefas, a saída é determinística.
+    """
+    tasks = list(tasks)
+    if jobs <= 1 or len(tasks) <= 1:
+        return [_call(func, args) for func, args in tasks]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+        futures = [pool.submit(_call, func, args) for func, args in tasks]
+        return [future.result() for future in futures]
+
+def map_files(func, files, jobs=1):
+    """Aplica func a cada ficheiro (em paralelo se jobs > 1) e retorna um dicionário ficheiro -> resultado."""
+    files = sorted(files)
+    return dict(zip(files, run_tasks([(func, (f,)) for f in files], jobs)))
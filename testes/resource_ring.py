@@ -0,0 +1,103 @@
+import json
+import mmap
+
+import numpy as np
+
+# Formato do ficheiro resources_<rodada>_run_<N>.bin gravado pelo cgroupCollector.py:
+# um cabeçalho de HEADER_SIZE bytes (HEADER_DTYPE seguido dos nomes dos containers em JSON) e um anel de
+# 'capacity' registos de tamanho fixo (RECORD_DTYPE). 'count' é o total de registos escritos; quando excede
+# a capacidade, os mais antigos foram substituídos e o registo mais antigo está na posição count % capacity.
+MAGIC = b'CGRING01'
+HEADER_SIZE = 4096
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'),
+    ('record_size', '<u4'),
+    ('interval_us', '<u4'),
+    ('capacity', '<u8'),
+    ('count', '<u8'),
+    ('names_size', '<u4'),
+])
+# Contadores cumulativos lidos do cgroup v2 e de /proc/<pid>/net/dev, como valores brutos (µs e bytes).
+RECORD_DTYPE = np.dtype([
+    ('timestamp_ns', '<i8'),
+    ('container', '<u4'),
+    ('missing', '<u4'),  # máscara MISSING_* dos ficheiros que não puderam ser lidos nesta amostra
+    ('cpu_usec', '<u8'),
+    ('mem_bytes', '<u8'),
+    ('io_read_bytes', '<u8'),
+    ('io_write_bytes', '<u8'),
+    ('net_rx_bytes', '<u8'),
+    ('net_tx_bytes', '<u8'),
+])
+MISSING_CPU, MISSING_MEM, MISSING_IO, MISSING_NET = 1, 2, 4, 8
+
+class RingWriter:
+    """
+    Escreve registos RECORD_DTYPE num ficheiro mapeado em memória. Cada append() copia o lote diretamente
+    para o mapa e só depois atualiza 'count', para que um leitor concorrente nunca veja registos incompletos.
+    """
+    def __init__(self, path, names, capacity, interval_us=0):
+        names_json = json.dumps(list(names)).encode()
+        if HEADER_DTYPE.itemsize + len(names_json) > HEADER_SIZE:
+            raise ValueError("Demasiados containers para o cabeçalho do ficheiro.")
+        self.path = path
+        self.capacity = capacity
+        self.file = open(path, 'w+b')
+        # Ficheiro esparso: só ocupa disco à medida que os registos são escritos.
+        self.file.truncate(HEADER_SIZE + capacity * RECORD_DTYPE.itemsize)
+        self.map = mmap.mmap(self.file.fileno(), 0)
+        self.header = np.ndarray(1, HEADER_DTYPE, buffer=self.map)
+        self.header[0] = (MAGIC, RECORD_DTYPE.itemsize, interval_us, capacity, 0, len(names_json))
+        self.map[HEADER_DTYPE.itemsize:HEADER_DTYPE.itemsize + len(names_json)] = names_json
+        self.records = np.ndarray(capacity, RECORD_DTYPE, buffer=self.map, offset=HEADER_SIZE)
+        self.count = 0
+
+    def append(self, batch):
+        n = len(batch)
+        if n == 0:
+            return
+        start = self.count % self.capacity
+        if start + n <= self.capacity:
+            self.records[start:start + n] = batch
+        else:
+            self.records[(start + np.arange(n)) % self.capacity] = batch
+        self.count += n
+        self.header['count'] = self.count
+
+    def close(self):
+        """Fecha o ficheiro; se o anel não chegou a dar a volta, corta-o ao tamanho dos registos escritos."""
+        if self.map is None:
+            return
+        trim = self.count < self.capacity
+        if trim:
+            self.header['capacity'] = self.count
+        self.map.flush()
+        # As vistas NumPy têm de ser libertadas antes de fechar o mapa.
+        del self.header, self.records
+        self.map.close()
+        self.map = None
+        if trim:
+            self.file.truncate(HEADER_SIZE + self.count * RECORD_DTYPE.itemsize)
+        self.file.close()
+
+def read_ring(path):
+    """
+    Abre um ficheiro gravado pelo RingWriter e retorna (nomes dos containers, registos por ordem de escrita).
+    Os registos são uma vista sobre o ficheiro mapeado em memória (sem cópia), exceto quando o anel deu a volta
+    e é preciso reordená-lo.
+    """
+    data = np.memmap(path, mode='r')
+    if data.size < HEADER_SIZE:
+        raise ValueError(f"{path}: ficheiro demasiado pequeno para o cabeçalho.")
+    header = data[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+    if header['magic'] != MAGIC or header['record_size'] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: formato desconhecido.")
+    names_start = HEADER_DTYPE.itemsize
+    names = json.loads(bytes(data[names_start:names_start + int(header['names_size'])]))
+    count, capacity = int(header['count']), int(header['capacity'])
+    available = (data.size - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    records = data[HEADER_SIZE:HEADER_SIZE + min(capacity, available) * RECORD_DTYPE.itemsize].view(RECORD_DTYPE)
+    if count <= capacity:
+        return names, records[:count]
+    start = count % capacity
+    return names, np.concatenate((records[start:], records[:start]))
@@ -0,0 +1,140 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from latency_histogram import LatencyHistogram, PERCENTILES, merge_histograms
+
+# Dicionário para garantir cores fixas para cada nó, partilhado por todos os relatórios.
+NODE_COLORS = {
+    'node1': '#1f77b4',  # Azul
+    'node2': '#ff7f0e',  # Laranja
+    'node3': '#2ca02c',  # Verde
+    'node4': '#d62728',  # Vermelho
+    'node5': '#9467bd',  # Roxo
+    'node6': '#8c564b',  # Castanho
+}
+DEFAULT_NODE_COLOR = '#7f7f7f'
+
+# Cores fixas para cada ferramenta nos relatórios comparativos.
+TOOL_COLORS = {'jmeter': '#d62728', 'caliper': '#1f77b4'}
+TOOL_LABELS = {'jmeter': 'JMeter', 'caliper': 'Caliper'}
+
+ROUNDS = ['open', 'query', 'transfer']
+
+# Colunas por nó em RoundResult.resources.
+RESOURCE_COLUMNS = ['node', 'cpu_avg', 'cpu_max', 'mem_avg_mb', 'mem_max_mb']
+
+def node_color(node):
+    return NODE_COLORS.get(node, DEFAULT_NODE_COLOR)
+
+@dataclass
+class RoundResult:
+    """
+    Resultado de uma rodada (open, query ou transfer) de uma ferramenta (jmeter ou caliper),
+    numa execução (run) ou consolidado entre execuções (run=None). Latências em segundos.
+    """
+    tool: str
+    round: str
+    run: Optional[int]
+    successes: float
+    failures: float
+    throughput_tps: float
+    latency_mean_s: float
+    latency_min_s: float
+    latency_max_s: float
+    # Distribuição completa de latência (ms), quando a ferramenta a fornece (JMeter).
+    latency_histogram: Optional[LatencyHistogram] = None
+    # Uma linha por nó com as colunas de RESOURCE_COLUMNS.
+    resources: Optional[pd.DataFrame] = None
+    runs: List[int] = field(default_factory=list)
+    # Janela estável [início, fim) (s desde o início da execução) sobre a qual o throughput e a latência foram
+    # calculados, quando foi detetada (JMeter), e os mesmos valores na execução completa.
+    steady_window: Optional[Tuple[int, int]] = None
+    whole_run_throughput_tps: Optional[float] = None
+    whole_run_latency_mean_s: Optional[float] = None
+    whole_run_latency_histogram: Optional[LatencyHistogram] = None
+
+    @property
+    def samples(self):
+        return self.successes + self.failures
+
+    def latency_percentiles_s(self, quantiles=PERCENTILES) -> Dict[float, float]:
+        """Percentis de latência em segundos, ou {} se a distribuição não está disponível."""
+        if self.latency_histogram is None or self.latency_histogram.total == 0:
+            return {}
+        return {q: value / 1000 for q, value in self.latency_histogram.percentiles(quantiles).items()}
+
+def consolidate_runs(results):
+    """
+    Consolida as execuções de uma mesma ferramenta e rodada num único RoundResult (run=None).
+    Contagens são somadas, o throughput é a média por execução, a latência média é ponderada pelos
+    sucessos, o mínimo/máximo são os extremos reais e os histogramas são fundidos quando existem.
+    """
+    results = list(results)
+    first = results[0]
+    successes = sum(r.successes for r in results)
+    weights = [r.successes for r in results]
+    if sum(weights) > 0:
+        latency_mean = sum(r.latency_mean_s * w for r, w in zip(results, weights)) / sum(weights)
+    else:
+        latency_mean = sum(r.latency_mean_s for r in results) / len(results)
+
+    histograms = [r.latency_histogram for r in results if r.latency_histogram is not None]
+    resources = [r.resources for r in results if r.resources is not None and not r.resources.empty]
+    consolidated_resources = None
+    if resources:
+        consolidated_resources = (pd.concat(resources).groupby('node')
+                                  .agg({'cpu_avg': 'mean', 'cpu_max': 'max', 'mem_avg_mb': 'mean', 'mem_max_mb': 'max'})
+                                  .reset_index())
+
+    whole_run = all(r.whole_run_throughput_tps is not None for r in results)
+    return RoundResult(
+        tool=first.tool,
+        round=first.round,
+        run=None,
+        successes=successes,
+        failures=sum(r.failures for r in results),
+        throughput_tps=sum(r.throughput_tps for r in results) / len(results),
+        latency_mean_s=latency_mean,
+        latency_min_s=min(r.latency_min_s for r in results),
+        latency_max_s=max(r.latency_max_s for r in results),
+        latency_histogram=merge_histograms(histograms) if histograms else None,
+        resources=consolidated_resources,
+        runs=sorted(r.run for r in results if r.run is not None),
+        whole_run_throughput_tps=sum(r.whole_run_throughput_tps for r in results) / len(results) if whole_run else None,
+        whole_run_latency_mean_s=(sum(r.whole_run_latency_mean_s * w for r, w in zip(results, weights)) / sum(weights)
+                                  if whole_run and sum(weights) > 0 else None),
+        whole_run_latency_histogram=(merge_histograms(r.whole_run_latency_histogram for r in results)
+                                     if whole_run and all(r.whole_run_latency_histogram is not None for r in results)
+                                     else None),
+    )
+
+def consolidate_by_round(results):
+    """Agrupa resultados por (ferramenta, rodada) e consolida cada grupo; retorna {(tool, round): RoundResult}."""
+    groups = {}
+    for result in results:
+        groups.setdefault((result.tool, result.round), []).append(result)
+    return {key: consolidate_runs(group) for key, group in groups.items()}
+
+def results_table(results):
+    """Tabela (uma linha por RoundResult) com as métricas comuns às duas ferramentas."""
+    rows = []
+    for r in results:
+        row = {
+            'tool': r.tool, 'round': r.round, 'run': r.run, 'samples': r.samples,
+            'successes': r.successes, 'failures': r.failures, 'throughput_tps': r.throughput_tps,
+            'latency_mean_s': r.latency_mean_s, 'latency_min_s': r.latency_min_s, 'latency_max_s': r.latency_max_s,
+        }
+        for q in PERCENTILES:
+            row[f'latency_p{q:g}_s'] = r.latency_percentiles_s().get(q)
+        row['whole_run_throughput_tps'] = r.whole_run_throughput_tps
+        row['whole_run_latency_mean_s'] = r.whole_run_latency_mean_s
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def resources_from_samples(df, node_column, cpu_column, mem_column):
+    """Resumo por nó (RESOURCE_COLUMNS) a partir de amostras de CPU (%) e memória (MB)."""
+    summary = df.groupby(node_column).agg(cpu_avg=(cpu_column, 'mean'), cpu_max=(cpu_column, 'max'),
+                                          mem_avg_mb=(mem_column, 'mean'), mem_max_mb=(mem_column, 'max'))
+    return summary.rename_axis('node').reset_index()
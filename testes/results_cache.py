@@ -0,0 +1,88 @@
+import os
+import json
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (necessário para pandas.to_parquet/read_parquet)
+    CACHE_AVAILABLE = True
+except ImportError:
+    CACHE_AVAILABLE = False
+
+# Diretório (ao lado dos ficheiros de resultados) onde ficam as versões colunares já processadas.
+CACHE_DIR_NAME = '.report_cache'
+
+_warned = False
+
+def _warn_unavailable():
+    global _warned
+    if not _warned:
+        print("Aviso: pyarrow não está instalado; a cache de resultados está desativada (pip install pyarrow).")
+        _warned = True
+
+def _cache_paths(source, kind):
+    directory = os.path.join(os.path.dirname(os.path.abspath(source)), CACHE_DIR_NAME)
+    prefix = os.path.join(directory, f"{os.path.basename(source)}.{kind}")
+    return directory, prefix
+
+def _source_key(source):
+    """Chave de validade da cache: caminho absoluto, tamanho e data de modificação do ficheiro original."""
+    st = os.stat(source)
+    return {'source': os.path.abspath(source), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+def read_cache(source, kind):
+    """Retorna (frames, attrs) da cache se ela existir e corresponder ao ficheiro atual; caso contrário None."""
+    if not CACHE_AVAILABLE:
+        return None
+    _, prefix = _cache_paths(source, kind)
+    try:
+        with open(prefix + '.json', 'r') as f:
+            meta = json.load(f)
+        if meta.get('key') != _source_key(source):
+            return None
+        frames = {name: pd.read_parquet(f"{prefix}.{name}.parquet") for name in meta['frames']}
+        for name in meta.get('none_frames', []):
+            frames[name] = None
+        return frames, meta.get('attrs', {})
+    except (OSError, ValueError, KeyError):
+        return None
+
+def write_cache(source, kind, frames, attrs=None):
+    """Grava os DataFrames em Parquet e, por último, os metadados que tornam a entrada válida."""
+    if not CACHE_AVAILABLE:
+        _warn_unavailable()
+        return
+    directory, prefix = _cache_paths(source, kind)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        for name, frame in frames.items():
+            if frame is not None:
+                tmp_path = f"{prefix}.{name}.parquet.tmp"
+                frame.to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, f"{prefix}.{name}.parquet")
+        meta = {
+            'key': _source_key(source),
+            'frames': [name for name, frame in frames.items() if frame is not None],
+            'none_frames': [name for name, frame in frames.items() if frame is None],
+            'attrs': attrs or {},
+        }
+        with open(prefix + '.json.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(prefix + '.json.tmp', prefix + '.json')
+    except OSError as e:
+        print(f"  -> Aviso: Não foi possível gravar a cache de {os.path.basename(source)}: {e}")
+
+def cached(source, kind, build, encode, decode):
+    """
+    Retorna o resultado de build(source), reutilizando a cache colunar quando ela ainda é válida.
+    encode(resultado) -> (frames, attrs) serializa o resultado; decode(frames, attrs) reconstrói-o.
+    A cache é invalidada automaticamente quando o tamanho ou a data de modificação do original mudam;
+    'kind' deve mudar sempre que o formato do resultado mudar.
+    """
+    hit = read_cache(source, kind)
+    if hit is not None:
+        return decode(*hit)
+    result = build(source)
+    if result is not None:
+        write_cache(source, kind, *encode(result))
+    return result
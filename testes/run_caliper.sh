@@ -3,6 +3,8 @@
 # --- CONFIGURAÇÕES ---
 NUM_USERS=${1:-5}
 NUM_REPETITIONS=${2:-1}
+# Formato dos relatórios: 'png' (um ficheiro por gráfico) ou 'pdf'/'html' (todas as rodadas num só relatório).
+REPORT_FORMAT=${REPORT_FORMAT:-png}
 
 # --- Adicione o IP da sua VM do Besu aqui ---
 export DOCKER_HOST="tcp://"$(hostname -I | awk '{print $1}')":2375"
@@ -110,7 +112,7 @@ do
 done
 
 cd "$ORIGINAL_DIR"
-python3 generateGraphsCaliper.py "$CALIPER_RUNS_DIR" "$NUM_REPETITIONS"
+python3 generateGraphsCaliper.py "$CALIPER_RUNS_DIR" "$NUM_REPETITIONS" --jobs "$(nproc)" --report "$REPORT_FORMAT"
 
 echo -e "\nExecução do Caliper concluída!"
 echo "Verifique os relatórios HTML gerados no diretório: $CALIPER_RUNS_DIR/"
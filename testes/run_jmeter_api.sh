@@ -10,6 +10,29 @@ API_HOST=$(hostname -I | awk '{print $1}') # IP da VM onde a API está a correr
 # Parâmetros de execução
 NUM_USERS=${1:-5}
 NUM_REPETITIONS=${2:-1}
+# Opcional: taxa de chegada (pedidos/s) para usar o gerador em malha aberta (loadDriver.py) em vez do JMeter.
+# O número de pedidos por rodada é o mesmo que o JMeter enviaria (utilizadores * loops).
+LOAD_RATE=${LOAD_RATE:-}
+# Opcional: ficheiro com LOAD_RATE_OPEN/QUERY/TRANSFER por rodada (ex.: saturation_rates.env do saturationSearch.py),
+# que têm prioridade sobre LOAD_RATE.
+LOAD_RATES_FILE=${LOAD_RATES_FILE:-}
+if [ -n "$LOAD_RATES_FILE" ]; then
+    if [ ! -f "$LOAD_RATES_FILE" ]; then echo "Erro: LOAD_RATES_FILE '$LOAD_RATES_FILE' não existe."; exit 1; fi
+    source "$LOAD_RATES_FILE"
+fi
+LOAD_ARRIVAL=${LOAD_ARRIVAL:-poisson}
+# Opcional: CHAIN_METRICS=1 amostra txpool, altura, gas e peers dos nós Besu durante cada rodada (chainSampler.py).
+CHAIN_METRICS=${CHAIN_METRICS:-0}
+CHAIN_METRICS_RATE=${CHAIN_METRICS_RATE:-1}
+# Distribuição das contas nas transferências (uniform, zipf ou hotspot) e semente do gerador de contas.
+TRANSFER_DISTRIBUTION=${TRANSFER_DISTRIBUTION:-uniform}
+WORKLOAD_SEED=${WORKLOAD_SEED:-42}
+# Recolha de recursos dos containers: 'docker' (docker stats através da API, ~1 Hz) ou 'cgroup'
+# (cgroupCollector.py a ler o cgroup v2 diretamente nesta máquina, a RESOURCE_RATE amostras/s).
+RESOURCE_COLLECTOR=${RESOURCE_COLLECTOR:-docker}
+RESOURCE_RATE=${RESOURCE_RATE:-20}
+# Formato dos relatórios: 'png' (um ficheiro por gráfico) ou 'pdf'/'html' (todas as rodadas num só relatório).
+REPORT_FORMAT=${REPORT_FORMAT:-png}
 
 # Validação do número de usuários
 case $NUM_USERS in
@@ -74,59 +97,18 @@ check_and_install_java() {
 }
 
 generate_caliper_style_accounts_csv() {
-    echo "Gerando arquivos CSV de contas (um por thread)..."
-    local accounts_file="$JMETER_RUNS_DIR/all_accounts.txt"
-    local open_csv_prefix="$JMETER_RUNS_DIR/open_accounts_thread_"
-    local open_csv="$JMETER_RUNS_DIR/open_accounts.csv"
-    local transfer_csv="$JMETER_RUNS_DIR/transfer_accounts.csv"
-    
+    echo "Gerando arquivos CSV de contas (um por thread) e pares de transferência..."
     # Apaga contas antigas para garantir que não haja lixo de execuções anteriores
-    rm -f "${open_csv_prefix}"*
-    rm -f "$accounts_file"
-
-    local accounts_per_thread=$((NUMBER_OF_ACCOUNTS / NUM_USERS))
-
-    node -e "
-        const DICTIONARY = 'abcdefghijklmnopqrstuvwxyz';
-        function get26Num(n) { let result = ''; while(n >= 0) { result = DICTIONARY.charAt(n % DICTIONARY.length) + result; n = Math.floor(n / DICTIONARY.length) - 1; } return result; }
-        const fs = require('fs');
-        
-        let total_accounts = [];
-        let account_index = 0;
-
-        for (let threadNum = 1; threadNum <= ${NUM_USERS}; threadNum++) {
-            const thread_accounts = [];
-            for (let i = 0; i < ${accounts_per_thread}; i++) {
-                const accountName = 'userJmeter' + get26Num(account_index++);
-                thread_accounts.push(accountName);
-                total_accounts.push(accountName);
-            }
-            // Gera um CSV para cada thread
-            fs.writeFileSync(\`${open_csv_prefix}\${threadNum}.csv\`, 'accountId\n' + thread_accounts.join('\n'));
-        }
-
-                // Mantém um arquivo com todas as contas para a lógica de transferência
-        fs.writeFileSync('${accounts_file}', total_accounts.join('\n'));
-        console.log('${NUMBER_OF_ACCOUNTS} contas geradas e divididas em ${NUM_USERS} arquivos.');
-
-        const accounts = [];
-        for (let i = 0; i < ${NUMBER_OF_ACCOUNTS}; i++) { accounts.push('userJmeter' + get26Num(i)); }
-        fs.writeFileSync('${open_csv}', 'accountId\n' + accounts.join('\n'));
-        fs.writeFileSync('${accounts_file}', accounts.join('\n'));
-        console.log('${NUMBER_OF_ACCOUNTS} contas geradas para os testes open');
-    "
-    if [ $? -ne 0 ]; then echo "Erro: Falha ao gerar contas com Node.js."; exit 1; fi
-
-    echo "source_account,target_account" > "$transfer_csv"
-    for ((i=0; i<$TRANSFER_TX_NUMBER; i++)); do
-        source_acc=$(shuf -n 1 "$accounts_file")
-        target_acc=$(shuf -n 1 "$accounts_file")
-        while [[ "$source_acc" == "$target_acc" ]]; do
-            target_acc=$(shuf -n 1 "$accounts_file")
-        done
-        echo "$source_acc,$target_acc" >> "$transfer_csv"
-    done
-    echo "${TRANSFER_TX_NUMBER} pares de transferência gerados."
+    rm -f "$JMETER_RUNS_DIR/open_accounts_thread_"* "$JMETER_RUNS_DIR/all_accounts.txt"
+
+    # Geração vetorizada numa única passagem; a distribuição das transferências e a semente são configuráveis.
+    python3 generateWorkload.py "$JMETER_RUNS_DIR" \
+        --accounts "$NUMBER_OF_ACCOUNTS" \
+        --threads "$NUM_USERS" \
+        --transfers "$TRANSFER_TX_NUMBER" \
+        --distribution "$TRANSFER_DISTRIBUTION" \
+        --seed "$WORKLOAD_SEED"
+    if [ $? -ne 0 ]; then echo "Erro: Falha ao gerar os ficheiros de contas."; exit 1; fi
 }
 
 wait_for_queue_and_check_errors() {
@@ -182,21 +164,48 @@ run_test_and_monitor() {
     local RUN_NUMBER=$3
     local CSV_FILE_PATH=$4
     local IS_WRITE_OPERATION=$5 # Novo parâmetro para saber se é 'open' ou 'transfer'
+    local NUM_SAMPLES=$6 # Número de pedidos da rodada (usado apenas pelo gerador em malha aberta)
 
     local JTL_FILE="$JMETER_RUNS_DIR/results_${ROUND_NAME,,}_run_${RUN_NUMBER}.jtl"
     local DOCKER_STATS_LOG_PATH="$JMETER_RUNS_DIR/docker_stats_${ROUND_NAME,,}_run_${RUN_NUMBER}.log"
 
     echo -e "\n--- Executando Round: $ROUND_NAME (Execução #${RUN_NUMBER}) ---"
 
+    local DOCKER_STATS=true
+    local RESOURCE_COLLECTOR_PID=""
+    if [ "$RESOURCE_COLLECTOR" = "cgroup" ]; then
+        DOCKER_STATS=false
+        python3 cgroupCollector.py "$JMETER_RUNS_DIR/resources_${ROUND_NAME,,}_run_${RUN_NUMBER}.bin" \
+            --rate "$RESOURCE_RATE" --docker "sudo docker" &
+        RESOURCE_COLLECTOR_PID=$!
+    fi
+
     echo "Iniciando monitoramento remoto na API..."
     curl -s -X POST -H "Content-Type: application/json" \
-        -d "{\"roundName\": \"${ROUND_NAME}\", \"runNumber\": \"${RUN_NUMBER}\"}" \
+        -d "{\"roundName\": \"${ROUND_NAME}\", \"runNumber\": \"${RUN_NUMBER}\", \"dockerStats\": ${DOCKER_STATS}}" \
         http://${API_HOST}:3000/monitor/start
 
+    local CHAIN_SAMPLER_PID=""
+    if [ "$CHAIN_METRICS" = "1" ]; then
+        python3 chainSampler.py "$JMETER_RUNS_DIR/chain_metrics_${ROUND_NAME,,}_run_${RUN_NUMBER}.csv" \
+            --host "$API_HOST" --rate "$CHAIN_METRICS_RATE" &
+        CHAIN_SAMPLER_PID=$!
+    fi
+
     echo "Usando arquivo de dados: $CSV_FILE_PATH"
-    "$JMETER_HOME/jmeter" -n -t "$JMX_FILE" -l "$JTL_FILE" \
-        -JcsvDataFile="$CSV_FILE_PATH" \
-        -JapiHost="$API_HOST"
+    local RATE_VAR="LOAD_RATE_${ROUND_NAME^^}"
+    local ROUND_RATE="${!RATE_VAR:-$LOAD_RATE}"
+    if [ -n "$ROUND_RATE" ]; then
+        # O gerador lê um único CSV; na rodada query usa o ficheiro com todas as contas abertas.
+        local DRIVER_CSV="$CSV_FILE_PATH"
+        if [ "${ROUND_NAME,,}" = "query" ]; then DRIVER_CSV="$JMETER_RUNS_DIR/open_accounts.csv"; fi
+        python3 loadDriver.py "http://${API_HOST}:3000" "${ROUND_NAME,,}" "$DRIVER_CSV" \
+            --rate "$ROUND_RATE" --arrival "$LOAD_ARRIVAL" --requests "$NUM_SAMPLES" --output "$JTL_FILE"
+    else
+        "$JMETER_HOME/jmeter" -n -t "$JMX_FILE" -l "$JTL_FILE" \
+            -JcsvDataFile="$CSV_FILE_PATH" \
+            -JapiHost="$API_HOST"
+    fi
 
     echo "Parando monitoramento remoto na API..."
     curl -s -X POST -H "Content-Type: application/json" \
@@ -208,8 +217,24 @@ run_test_and_monitor() {
         wait_for_queue_and_check_errors "$ROUND_NAME" "$RUN_NUMBER"
     fi
 
-    echo "A descarregar o ficheiro de log de monitoramento..."
-    curl -s -o "$DOCKER_STATS_LOG_PATH" "http://${API_HOST}:3000/monitor/logs/${ROUND_NAME}/${RUN_NUMBER}"
+    # A amostragem da cadeia só termina depois de a fila da API esvaziar, para incluir a cauda da rodada.
+    if [ -n "$CHAIN_SAMPLER_PID" ]; then
+        kill -TERM "$CHAIN_SAMPLER_PID" && wait "$CHAIN_SAMPLER_PID"
+    fi
+
+    if [ -n "$RESOURCE_COLLECTOR_PID" ]; then
+        kill -TERM "$RESOURCE_COLLECTOR_PID" && wait "$RESOURCE_COLLECTOR_PID"
+    else
+        echo "A descarregar o ficheiro de log de monitoramento..."
+        curl -s -o "$DOCKER_STATS_LOG_PATH" "http://${API_HOST}:3000/monitor/logs/${ROUND_NAME}/${RUN_NUMBER}"
+    fi
+
+    # Tempos por etapa de cada pedido (fila, lock do nonce, assinatura, envio), se a API os estiver a gravar.
+    local STAGE_TIMINGS_PATH="$JMETER_RUNS_DIR/stage_timings_${ROUND_NAME,,}_run_${RUN_NUMBER}.ndjson"
+    if ! curl -s -f -o "$STAGE_TIMINGS_PATH" "http://${API_HOST}:3000/monitor/timings/${ROUND_NAME}/${RUN_NUMBER}"; then
+        echo "Aviso: a API não tem tempos por etapa para ${ROUND_NAME} #${RUN_NUMBER} (STAGE_TIMING=0?)."
+        rm -f "$STAGE_TIMINGS_PATH"
+    fi
 }
 
 # --- LÓGICA PRINCIPAL ---
@@ -248,15 +273,18 @@ for (( i=1; i<=$NUM_REPETITIONS; i++ ))
 do
     echo -e "\n--- Iniciando Execução JMeter #$i de $NUM_REPETITIONS ---"
     
-    # run_test_and_monitor <jmx_file> <round_name> <run_number> <csv_file> <is_write_operation>
-    run_test_and_monitor "$JMX_OPEN" "Open" "$i" "$JMETER_RUNS_DIR/open_accounts.csv" true
-    run_test_and_monitor "$JMX_QUERY" "Query" "$i" "$JMETER_RUNS_DIR/open_accounts_thread_" false
-    run_test_and_monitor "$JMX_TRANSFER" "Transfer" "$i" "$JMETER_RUNS_DIR/transfer_accounts.csv" true
+    # run_test_and_monitor <jmx_file> <round_name> <run_number> <csv_file> <is_write_operation> <num_samples>
+    run_test_and_monitor "$JMX_OPEN" "Open" "$i" "$JMETER_RUNS_DIR/open_accounts.csv" true $((NUM_USERS * OPEN_LOOPS))
+    run_test_and_monitor "$JMX_QUERY" "Query" "$i" "$JMETER_RUNS_DIR/open_accounts_thread_" false $((NUM_USERS * QUERY_LOOPS))
+    run_test_and_monitor "$JMX_TRANSFER" "Transfer" "$i" "$JMETER_RUNS_DIR/transfer_accounts.csv" true $((NUM_USERS * TRANSFER_LOOPS))
 
 done
 
 echo -e "\n--- Gerando gráficos e relatórios consolidados de todas as execuções... ---"
-python3 generateGraphs.py "$JMETER_RUNS_DIR"
+python3 generateGraphs.py "$JMETER_RUNS_DIR" --jobs "$(nproc)" --report "$REPORT_FORMAT"
+if ls "$JMETER_RUNS_DIR"/stage_timings_*.ndjson > /dev/null 2>&1; then
+    python3 stageTimings.py "$JMETER_RUNS_DIR"
+fi
 
 echo -e "\nExecução do JMeter concluída!"
 echo "Verifique os relatórios e gráficos gerados no diretório: $JMETER_RUNS_DIR/"
\ No newline at end of file
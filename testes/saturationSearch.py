@@ -0,0 +1,392 @@
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+import numpy as np
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from async_http import HttpError, HttpPool
+from loadDriver import DEFAULT_AMOUNTS, JtlWriter, LoadDriver, read_rows
+
+try:
+    import uvloop  # opcional: reduz o custo por pedido do ciclo de eventos
+except ImportError:
+    uvloop = None
+
+# Ficheiro de dados de cada rodada, dentro do diretório gerado pelo generateWorkload.py.
+ROUND_DATA = {'open': 'open_accounts.csv', 'query': 'open_accounts.csv', 'transfer': 'transfer_accounts.csv'}
+ROUND_ORDER = ['open', 'query', 'transfer']
+# Janela (s) sem pedidos entre o fim de um patamar e o início do seguinte, depois de a fila da API esvaziar.
+SETTLE_S = 2.0
+
+class StepRecorder:
+    """Guarda (instante previsto, latência, sucesso) de cada pedido de um patamar e, opcionalmente, grava o JTL."""
+    def __init__(self, jtl_writer=None):
+        self.jtl_writer = jtl_writer
+        self.timestamps = []
+        self.latencies = []
+        self.successes = []
+
+    def add(self, row):
+        self.timestamps.append(row[0])
+        self.latencies.append(row[1])
+        self.successes.append(row[6] == 'true')
+        if self.jtl_writer is not None:
+            self.jtl_writer.add(row)
+
+    def arrays(self):
+        return (np.asarray(self.timestamps, dtype='int64'), np.asarray(self.latencies, dtype='int64'),
+                np.asarray(self.successes, dtype=bool))
+
+    def close(self):
+        if self.jtl_writer is not None:
+            self.jtl_writer.close()
+
+async def poll_queue(control, samples, stop, interval):
+    """Amostra /queue/status (instante, trabalhos na fila, workers ativos) até 'stop' ser assinalado."""
+    while not stop.is_set():
+        try:
+            status, body = await control.get_json('/queue/status', timeout=interval * 5)
+            if status == 200 and body:
+                samples.append((time.time(), body.get('queueSize', 0), body.get('activeWorkers', 0)))
+        except (OSError, asyncio.TimeoutError, ValueError, HttpError):
+            pass
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+
+async def wait_for_idle(control, timeout, interval=0.5):
+    """Espera até a fila da API esvaziar; retorna o tempo de espera (s) ou None se não esvaziou a tempo."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            status, body = await control.get_json('/queue/status', timeout=5)
+            if status == 200 and body and body.get('isIdle'):
+                return time.perf_counter() - start
+        except (OSError, asyncio.TimeoutError, ValueError, HttpError):
+            pass
+        await asyncio.sleep(interval)
+    return None
+
+async def backend_error_count(control):
+    try:
+        status, body = await control.get_json('/errors/get', timeout=10)
+        return len(body.get('errors', [])) if status == 200 and body else 0
+    except (OSError, asyncio.TimeoutError, ValueError, HttpError):
+        return 0
+
+def rolling_percentile(offsets_s, latencies, start_s, end_s, window_s, q):
+    """Percentil q da latência em janelas deslizantes de 'window_s' (passo de 1 s) entre start_s e end_s."""
+    starts = np.arange(start_s, max(end_s - window_s, start_s) + 1e-9, 1.0)
+    order = np.argsort(offsets_s, kind='stable')
+    offsets_s, latencies = offsets_s[order], latencies[order]
+    values = []
+    for window_start in starts:
+        lo, hi = np.searchsorted(offsets_s, [window_start, window_start + window_s])
+        if hi > lo:
+            values.append(float(np.percentile(latencies[lo:hi], q)))
+    return values
+
+def backlog_growth(queue_samples, start_wall, from_s, to_s):
+    """Inclinação (trabalhos/s) da profundidade da fila na janela de medição, por regressão linear."""
+    points = [(t - start_wall, queued + active) for t, queued, active in queue_samples if from_s <= t - start_wall <= to_s]
+    if len(points) < 3:
+        return 0.0
+    t, depth = np.array(points, dtype='float64').T
+    return float(np.polyfit(t, depth, 1)[0])
+
+def evaluate_step(rate, recorder, driver, queue_samples, start_wall, backend_errors, drain_s, args):
+    """Métricas de um patamar na janela de medição (após o aquecimento) e os motivos de falha, se os houver."""
+    timestamps, latencies, successes = recorder.arrays()
+    offsets_s = timestamps / 1000 - start_wall
+    in_window = offsets_s >= args.warmup
+    measured = int(in_window.sum())
+    window_s = max(args.hold - args.warmup, 1e-9)
+    # Carga efetivamente oferecida (chegadas escalonadas na janela) e throughput pelas respostas concluídas na
+    # janela: num sistema saturado as conclusões ficam limitadas à capacidade, mesmo que todas acabem por ter sucesso.
+    scheduled = measured / window_s
+    completed_s = offsets_s + latencies / 1000
+    achieved = float((successes & (completed_s >= args.warmup) & (completed_s < args.hold)).sum()) / window_s
+    http_errors = int((~successes).sum())
+    error_rate = (http_errors + backend_errors) / len(timestamps) if len(timestamps) else 1.0
+    rolling_p99 = rolling_percentile(offsets_s[in_window], latencies[in_window], args.warmup, args.hold, args.window, 99)
+    final_backlog = (queue_samples[-1][1] + queue_samples[-1][2]) if queue_samples else 0
+    growth = backlog_growth(queue_samples, start_wall, args.warmup, args.hold)
+
+    step = {
+        'offered_tps': rate,
+        'scheduled_tps': round(scheduled, 2),
+        'achieved_tps': round(achieved, 2),
+        'requests': len(timestamps),
+        'measured_requests': measured,
+        'http_errors': http_errors,
+        'backend_errors': backend_errors,
+        'error_rate': round(error_rate, 5),
+        'latency_p50_ms': float(np.percentile(latencies[in_window], 50)) if measured else None,
+        'latency_p99_ms': float(np.percentile(latencies[in_window], 99)) if measured else None,
+        'max_rolling_p99_ms': max(rolling_p99) if rolling_p99 else None,
+        'final_backlog': int(final_backlog),
+        'max_backlog': int(max((q + a for _, q, a in queue_samples), default=0)),
+        'backlog_growth_per_s': round(growth, 3),
+        'drain_s': round(drain_s, 2) if drain_s is not None else None,
+        'driver_max_lag_ms': round(driver.max_lag * 1000, 1),
+    }
+    reasons = []
+    if not measured:
+        reasons.append("nenhum pedido na janela de medição")
+    if step['max_rolling_p99_ms'] is not None and step['max_rolling_p99_ms'] > args.slo_p99_ms:
+        reasons.append(f"p99 deslizante {step['max_rolling_p99_ms']:.0f} ms > SLO {args.slo_p99_ms:g} ms")
+    if error_rate > args.max_error_rate:
+        reasons.append(f"taxa de erros {error_rate:.2%} > {args.max_error_rate:.2%}")
+    if achieved < scheduled * args.min_throughput_ratio:
+        reasons.append(f"throughput {achieved:.1f} TPS < {args.min_throughput_ratio:.0%} da carga oferecida ({scheduled:.1f} TPS)")
+    if growth > args.max_backlog_growth:
+        reasons.append(f"fila a crescer {growth:.1f} trabalhos/s")
+    if final_backlog > args.max_backlog:
+        reasons.append(f"fila com {final_backlog} trabalhos no fim do patamar (> {args.max_backlog})")
+    if drain_s is None:
+        reasons.append(f"fila não esvaziou em {args.drain_timeout:g} s")
+    if driver.max_lag > 0.1:
+        # Não invalida o patamar, mas indica que o próprio gerador pode ser o limite.
+        step['warning'] = "o gerador atrasou-se mais de 100 ms face ao escalonamento"
+    step['sustainable'] = not reasons
+    step['reasons'] = reasons
+    return step
+
+class SaturationSearch:
+    """Executa patamares de carga constante para uma rodada e procura a maior taxa que cumpre os critérios."""
+    def __init__(self, args, round_name, rows, control):
+        self.args = args
+        self.round_name = round_name
+        self.rows = rows
+        self.control = control
+        self.offset = 0
+        self.steps = []
+
+    async def run_step(self, rate):
+        args = self.args
+        # Cada patamar continua nas linhas seguintes do CSV (ex.: contas novas na rodada open).
+        rows = self.rows[self.offset:] + self.rows[:self.offset]
+        jtl_writer = None
+        if args.jtl_dir:
+            jtl_writer = JtlWriter(os.path.join(args.jtl_dir, f"results_{self.round_name}_rate_{rate:g}.jtl"))
+        recorder = StepRecorder(jtl_writer)
+        amount = DEFAULT_AMOUNTS[self.round_name]
+        await self.control.post_json('/errors/clear', {})
+
+        queue_samples = []
+        stop = asyncio.Event()
+        print(f"  -> {self.round_name}: patamar de {rate:g} TPS durante {args.hold:g} s...")
+        start_wall = time.time()
+        monitor = asyncio.ensure_future(poll_queue(self.control, queue_samples, stop, args.poll_interval))
+        try:
+            async with HttpPool(args.api_url, size=args.connections, timeout=args.timeout) as pool:
+                driver = LoadDriver(pool, self.round_name, rows, amount, recorder, args.timeout)
+                await driver.run(rate, args.arrival, args.hold, None, args.seed + len(self.steps))
+        finally:
+            stop.set()
+            await monitor
+            recorder.close()
+        self.offset = (self.offset + driver.sent) % len(self.rows)
+
+        drain_s = await wait_for_idle(self.control, args.drain_timeout)
+        backend_errors = await backend_error_count(self.control)
+        step = evaluate_step(rate, recorder, driver, queue_samples, start_wall, backend_errors, drain_s, args)
+        self.steps.append(step)
+        verdict = "sustentável" if step['sustainable'] else "NÃO sustentável: " + "; ".join(step['reasons'])
+        p99 = step['max_rolling_p99_ms']
+        print(f"     {step['achieved_tps']:.1f} TPS, p99 deslizante máx. {p99 if p99 is not None else float('nan'):.0f} ms, "
+              f"erros {step['error_rate']:.2%}, fila final {step['final_backlog']} -> {verdict}")
+        await asyncio.sleep(SETTLE_S)
+        return step['sustainable']
+
+    async def step_search(self):
+        """Aumenta a carga em passos fixos até ao primeiro patamar não sustentável (o joelho)."""
+        args = self.args
+        rate = args.start_rate
+        while rate <= args.max_rate:
+            if not await self.run_step(rate):
+                break
+            rate = rate * args.factor if args.factor else rate + args.step
+
+    async def binary_search(self):
+        """Bisseção entre --start-rate (tem de ser sustentável) e --max-rate até à precisão pedida."""
+        args = self.args
+        if not await self.run_step(args.start_rate):
+            return
+        lo, hi = args.start_rate, args.max_rate
+        while (hi - lo) > args.precision * lo:
+            mid = round((lo + hi) / 2, 2)
+            if await self.run_step(mid):
+                lo = mid
+            else:
+                hi = mid
+
+    def report(self):
+        passing = [s for s in self.steps if s['sustainable']]
+        failing = [s for s in self.steps if not s['sustainable']]
+        best = max(passing, key=lambda s: s['offered_tps']) if passing else None
+        knee = min((s for s in failing if not best or s['offered_tps'] > best['offered_tps']),
+                   key=lambda s: s['offered_tps'], default=None)
+        return {
+            'max_sustainable_tps': best['offered_tps'] if best else None,
+            'achieved_tps_at_max': best['achieved_tps'] if best else None,
+            'knee_tps': knee['offered_tps'] if knee else None,
+            'knee_reasons': knee['reasons'] if knee else [],
+            # Sem patamar a falhar acima do máximo, o limite real pode estar acima de --max-rate.
+            'limit_reached': knee is not None,
+            'steps': self.steps,
+        }
+
+def plot_saturation(round_name, result, slo_ms, output_path):
+    steps = sorted(result['steps'], key=lambda s: s['offered_tps'])
+    if not steps:
+        return
+    offered = [s['offered_tps'] for s in steps]
+    fig, (ax_tps, ax_latency) = plt.subplots(2, 1, figsize=(12, 9), sharex=True)
+    ax_tps.plot(offered, offered, color='gray', linestyle=':', label='Ideal (atingido = oferecido)')
+    ax_tps.plot(offered, [s['achieved_tps'] for s in steps], marker='o', label='Throughput atingido')
+    ax_latency.plot(offered, [s['max_rolling_p99_ms'] for s in steps], marker='o', color='red', label='p99 deslizante máximo')
+    ax_latency.plot(offered, [s['latency_p50_ms'] for s in steps], marker='.', color='tab:blue', label='p50')
+    ax_latency.axhline(slo_ms, color='black', linestyle='--', label=f'SLO p99 ({slo_ms:g} ms)')
+    for s in steps:
+        if not s['sustainable']:
+            ax_tps.plot(s['offered_tps'], s['achieved_tps'], 'x', color='red', markersize=10)
+    for ax in (ax_tps, ax_latency):
+        if result['max_sustainable_tps'] is not None:
+            ax.axvline(result['max_sustainable_tps'], color='green', linestyle='--', alpha=0.7)
+        ax.grid(True)
+        ax.legend()
+    ax_tps.set_title(f"Procura de Saturação - {round_name} (máximo sustentável: {result['max_sustainable_tps']} TPS)")
+    ax_tps.set_ylabel('TPS')
+    ax_latency.set_ylabel('Latência (ms)')
+    ax_latency.set_xlabel('Carga oferecida (TPS)')
+    fig.savefig(os.path.join(output_path, f"SATURATION_{round_name}.png"))
+    plt.close(fig)
+
+def update_caliper_config(config_path, rates, output):
+    """
+    Copia o config.yaml do Caliper com o 'tps' de cada ronda substituído pelo máximo sustentável encontrado.
+    A edição é feita linha a linha para preservar as âncoras e os comentários do YAML.
+    """
+    with open(config_path) as f:
+        lines = f.read().split('\n')
+    current = None
+    for i, line in enumerate(lines):
+        label = re.match(r'\s*-\s*label:\s*(\S+)', line)
+        if label:
+            current = label.group(1)
+            continue
+        tps = re.match(r'(\s*tps:\s*)\S+', line)
+        if tps and current in rates and rates[current] is not None:
+            lines[i] = f"{tps.group(1)}{rates[current]:g}"
+            current = None
+    with open(output, 'w') as f:
+        f.write('\n'.join(lines))
+
+async def run_search(args):
+    results = {}
+    opened = None
+    async with HttpPool(args.api_url, size=2, timeout=10) as control:
+        for round_name in args.rounds:
+            rows = read_rows(os.path.join(args.data_dir, ROUND_DATA[round_name]))
+            if round_name == 'query' and opened is not None:
+                # Apenas as contas efetivamente abertas pela procura da rodada open.
+                rows = rows[:max(opened, 1)]
+            print(f"\n--- Procura de saturação: {round_name} ({args.mode}) ---")
+            search = SaturationSearch(args, round_name, rows, control)
+            if args.mode == 'binary':
+                await search.binary_search()
+            else:
+                await search.step_search()
+            if round_name == 'open':
+                opened = min(sum(s['requests'] for s in search.steps), len(rows))
+            results[round_name] = search.report()
+            plot_saturation(round_name, results[round_name], args.slo_p99_ms, args.output)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Procura automática da carga máxima sustentável da API por rodada: aplica patamares de carga "
+                    "constante (em malha aberta) e avalia o p99 deslizante, a taxa de erros (/errors/get) e a fila "
+                    "(/queue/status), parando no joelho da curva.")
+    parser.add_argument('api_url', help="URL base da API, ex.: http://localhost:3000")
+    parser.add_argument('data_dir', help="Diretório com open_accounts.csv e transfer_accounts.csv (generateWorkload.py)")
+    parser.add_argument('--rounds', nargs='+', choices=ROUND_ORDER, default=ROUND_ORDER, help="Rodadas a avaliar, por esta ordem")
+    parser.add_argument('--mode', choices=['step', 'binary'], default='step', help="Patamares crescentes ou bisseção")
+    parser.add_argument('--start-rate', type=float, default=10.0, help="Primeira carga (TPS)")
+    parser.add_argument('--step', type=float, default=10.0, help="Incremento (TPS) entre patamares no modo step")
+    parser.add_argument('--factor', type=float, help="No modo step, multiplica a carga por este fator em vez de somar --step")
+    parser.add_argument('--max-rate', type=float, default=1000.0, help="Carga máxima a experimentar (TPS)")
+    parser.add_argument('--precision', type=float, default=0.05, help="Modo binary: para quando o intervalo for menor que esta fração")
+    parser.add_argument('--hold', type=float, default=60.0, help="Duração de cada patamar (s)")
+    parser.add_argument('--warmup', type=float, default=10.0, help="Segundos iniciais de cada patamar excluídos da avaliação")
+    parser.add_argument('--window', type=float, default=10.0, help="Janela (s) do p99 deslizante")
+    parser.add_argument('--slo-p99-ms', type=float, default=1000.0, help="Latência p99 máxima admitida (ms)")
+    parser.add_argument('--max-error-rate', type=float, default=0.01, help="Fração máxima de erros (HTTP + assíncronos)")
+    parser.add_argument('--min-throughput-ratio', type=float, default=0.95, help="Throughput mínimo, como fração da carga oferecida")
+    parser.add_argument('--max-backlog', type=int, default=100, help="Trabalhos máximos na fila da API no fim do patamar")
+    parser.add_argument('--max-backlog-growth', type=float, default=1.0, help="Crescimento máximo da fila (trabalhos/s)")
+    parser.add_argument('--drain-timeout', type=float, default=120.0, help="Tempo máximo (s) à espera que a fila esvazie entre patamares")
+    parser.add_argument('--poll-interval', type=float, default=1.0, help="Intervalo (s) entre consultas a /queue/status")
+    parser.add_argument('--arrival', choices=['fixed', 'poisson'], default='poisson', help="Distribuição das chegadas")
+    parser.add_argument('--connections', type=int, default=64, help="Ligações keep-alive do gerador de carga")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Timeout por pedido (s)")
+    parser.add_argument('--seed', type=int, default=0, help="Semente das chegadas de Poisson")
+    parser.add_argument('--jtl-dir', help="Grava o JTL de cada patamar neste diretório")
+    parser.add_argument('--caliper-config', help="config.yaml do Caliper a atualizar com os TPS encontrados")
+    parser.add_argument('--output', default='.', help="Diretório do relatório (saturation_report.json, SATURATION_*.png)")
+    args = parser.parse_args()
+
+    if args.start_rate <= 0 or args.max_rate < args.start_rate:
+        parser.error("é preciso 0 < --start-rate <= --max-rate")
+    if args.factor is not None and args.factor <= 1:
+        parser.error("--factor deve ser maior que 1")
+    if args.warmup >= args.hold:
+        parser.error("--warmup deve ser menor que --hold")
+    os.makedirs(args.output, exist_ok=True)
+    if args.jtl_dir:
+        os.makedirs(args.jtl_dir, exist_ok=True)
+
+    if uvloop is not None:
+        uvloop.install()
+    try:
+        results = asyncio.run(run_search(args))
+    except (OSError, HttpError) as e:
+        print(f"Erro: não foi possível comunicar com a API ({e}).")
+        sys.exit(1)
+
+    report = {
+        'criteria': {'slo_p99_ms': args.slo_p99_ms, 'window_s': args.window, 'max_error_rate': args.max_error_rate,
+                     'min_throughput_ratio': args.min_throughput_ratio, 'max_backlog': args.max_backlog,
+                     'max_backlog_growth': args.max_backlog_growth, 'hold_s': args.hold, 'warmup_s': args.warmup},
+        'rounds': results,
+    }
+    with open(os.path.join(args.output, 'saturation_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    # Taxas por rodada no formato lido pelo run_jmeter_api.sh (LOAD_RATES_FILE).
+    with open(os.path.join(args.output, 'saturation_rates.env'), 'w') as f:
+        for round_name, result in results.items():
+            if result['max_sustainable_tps'] is not None:
+                f.write(f"LOAD_RATE_{round_name.upper()}={result['max_sustainable_tps']:g}\n")
+    if args.caliper_config:
+        output = os.path.join(args.output, 'config_saturation.yaml')
+        update_caliper_config(args.caliper_config, {r: res['max_sustainable_tps'] for r, res in results.items()}, output)
+        print(f"config.yaml do Caliper com os TPS encontrados gravado em {output}")
+
+    print("\n--- Carga máxima sustentável ---")
+    for round_name, result in results.items():
+        limit = "" if result['limit_reached'] else f" (sem joelho até {args.max_rate:g} TPS)"
+        knee = f"; joelho a {result['knee_tps']:g} TPS: {'; '.join(result['knee_reasons'])}" if result['knee_tps'] else ""
+        print(f"  {round_name}: {result['max_sustainable_tps']} TPS{limit}{knee}")
+    print(f"Relatório gravado em {os.path.join(args.output, 'saturation_report.json')}")
+
+if __name__ == "__main__":
+    main()
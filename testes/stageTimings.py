@@ -0,0 +1,178 @@
+import os
+import sys
+import glob
+import argparse
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from latency_histogram import PERCENTILES, percentile_label
+
+# Etapas registadas pela API (api_load_balancer.js) para cada pedido, pela ordem em que acontecem.
+# As escritas passam pela fila, pelo lock do nonce, pela preparação, assinatura e envio; as leituras só têm call_ms.
+STAGES = ['queue_ms', 'nonce_ms', 'prepare_ms', 'sign_ms', 'send_ms', 'call_ms']
+STAGE_LABELS = {
+    'queue_ms': 'Espera na fila',
+    'nonce_ms': 'Lock do nonce',
+    'prepare_ms': 'Preparação (gas/chainId)',
+    'sign_ms': 'Assinatura',
+    'send_ms': 'Envio ao nó',
+    'call_ms': 'Chamada (eth_call)',
+}
+# Linhas lidas de cada vez do NDJSON.
+CHUNK_SIZE = 200_000
+
+def load_stage_timings(path, chunk_size=CHUNK_SIZE):
+    """
+    Lê um ficheiro stage_timings_*.ndjson e retorna (pedidos, fila): um DataFrame com uma linha por pedido
+    e outro com as amostras da profundidade da fila.
+    """
+    jobs, queue = [], []
+    with pd.read_json(path, lines=True, chunksize=chunk_size, dtype=False) as reader:
+        for chunk in reader:
+            if 'type' not in chunk:
+                continue
+            jobs.append(chunk[chunk['type'] == 'job'])
+            queue.append(chunk[chunk['type'] == 'queue'])
+    jobs_df = pd.concat(jobs, ignore_index=True) if jobs else pd.DataFrame()
+    queue_df = pd.concat(queue, ignore_index=True) if queue else pd.DataFrame()
+    for column in STAGES + ['total_ms']:
+        jobs_df[column] = pd.to_numeric(jobs_df[column], errors='coerce') if column in jobs_df else np.nan
+    if not jobs_df.empty:
+        jobs_df['ok'] = jobs_df['ok'].fillna(False).astype(bool)
+        jobs_df['node'] = jobs_df['node'].fillna('n/d')
+    return jobs_df, queue_df.reindex(columns=['ts', 'queued', 'active', 'run'])
+
+def align_times(jobs_df, queue_df):
+    """Acrescenta a coluna 'time' (s desde o primeiro pedido aceite) a ambos os DataFrames."""
+    if jobs_df.empty:
+        return jobs_df, queue_df
+    origin = jobs_df['accepted_at'].min()
+    jobs_df = jobs_df.assign(time=(jobs_df['accepted_at'] - origin) / 1000)
+    queue_df = queue_df.assign(time=(queue_df['ts'] - origin) / 1000)
+    return jobs_df, queue_df
+
+def present_stages(jobs_df):
+    return [stage for stage in STAGES if jobs_df[stage].notna().any()]
+
+def stage_summary(jobs_df):
+    """
+    Decomposição da latência por operação e por nó (mais uma linha 'todos' por operação): número de pedidos,
+    falhas, média e percentis de cada etapa e a fração do tempo total médio gasto em cada uma.
+    """
+    rows = []
+    for operation, group in jobs_df.groupby('op'):
+        stages = present_stages(group)
+        for node, node_group in [('todos', group)] + list(group.groupby('node')):
+            row = {'operation': operation, 'node': node, 'requests': len(node_group),
+                   'errors': int((~node_group['ok']).sum())}
+            total_mean = node_group['total_ms'].mean()
+            for column in stages + ['total_ms']:
+                values = node_group[column].dropna()
+                row[f'{column}_mean'] = values.mean() if len(values) else np.nan
+                for q in PERCENTILES:
+                    row[f'{column}_{percentile_label(q)}'] = values.quantile(q / 100) if len(values) else np.nan
+                if column != 'total_ms':
+                    row[f'{column}_share'] = row[f'{column}_mean'] / total_mean if total_mean else np.nan
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+def stage_timeline(jobs_df, bucket_s):
+    """Média de cada etapa por intervalo de 'bucket_s' segundos (pela hora de aceitação do pedido)."""
+    stages = present_stages(jobs_df)
+    bucket = (jobs_df['time'] // bucket_s) * bucket_s
+    return jobs_df.groupby(bucket)[stages].mean().fillna(0)
+
+def node_timeline(jobs_df, bucket_s, column):
+    """Média de uma etapa por nó e por intervalo de tempo (uma coluna por nó)."""
+    bucket = (jobs_df['time'] // bucket_s) * bucket_s
+    return jobs_df.groupby([bucket, 'node'])[column].mean().unstack('node')
+
+def plot_stage_breakdown(jobs_df, queue_df, name, bucket_s, output_path):
+    """Etapas empilhadas ao longo do tempo, a etapa de rede por nó e a profundidade da fila."""
+    stages = present_stages(jobs_df)
+    if not stages:
+        return None
+    network_stage = 'send_ms' if 'send_ms' in stages else 'call_ms' if 'call_ms' in stages else stages[-1]
+    has_queue = not queue_df.empty
+    panels = 3 if has_queue else 2
+    fig, axes = plt.subplots(panels, 1, figsize=(14, 4 * panels), sharex=True)
+
+    timeline = stage_timeline(jobs_df, bucket_s)
+    axes[0].stackplot(timeline.index, *(timeline[stage] for stage in stages),
+                      labels=[STAGE_LABELS[stage] for stage in stages], alpha=0.8)
+    axes[0].set_title(f'Decomposição da Latência por Etapa - {name}')
+    axes[0].set_ylabel('Tempo médio (ms)')
+    axes[0].grid(True)
+    axes[0].legend(loc='upper left')
+
+    per_node = node_timeline(jobs_df, bucket_s, network_stage)
+    for node in per_node.columns:
+        axes[1].plot(per_node.index, per_node[node], marker='.', label=node)
+    axes[1].set_title(f'{STAGE_LABELS[network_stage]} por Nó')
+    axes[1].set_ylabel('Tempo médio (ms)')
+    axes[1].grid(True)
+    axes[1].legend(loc='upper left')
+
+    if has_queue:
+        axes[2].step(queue_df['time'], queue_df['queued'], where='post', label='Na fila')
+        axes[2].step(queue_df['time'], queue_df['active'], where='post', label='Workers ativos')
+        axes[2].set_title('Profundidade da Fila de Escrita')
+        axes[2].set_ylabel('Trabalhos')
+        axes[2].grid(True)
+        axes[2].legend(loc='upper left')
+    axes[-1].set_xlabel('Tempo (segundos)')
+
+    fig.tight_layout()
+    image = os.path.join(output_path, f'STAGES_{name}.png')
+    fig.savefig(image)
+    plt.close(fig)
+    return image
+
+def print_summary(summary):
+    for _, row in summary[summary['node'] == 'todos'].iterrows():
+        parts = []
+        for stage in STAGES:
+            if f'{stage}_share' in row and pd.notna(row[f'{stage}_mean']):
+                parts.append(f"{STAGE_LABELS[stage]}: {row[f'{stage}_mean']:.2f} ms ({row[f'{stage}_share']:.0%})")
+        print(f"  -> {row['operation']}: {row['requests']} pedidos, {row['errors']} falhas, "
+              f"total médio {row['total_ms_mean']:.2f} ms | " + '; '.join(parts))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Decompõe a latência da API por etapa (fila, lock do nonce, preparação, assinatura, envio) e por nó, "
+                    "a partir dos ficheiros stage_timings_<rodada>_run_<N>.ndjson gravados pela api_load_balancer.js.")
+    parser.add_argument('inputs', nargs='+', help="Ficheiros .ndjson ou diretórios com stage_timings_*.ndjson")
+    parser.add_argument('--output', help="Diretório dos relatórios (por omissão, o diretório de cada ficheiro)")
+    parser.add_argument('--bucket', type=float, default=1.0, help="Intervalo (s) para as médias ao longo do tempo")
+    args = parser.parse_args()
+
+    files = []
+    for path in args.inputs:
+        files += sorted(glob.glob(os.path.join(path, 'stage_timings_*.ndjson'))) if os.path.isdir(path) else [path]
+    if not files:
+        print("Erro: nenhum ficheiro stage_timings_*.ndjson encontrado.")
+        sys.exit(1)
+
+    for path in files:
+        name = os.path.basename(path)[len('stage_timings_'):].rsplit('.', 1)[0] \
+            if os.path.basename(path).startswith('stage_timings_') else os.path.splitext(os.path.basename(path))[0]
+        output_path = args.output or os.path.dirname(os.path.abspath(path))
+        os.makedirs(output_path, exist_ok=True)
+        jobs_df, queue_df = align_times(*load_stage_timings(path))
+        if jobs_df.empty:
+            print(f"Aviso: {path} não tem registos de pedidos.")
+            continue
+        print(f"\n--- {name}: {len(jobs_df)} pedidos, {len(queue_df)} amostras da fila ---")
+        summary = stage_summary(jobs_df)
+        summary.to_csv(os.path.join(output_path, f'stage_summary_{name}.csv'), index=False, float_format='%.3f')
+        print_summary(summary)
+        image = plot_stage_breakdown(jobs_df, queue_df, name, args.bucket, output_path)
+        if image:
+            print(f"Gráfico gravado em {image}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import numpy as np
+
+# Tamanho dos lotes do MSER (MSER-5) e duração mínima (s) de uma execução para se procurar uma janela estável.
+MSER_BATCH = 5
+MIN_DURATION_S = 20
+
+def mser_truncation(values, batch=MSER_BATCH, band=3.0):
+    """
+    Regra MSER-b (Marginal Standard Error Rule) sobre médias de lotes de 'batch' pontos: número de pontos iniciais
+    a descartar que minimiza o erro padrão marginal da média do resto, var(resto) / len(resto). Como é habitual
+    no MSER, o corte nunca passa de metade da série.
+    Em séries curtas o mínimo do MSER cai muitas vezes sobre ruído; por isso o corte recua, lote a lote, enquanto
+    a média do lote que seria descartado ainda estiver dentro da banda do regime estável (mediana do resto ±
+    'band' desvios-padrão robustos), e depois ponto a ponto dentro do lote de fronteira. Só a fase realmente
+    transitória é cortada.
+    """
+    x = np.asarray(values, dtype='float64')
+    n_batches = len(x) // batch
+    if n_batches < 4:
+        return 0
+    means = x[:n_batches * batch].reshape(n_batches, batch).mean(axis=1)
+    # Soma e soma dos quadrados de cada sufixo (lote d até ao fim).
+    suffix_sum = np.cumsum(means[::-1])[::-1]
+    suffix_sq = np.cumsum((means ** 2)[::-1])[::-1]
+    remaining = n_batches - np.arange(n_batches)
+    variance = np.maximum(suffix_sq / remaining - (suffix_sum / remaining) ** 2, 0)
+    statistic = variance / remaining
+    cut = int(np.argmin(statistic[:n_batches // 2 + 1]))
+
+    # A dispersão é estimada sobre a série inteira (o MAD tolera a fase transitória; o resto escolhido pelo MSER
+    # é, por construção, o troço de menor variância) e a das médias dos lotes deduzida da dos pontos.
+    center = np.median(x[cut * batch:])
+    point_spread = band * robust_std(x)
+    while cut > 0 and abs(means[cut - 1] - center) <= point_spread / np.sqrt(batch):
+        cut -= 1
+    # Os lotes anteriores já estão fora da banda; dentro do lote de fronteira o corte é afinado ponto a ponto.
+    cut *= batch
+    boundary = max(cut - batch, 0)
+    while cut > boundary and abs(x[cut - 1] - center) <= point_spread:
+        cut -= 1
+    # O MSER tende a cortar logo a seguir a um lote extremo por acaso; o corte só é aceite se o troço descartado,
+    # no seu conjunto, se afastar significativamente do regime estável.
+    if cut and abs(x[:cut].mean() - center) <= point_spread / np.sqrt(cut):
+        return 0
+    return cut
+
+def robust_std(values):
+    """Desvio-padrão estimado pela mediana dos desvios absolutos (MAD), pouco sensível ao aquecimento/arrefecimento."""
+    return 1.4826 * np.median(np.abs(values - np.median(values))) + 1e-9
+
+def dense_series(seconds, values, length, fill=0.0):
+    """Série com um valor por segundo em [0, length), com 'fill' nos segundos sem dados."""
+    series = np.full(length, fill, dtype='float64')
+    seconds = np.asarray(seconds, dtype='int64')
+    inside = (seconds >= 0) & (seconds < length)
+    series[seconds[inside]] = np.asarray(values, dtype='float64')[inside]
+    return series
+
+def trim_window(series):
+    """Cortes (aquecimento, arrefecimento) em segundos de uma série por segundo: MSER na série e na série invertida."""
+    warm_up = mser_truncation(series)
+    cool_down = mser_truncation(series[warm_up:][::-1])
+    return warm_up, cool_down
+
+def detect_steady_window(tps_df, latency_df=None, batch=MSER_BATCH, min_duration=MIN_DURATION_S):
+    """
+    Janela estável [início, fim) em segundos relativos ao início da execução, a partir do TPS por segundo
+    (colunas second, tps) e, se dada, da latência agregada por segundo (colunas second, count, sum).
+    O aquecimento e o arrefecimento são detetados com MSER em cada série, e fica a janela mais restritiva;
+    se as duas juntas deixarem menos de um quarto da execução, usa-se só a do TPS. Execuções com menos de
+    'min_duration' segundos não são cortadas.
+    """
+    if tps_df.empty:
+        return 0, 0
+    length = int(tps_df['second'].max()) + 1
+    if latency_df is not None and not latency_df.empty:
+        length = max(length, int(latency_df['second'].max()) + 1)
+    if length < min_duration:
+        return 0, length
+
+    tps = dense_series(tps_df['second'], tps_df['tps'], length)
+    warm_up, cool_down = trim_window(tps)
+    start, end = warm_up, length - cool_down
+    if latency_df is not None and not latency_df.empty:
+        mean = (latency_df['sum'] / latency_df['count']).to_numpy()
+        # Segundos sem pedidos não têm latência; ficam com a mediana para não criarem degraus artificiais.
+        latency = dense_series(latency_df['second'], mean, length, fill=float(np.median(mean)))
+        latency_warm_up, latency_cool_down = trim_window(latency)
+        combined = max(start, latency_warm_up), min(end, length - latency_cool_down)
+        if combined[1] - combined[0] >= length / 4:
+            start, end = combined
+    return int(start), int(end)
@@ -0,0 +1,173 @@
+import os
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+# Cabeçalho completo do JTL em CSV, tal como o JMeter o grava com as opções por omissão.
+JTL_HEADER = ['timeStamp', 'elapsed', 'label', 'responseCode', 'responseMessage', 'threadName', 'dataType',
+              'success', 'failureMessage', 'bytes', 'sentBytes', 'grpThreads', 'allThreads', 'URL', 'Latency',
+              'IdleTime', 'Connect']
+JTL_ENDPOINTS = {'Open': 'open-async', 'Query': 'query', 'Transfer': 'transfer-async'}
+ROUNDS = ['Open', 'Query', 'Transfer']
+CONTAINERS = [f'node{i}' for i in range(1, 7)]
+# Linhas geradas e escritas de cada vez; limita a memória independentemente do tamanho pedido.
+CHUNK_SIZE = 500_000
+# Início fixo das execuções, para que os ficheiros gerados sejam reprodutíveis com a mesma semente.
+START_MS = 1_760_000_000_000
+CALIPER_START = datetime(2024, 3, 12, 10, 0, 0)
+
+def write_jtl(path, samples, rate, rng, error_rate=0.01, threads=5, endpoint='open-async',
+              latency_ms=30.0, start_ms=START_MS, chunk_size=CHUNK_SIZE):
+    """
+    Grava um JTL com 'samples' pedidos a chegar segundo um processo de Poisson de 'rate' pedidos/s, latências
+    log-normais com mediana 'latency_ms' e uma fração 'error_rate' de falhas (HTTP 500). Retorna a duração (s).
+    """
+    with open(path, 'w', newline='') as f:
+        f.write(','.join(JTL_HEADER) + '\n')
+        clock = float(start_ms)
+        for offset in range(0, samples, chunk_size):
+            n = min(chunk_size, samples - offset)
+            arrivals = clock + np.cumsum(rng.exponential(1000.0 / rate, n))
+            clock = arrivals[-1]
+            elapsed = np.maximum(rng.lognormal(np.log(latency_ms), 0.8, n), 1).astype(np.int64)
+            success = rng.random(n) >= error_rate
+            thread = (np.arange(offset, offset + n) % threads) + 1
+            connect = rng.integers(0, 3, n)
+            chunk = pd.DataFrame({
+                'timeStamp': arrivals.astype(np.int64),
+                'elapsed': elapsed,
+                'label': 'HTTP Request',
+                'responseCode': np.where(success, '202', '500'),
+                'responseMessage': np.where(success, 'Accepted', 'Internal Server Error'),
+                'threadName': np.char.add('Thread Group 1-', thread.astype(str)),
+                'dataType': 'text',
+                'success': np.where(success, 'true', 'false'),
+                'failureMessage': '',
+                'bytes': rng.integers(180, 260, n),
+                'sentBytes': rng.integers(140, 200, n),
+                'grpThreads': threads,
+                'allThreads': threads,
+                'URL': f'http://localhost:3000/{endpoint}',
+                'Latency': elapsed,
+                'IdleTime': 0,
+                'Connect': connect,
+            })
+            chunk.to_csv(f, header=False, index=False)
+    return (clock - start_ms) / 1000
+
+def write_docker_stats(path, duration_s, rng, containers=CONTAINERS, interval_s=1.0, start_ms=START_MS):
+    """
+    Grava um log de docker stats no formato lido por analyze_docker_stats: uma linha por container e amostra
+    (nome,CPU%,memóriaMiB,rede rx/tx e disco r/w cumulativos em KB,timestamp em ms).
+    """
+    samples = max(int(duration_s / interval_s), 1)
+    shape = (samples, len(containers))
+    cpu = np.clip(rng.normal(25, 8, shape), 0, None)
+    mem = 300 + np.cumsum(rng.normal(0.05, 0.5, shape), axis=0)
+    counters = [np.cumsum(rng.exponential(scale, shape), axis=0) for scale in (40.0, 35.0, 2.0, 15.0)]
+    timestamps = start_ms + (np.arange(samples)[:, None] * interval_s * 1000 + np.arange(len(containers)) * 7)
+    columns = [np.tile(np.array(containers), samples),
+               np.char.mod('%.2f%%', cpu.ravel()),
+               np.char.mod('%.2fMiB', mem.ravel())]
+    columns += [np.char.mod('%.2fKB', counter.ravel()) for counter in counters]
+    columns.append(timestamps.ravel().astype(np.int64).astype(str))
+    with open(path, 'w') as f:
+        f.write('\n'.join(','.join(fields) for fields in zip(*columns)) + '\n')
+
+def _table(columns, rows):
+    widths = [max(len(str(value)) for value in [column] + [row[i] for row in rows]) for i, column in enumerate(columns)]
+    border = '+' + '+'.join('-' * (w + 2) for w in widths) + '+'
+    line = lambda values: '| ' + ' | '.join(str(v).ljust(w) for v, w in zip(values, widths)) + ' |'
+    separator = '|' + '|'.join('-' * (w + 2) for w in widths) + '|'
+    return [border, line(columns), separator] + [line(row) for row in rows] + [border]
+
+def write_caliper_log(path, transactions, rng, containers=CONTAINERS, start=CALIPER_START):
+    """
+    Grava um log do Caliper com o formato lido por parse_caliper_log: para cada rodada (nome -> número de
+    transações), o início, uma linha de debug por transação submetida, as tabelas de resultados e de recursos
+    e o fim da rodada.
+    """
+    from generateGraphsCaliper import PERFORMANCE_COLUMNS, RESOURCE_COLUMNS
+    stamp = lambda t: t.strftime('%Y.%m.%d-%H:%M:%S.') + f'{t.microsecond // 1000:03d}'
+    clock = start
+    with open(path, 'w') as f:
+        f.write(f"{stamp(clock)} info  [caliper] [cli-launch-manager] \tSet workspace path: {os.getcwd()}\n")
+        for number, (round_name, count) in enumerate(transactions.items(), start=1):
+            clock += timedelta(seconds=60)
+            f.write(f"{stamp(clock)} info  [caliper] [round-orchestrator] \tStarted round {number} ({round_name})\n")
+            offsets = np.cumsum(rng.exponential(0.02, count))
+            for start_offset in range(0, count, CHUNK_SIZE):
+                chunk = offsets[start_offset:start_offset + CHUNK_SIZE]
+                f.writelines(f"{stamp(clock + timedelta(seconds=float(s)))} debug [caliper] [worker] \ttx {i} submitted\n"
+                             for i, s in enumerate(chunk, start=start_offset))
+            clock += timedelta(seconds=float(offsets[-1]) if count else 0)
+            failures = int(rng.binomial(count, 0.01))
+            latencies = np.sort(rng.lognormal(-0.2, 0.6, 3))
+            performance = [[round_name, count - failures, failures, f'{rng.normal(50, 0.5):.1f}', f'{latencies[2]:.2f}',
+                            f'{latencies[0]:.2f}', f'{latencies[1]:.2f}', f'{rng.normal(49.5, 0.5):.1f}']]
+            resources = [[f'/{c}', f'{rng.normal(26, 2):.2f}', f'{rng.normal(13, 1):.2f}', f'{rng.normal(405, 3):.1f}',
+                          f'{rng.normal(393, 3):.1f}', f'{rng.uniform(0, 2):.1f}MB', f'{rng.integers(100, 900)}KB',
+                          f'{rng.uniform(5, 50):.1f}', '0.00'] for c in containers]
+            for title, columns, rows in (('Test result', PERFORMANCE_COLUMNS, performance),
+                                         ('docker resource stats', RESOURCE_COLUMNS, resources)):
+                f.write(f"{stamp(clock)} info  [caliper] [report-builder] \t### {title} ###\n")
+                f.write(f"{stamp(clock)} info  [caliper] [report-builder] \t\n")
+                f.write('\n'.join(_table(columns, rows)) + '\n')
+            clock += timedelta(seconds=1)
+            f.write(f"{stamp(clock)} info  [caliper] [round-orchestrator] \tFinished round {number} ({round_name}) in "
+                    f"{float(offsets[-1]) if count else 0:.2f} seconds\n")
+
+def generate_jmeter_results(output_dir, runs, samples, rate, seed=42, error_rate=0.01):
+    """Resultados JMeter sintéticos (JTL, docker stats e erros do back-end) para todas as rodadas e execuções."""
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    files = []
+    with open(os.path.join(output_dir, 'backend_errors.log'), 'w') as errors:
+        for round_name in ROUNDS:
+            for run in range(1, runs + 1):
+                jtl = os.path.join(output_dir, f'results_{round_name.lower()}_run_{run}.jtl')
+                stats = os.path.join(output_dir, f'docker_stats_{round_name.lower()}_run_{run}.log')
+                duration = write_jtl(jtl, samples, rate, rng, error_rate, endpoint=JTL_ENDPOINTS[round_name])
+                write_docker_stats(stats, duration, rng)
+                errors.write(f"{round_name},{run},{int(rng.binomial(samples, error_rate / 10))},{{}}\n")
+                files += [jtl, stats]
+    return files
+
+def generate_caliper_results(output_dir, runs, transactions, seed=42):
+    """Logs do Caliper sintéticos (caliper_log_run_<N>.txt) com 'transactions' transações por rodada."""
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    files = []
+    for run in range(1, runs + 1):
+        path = os.path.join(output_dir, f'caliper_log_run_{run}.txt')
+        write_caliper_log(path, {r.lower(): transactions for r in ROUNDS}, rng)
+        files.append(path)
+    return files
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Gera resultados sintéticos (JTL, docker stats e logs do Caliper) com o formato lido pelo "
+                    "generateGraphs.py e pelo generateGraphsCaliper.py, para medir os relatórios a várias escalas.")
+    parser.add_argument('output_dir', help="Diretório de saída")
+    parser.add_argument('--tool', choices=['jmeter', 'caliper', 'both'], default='both')
+    parser.add_argument('--runs', type=int, default=2, help="Execuções por rodada")
+    parser.add_argument('--samples', type=int, default=100_000, help="Pedidos por ficheiro JTL")
+    parser.add_argument('--rate', type=float, default=500.0, help="Pedidos por segundo simulados no JTL")
+    parser.add_argument('--error-rate', type=float, default=0.01, help="Fração de pedidos com falha no JTL")
+    parser.add_argument('--transactions', type=int, default=10_000,
+                        help="Transações por rodada em cada log do Caliper (uma linha de debug cada)")
+    parser.add_argument('--seed', type=int, default=42, help="Semente do gerador aleatório")
+    args = parser.parse_args()
+
+    files = []
+    if args.tool in ('jmeter', 'both'):
+        files += generate_jmeter_results(args.output_dir, args.runs, args.samples, args.rate, args.seed, args.error_rate)
+    if args.tool in ('caliper', 'both'):
+        files += generate_caliper_results(args.output_dir, args.runs, args.transactions, args.seed)
+    size_mb = sum(os.path.getsize(f) for f in files) / 1024 ** 2
+    print(f"{len(files)} ficheiros gerados em {args.output_dir} ({size_mb:.1f} MB)")
+
+if __name__ == "__main__":
+    main()
@@ -1,130 +1,211 @@
-import subprocess
 import re
-import os
+import sys
 import json
-import yaml # Importar a biblioteca PyYAML
+import time
+import argparse
+import http.client
+from concurrent.futures import ThreadPoolExecutor
 
-def get_enode(node_number):
+try:
+    import yaml # Importar a biblioteca PyYAML
+except ImportError:
+    print("Erro: PyYAML não está instalado.")
+    print("Por favor, instale PyYAML: pip install PyYAML")
+    sys.exit(1)
+
+# Nós usados como bootnodes por omissão (os mesmos que a configuração original usava).
+DEFAULT_BOOTNODES = [1, 3]
+ENODE_HOST_RE = re.compile(r'@([^:]+):(\d+)')
+BOOTNODES_FLAG_RE = re.compile(r'--bootnodes=\S*\s*')
+
+class NodeRpc:
     """
-    Obtém o enode para um nó Besu específico.
-    Adiciona timeout para o curl para evitar esperas infinitas se o nó não responder.
+    Cliente JSON-RPC de um nó Besu sobre uma única ligação HTTP persistente (keep-alive),
+    reaberta automaticamente quando falha.
     """
-    port = 8545 + node_number - 1
-    command = f"curl -X POST --silent --connect-timeout 5 --max-time 10 --data '{{\"jsonrpc\":\"2.0\",\"method\":\"net_enode\",\"params\":[],\"id\":1}}' http://127.0.0.1:{port} | jq -r .result"
-    try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        enode = result.stdout.strip()
-        if not enode: # Verifica se o enode está vazio
-            print(f"Aviso: Enode vazio para Node-{node_number}. Verifique se o nó está rodando e acessível.")
-            return None
-        # Modifica o IP no enode para 127.0.0.1 e a porta para 30303 para Node-1 e 30305 para Node-3
-        if node_number == 1:
-            enode = re.sub(r'@\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}:\d+', '@<your IP>:30303', enode)
-        elif node_number == 3:
-            enode = re.sub(r'@\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}:\d+', '@<your IP>:30305', enode)
-        return enode
-    except subprocess.CalledProcessError as e:
-        print(f"Erro ao obter enode para Node-{node_number}: {e}")
-        print(f"Stderr: {e.stderr}")
-        return None
-    except Exception as e:
-        print(f"Ocorreu um erro inesperado ao obter enode para Node-{node_number}: {e}")
-        return None
-
-def update_docker_compose_with_yq(file_path, enode1, enode3):
+    def __init__(self, name, host, port, timeout=5):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection = None
+        self._next_id = 0
+
+    def call(self, method, params=()):
+        if self.connection is None:
+            self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        self._next_id += 1
+        body = json.dumps({'jsonrpc': '2.0', 'method': method, 'params': list(params), 'id': self._next_id})
+        try:
+            self.connection.request('POST', '/', body, {'Content-Type': 'application/json'})
+            response = json.loads(self.connection.getresponse().read())
+        except (OSError, http.client.HTTPException, ValueError):
+            self.close()
+            raise
+        if 'error' in response:
+            raise RuntimeError(f"{method}: {response['error'].get('message')}")
+        return response.get('result')
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+def retry(func, deadline, description, initial_delay=0.25, max_delay=4.0):
+    """Repete func() com espera exponencial até ter sucesso ou até ao instante 'deadline' (time.monotonic)."""
+    delay = initial_delay
+    while True:
+        try:
+            return func()
+        except Exception as e:
+            if time.monotonic() + delay > deadline:
+                raise TimeoutError(f"{description}: sem resposta válida dentro do tempo limite ({e})") from e
+            time.sleep(delay)
+            delay = min(delay * 2, max_delay)
+
+def node_rpc_ports(compose_data):
+    """Porta JSON-RPC de cada serviço nodeN do docker-compose (--rpc-http-port), por número do nó."""
+    ports = {}
+    for service, config in (compose_data.get('services') or {}).items():
+        match = re.fullmatch(r'node(\d+)', service)
+        if not match:
+            continue
+        number = int(match.group(1))
+        port = re.search(r'--rpc-http-port=(\d+)', str(config.get('command', '')))
+        ports[number] = int(port.group(1)) if port else 8545 + number - 1
+    return dict(sorted(ports.items()))
+
+def get_enode(rpc, deadline, advertise_ip=None):
     """
-    Atualiza o arquivo docker-compose.yaml com os enodes fornecidos usando PyYAML para manipulação
-    e regex para a string do comando.
+    Obtém o enode de um nó, repetindo até o nó responder. O IP anunciado pode ser substituído
+    (ex.: quando o enode reportado não é alcançável pelos outros nós); a porta P2P do nó é mantida.
     """
-    new_bootnodes_string = f'--bootnodes="{enode1}","{enode3}"'
+    def query():
+        enode = rpc.call('net_enode')
+        if not enode:
+            raise RuntimeError("enode vazio")
+        return enode
+    enode = retry(query, deadline, f"enode de {rpc.name}")
+    if advertise_ip:
+        enode = ENODE_HOST_RE.sub(lambda m: f"@{advertise_ip}:{m.group(2)}", enode)
+    return enode
 
-    try:
-        # 1. Ler o arquivo YAML completo usando PyYAML
-        with open(file_path, 'r') as f:
-            # Usar SafeLoader para segurança ao carregar YAML
-            yaml_data = yaml.safe_load(f)
-
-        # Iterar sobre os nós de 2 a 6 para atualizar o comando
-        for i in range(2, 7):
-            node_name = f'node{i}'
-            
-            # Acessar o campo 'command' do nó específico
-            if node_name in yaml_data['services'] and 'command' in yaml_data['services'][node_name]:
-                current_command_content = yaml_data['services'][node_name]['command']
-
-                updated_command_content = ""
-                # 2. Modificar a string do comando em Python
-                # Verifica se --bootnodes já existe no bloco de comando
-                if re.search(r'--bootnodes=', current_command_content):
-                    # Substitui a linha --bootnodes existente
-                    updated_command_content = re.sub(
-                        r'--bootnodes=".*?"', 
-                        new_bootnodes_string, 
-                        current_command_content, 
-                        flags=re.MULTILINE
-                    )
-                else:
-                    # Adiciona --bootnodes após --genesis-file, garantindo a indentação.
-                    # Encontrar a linha --genesis-file e inserir após
-                    if re.search(r'--genesis-file=', current_command_content):
-                        updated_command_content = re.sub(
-                            r'(--genesis-file=/\S+)',
-                            r'\1\n' + new_bootnodes_string, 
-                            current_command_content,
-                            flags=re.MULTILINE
-                        )
-                    else:
-                        # Se --genesis-file não for encontrado, adicione no início do bloco de comando
-                        updated_command_content = new_bootnodes_string + "\n" + current_command_content
-                
-                # Atualizar o objeto Python com o comando modificado
-                yaml_data['services'][node_name]['command'] = updated_command_content
-                print(f"Comando para {node_name} modificado em memória.")
+def discover_enodes(rpcs, deadline, advertise_ip=None):
+    """Consulta os enodes de vários nós em paralelo; retorna {número do nó: enode}."""
+    with ThreadPoolExecutor(max_workers=max(len(rpcs), 1)) as executor:
+        futures = {number: executor.submit(get_enode, rpc, deadline, advertise_ip) for number, rpc in rpcs.items()}
+        return {number: future.result() for number, future in futures.items()}
+
+def update_docker_compose(file_path, compose_data, bootnode_enodes):
+    """
+    Define --bootnodes em todos os serviços nodeN do docker-compose.yaml com os enodes dos bootnodes,
+    excluindo o próprio nó. A flag existente é substituída por inteiro (todos os enodes), em vez de
+    acumular entradas de execuções anteriores.
+    """
+    for service, config in compose_data['services'].items():
+        match = re.fullmatch(r'node(\d+)', service)
+        if not match or 'command' not in config:
+            continue
+        number = int(match.group(1))
+        enodes = [enode for node, enode in bootnode_enodes.items() if node != number]
+        command = BOOTNODES_FLAG_RE.sub('', config['command'])
+        if enodes:
+            flag = '--bootnodes=' + ','.join(f'"{enode}"' for enode in enodes)
+            if re.search(r'--genesis-file=\S+', command):
+                # Adiciona --bootnodes logo após --genesis-file, como na configuração original.
+                command = re.sub(r'(--genesis-file=\S+)', lambda m: f"{m.group(1)} {flag}", command, count=1)
             else:
-                print(f"Aviso: O serviço '{node_name}' ou seu campo 'command' não foi encontrado no YAML.")
+                command = f"{flag} {command}"
+        config['command'] = command
+        print(f"Comando para {service} modificado em memória ({len(enodes)} bootnodes).")
 
-        # 3. Escrever o objeto Python modificado de volta para o arquivo YAML usando PyYAML
-        with open(file_path, 'w') as f:
-            # Usar default_flow_style=False para garantir que strings multilinhas sejam formatadas corretamente
-            # e sort_keys=False para manter a ordem original das chaves (opcional, mas útil para compose files)
-            yaml.dump(yaml_data, f, default_flow_style=False, sort_keys=False)
-        
-        print(f"Arquivo '{file_path}' atualizado com sucesso usando PyYAML.")
+    with open(file_path, 'w') as f:
+        # default_flow_style=False mantém as strings multilinha legíveis; sort_keys=False preserva a ordem.
+        yaml.dump(compose_data, f, default_flow_style=False, sort_keys=False)
+    print(f"Arquivo '{file_path}' atualizado com sucesso.")
 
-    except yaml.YAMLError as e:
-        print(f"Erro ao processar o arquivo YAML: {e}")
-    except Exception as e:
-        print(f"Ocorreu um erro inesperado: {e}")
+def wait_until_live(rpcs, min_peers, min_new_blocks, deadline, poll_interval=0.5):
+    """
+    Bloqueia até todos os nós terem pelo menos 'min_peers' peers e a cadeia ter produzido
+    'min_new_blocks' blocos novos desde o início da espera. Retorna {nó: (peers, bloco)}.
+    """
+    def status(rpc):
+        return int(rpc.call('net_peerCount'), 16), int(rpc.call('eth_blockNumber'), 16)
 
-if __name__ == "__main__":
-    compose_file = 'docker-compose.yaml' # Verifique se este é o caminho correto para o seu arquivo
+    with ThreadPoolExecutor(max_workers=max(len(rpcs), 1)) as executor:
+        # A primeira resposta de cada nó também usa espera exponencial: o nó pode ainda estar a arrancar.
+        first = dict(zip(rpcs, executor.map(lambda rpc: retry(lambda: status(rpc), deadline, f"estado de {rpc.name}"),
+                                            rpcs.values())))
+        start_block = max(block for _, block in first.values())
+        while True:
+            try:
+                current = dict(zip(rpcs, executor.map(status, rpcs.values())))
+            except Exception as e:
+                current = None
+                print(f"  -> Aviso: falha ao consultar os nós ({e}); a repetir...")
+            if current is not None:
+                peers_ok = all(peers >= min_peers for peers, _ in current.values())
+                blocks_ok = max(block for _, block in current.values()) - start_block >= min_new_blocks
+                if peers_ok and blocks_ok:
+                    return current
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"a rede não ficou operacional dentro do tempo limite (último estado: {current})")
+            time.sleep(poll_interval)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Configura os bootnodes do docker-compose.yaml a partir dos enodes dos nós em execução "
+                    "e/ou espera até a rede Besu estar operacional (peers ligados e blocos a ser produzidos).")
+    parser.add_argument('--compose-file', default='docker-compose.yaml', help="Caminho do docker-compose.yaml")
+    parser.add_argument('--host', default='127.0.0.1', help="Máquina onde os nós expõem o JSON-RPC")
+    parser.add_argument('--bootnodes', default=','.join(map(str, DEFAULT_BOOTNODES)),
+                        help="Números dos nós a usar como bootnodes, separados por vírgulas, ou 'all'")
+    parser.add_argument('--advertise-ip', help="IP a colocar nos enodes (por omissão, o reportado por cada nó)")
+    parser.add_argument('--wait-only', action='store_true', help="Não altera o docker-compose; apenas espera pela rede")
+    parser.add_argument('--wait', action='store_true', help="Depois de atualizar os bootnodes, espera também pela rede")
+    parser.add_argument('--min-peers', type=int, help="Peers mínimos por nó (por omissão, número de nós - 1)")
+    parser.add_argument('--min-blocks', type=int, default=2, help="Blocos novos que a rede tem de produzir")
+    parser.add_argument('--timeout', type=float, default=180, help="Tempo máximo de espera (s) por cada etapa")
+    args = parser.parse_args()
+
+    with open(args.compose_file, 'r') as f:
+        compose_data = yaml.safe_load(f)
+    ports = node_rpc_ports(compose_data)
+    if not ports:
+        print(f"Erro: nenhum serviço nodeN encontrado em {args.compose_file}.")
+        sys.exit(1)
+    rpcs = {number: NodeRpc(f"node{number}", args.host, port) for number, port in ports.items()}
+    print(f"{len(rpcs)} nós encontrados em {args.compose_file}.")
 
-    print("Verificando a instalação do yq...")
-    try:
-        # Verifica se yq está no PATH e é executável (ainda útil para depuração inicial)
-        subprocess.run("yq --version", shell=True, check=True, capture_output=True, text=True)
-        print("yq está instalado.")
-    except subprocess.CalledProcessError:
-        print("Aviso: yq não está instalado ou não está no PATH. O script usará PyYAML para manipulação de YAML.")
-    except FileNotFoundError:
-        print("Aviso: yq não foi encontrado. O script usará PyYAML para manipulação de YAML.")
-
-    # Verificar e instalar PyYAML se necessário
     try:
-        import yaml
-    except ImportError:
-        print("Erro: PyYAML não está instalado.")
-        print("Por favor, instale PyYAML: pip install PyYAML")
-        exit(1)
-
-    print("Obtendo enodes do Node-1 e Node-3...")
-    enode_node1 = get_enode(1)
-    enode_node3 = get_enode(3)
-
-    if enode_node1 and enode_node3:
-        print(f"Enode Node-1: {enode_node1}")
-        print(f"Enode Node-3: {enode_node3}")
-        print(f"Atualizando o arquivo {compose_file} usando PyYAML...")
-        update_docker_compose_with_yq(compose_file, enode_node1, enode_node3)
-    else:
-        print("Não foi possível obter um ou ambos os enodes necessários. Verifique se os nós estão rodando e acessíveis.")
+        if not args.wait_only:
+            bootnodes = list(ports) if args.bootnodes == 'all' else [int(n) for n in args.bootnodes.split(',')]
+            missing = [n for n in bootnodes if n not in rpcs]
+            if missing:
+                print(f"Erro: os bootnodes {missing} não existem no docker-compose.")
+                sys.exit(1)
+            print(f"Obtendo enodes dos nós {bootnodes}...")
+            start = time.monotonic()
+            enodes = discover_enodes({n: rpcs[n] for n in bootnodes}, start + args.timeout, args.advertise_ip)
+            for number, enode in enodes.items():
+                print(f"Enode node{number}: {enode}")
+            print(f"Enodes obtidos em {time.monotonic() - start:.1f}s. Atualizando o arquivo {args.compose_file}...")
+            update_docker_compose(args.compose_file, compose_data, enodes)
+
+        if args.wait_only or args.wait:
+            min_peers = args.min_peers if args.min_peers is not None else len(rpcs) - 1
+            print(f"Aguardando a rede: {min_peers} peers por nó e {args.min_blocks} blocos novos...")
+            start = time.monotonic()
+            state = wait_until_live(rpcs, min_peers, args.min_blocks, start + args.timeout)
+            for number, (peers, block) in state.items():
+                print(f"  node{number}: {peers} peers, bloco {block}")
+            print(f"Rede operacional em {time.monotonic() - start:.1f}s.")
+    except TimeoutError as e:
+        print(f"Erro: {e}")
+        sys.exit(1)
+    finally:
+        for rpc in rpcs.values():
+            rpc.close()
+
+if __name__ == "__main__":
+    main()